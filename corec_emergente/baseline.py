@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+baseline.py
+Versión vectorizada del sistema de trading tradicional (regla RSI/SMA).
+
+Reproduce exactamente la lógica de SistemaTradingTradicional.procesar, pero
+sobre la serie completa de precios en una sola pasada de NumPy: compra una
+fracción del capital cuando RSI < rsi_compra y el precio está sobre la SMA, y
+vende toda la posición cuando RSI > rsi_venta y el precio está bajo la SMA.
+Todas las funciones operan sobre el último eje, de modo que se pueden evaluar
+muchas trayectorias (P, T) y familias de variantes a la vez.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+VARIANTE_DEFECTO = {
+    "fraccion": 0.1,
+    "rsi_compra": 30,
+    "rsi_venta": 70,
+    "periodo_rsi": 14,
+    "periodo_sma": 50
+}
+
+
+def indicadores_tradicionales(precios, periodo_rsi: int = 14, periodo_sma: int = 50) -> Tuple[np.ndarray, np.ndarray]:
+    """RSI (media simple de ganancias/pérdidas) y SMA con los mismos arranques que Nucleus."""
+    precios = np.asarray(precios, dtype=float)
+    horas = precios.shape[-1]
+    rsi = np.full(precios.shape, 50.0)
+    sma = precios.copy()
+
+    if horas > periodo_rsi:
+        delta = np.diff(precios, axis=-1)
+        ganancias = sliding_window_view(np.maximum(delta, 0), periodo_rsi, axis=-1).sum(axis=-1) / periodo_rsi
+        perdidas = sliding_window_view(np.maximum(-delta, 0), periodo_rsi, axis=-1).sum(axis=-1) / periodo_rsi
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.where(perdidas > 0, ganancias / np.where(perdidas > 0, perdidas, 1), 100.0)
+        # La ventana que termina en delta[i - 1] corresponde a la hora i
+        rsi[..., periodo_rsi:] = (100 - 100 / (1 + rs))[..., :horas - periodo_rsi]
+
+    if horas > periodo_sma:
+        medias = sliding_window_view(precios, periodo_sma, axis=-1).mean(axis=-1)
+        sma[..., periodo_sma:] = medias[..., 1:]
+    return rsi, sma
+
+
+def _ultimo_indice(mascara: np.ndarray, estricto: bool = False) -> np.ndarray:
+    """Índice de la última posición True hasta t (o antes de t si estricto); -1 si no hay."""
+    idx = np.arange(mascara.shape[-1])
+    ultimo = np.maximum.accumulate(np.where(mascara, idx, -1), axis=-1)
+    if estricto:
+        ultimo = np.concatenate([np.full(ultimo.shape[:-1] + (1,), -1), ultimo[..., :-1]], axis=-1)
+    return ultimo
+
+
+def _valor_en(acumulado: np.ndarray, indice: np.ndarray) -> np.ndarray:
+    """acumulado[indice] a lo largo del último eje, con 0 donde indice == -1."""
+    valores = np.take_along_axis(acumulado, np.maximum(indice, 0), axis=-1)
+    return np.where(indice >= 0, valores, 0.0)
+
+
+def simular_tradicional(precios, rsi, sma_signal, capital_inicial: float = 10000, fraccion=0.1,
+                        rsi_compra=30, rsi_venta=70) -> np.ndarray:
+    """Curva de capital (capital + posición * precio) de la regla tradicional.
+
+    Los umbrales y la fracción pueden ser escalares o arrays que se difunden
+    contra las series, lo que permite evaluar una familia de variantes a la vez.
+    """
+    precios = np.asarray(precios, dtype=float)
+    rsi = np.asarray(rsi, dtype=float)
+    sma_signal = np.asarray(sma_signal)
+    fraccion = np.asarray(fraccion, dtype=float)
+
+    compra = (rsi < rsi_compra) & (sma_signal == 1)
+    venta = (rsi > rsi_venta) & (sma_signal == -1)
+    forma = np.broadcast_shapes(compra.shape, venta.shape, precios.shape, fraccion.shape)
+    compra = np.broadcast_to(compra, forma)
+    venta = np.broadcast_to(venta, forma)
+    precios = np.broadcast_to(precios, forma)
+    fraccion = np.broadcast_to(fraccion, forma)
+
+    # Una señal de venta sólo es efectiva si hubo una compra después de la última señal de venta
+    venta_efectiva = venta & (_ultimo_indice(compra) > _ultimo_indice(venta, estricto=True))
+    inicio_tramo = _ultimo_indice(venta_efectiva, estricto=True)
+
+    # Compras acumuladas dentro del tramo abierto y posición por unidad de capital del tramo
+    compras_total = np.cumsum(compra, axis=-1)
+    compras_tramo = compras_total - _valor_en(compras_total.astype(float), inicio_tramo)
+    peso = np.where(compra, fraccion * (1 - fraccion) ** np.maximum(compras_tramo - 1, 0) / precios, 0.0)
+    peso_total = np.cumsum(peso, axis=-1)
+    posicion_tramo = peso_total - _valor_en(peso_total, inicio_tramo)
+
+    factor = (1 - fraccion) ** compras_tramo + precios * posicion_tramo
+    multiplicador = np.where(venta_efectiva, factor, 1.0)
+    capital_tramo = capital_inicial * np.cumprod(multiplicador, axis=-1)
+    capital_previo = np.concatenate([np.full(forma[:-1] + (1,), float(capital_inicial)), capital_tramo[..., :-1]], axis=-1)
+    return capital_previo * factor
+
+
+def simular_variantes(precios, variantes: List[Dict[str, Any]], capital_inicial: float = 10000,
+                      rsi: Optional[np.ndarray] = None, sma: Optional[np.ndarray] = None) -> np.ndarray:
+    """Curvas de capital para una familia de variantes; resultado con forma (V,) + precios.shape.
+
+    Las variantes que comparten periodos de RSI/SMA reutilizan los indicadores.
+    Si se pasan rsi/sma precalculados se usan para todas las variantes.
+    """
+    precios = np.asarray(precios, dtype=float)
+    variantes = [{**VARIANTE_DEFECTO, **v} for v in variantes]
+    curvas = np.empty((len(variantes),) + precios.shape)
+    grupos = {}
+    for i, variante in enumerate(variantes):
+        grupos.setdefault((variante["periodo_rsi"], variante["periodo_sma"]), []).append(i)
+
+    extra = (1,) * precios.ndim
+    for (periodo_rsi, periodo_sma), indices in grupos.items():
+        if rsi is not None and sma is not None:
+            rsi_g, sma_g = np.asarray(rsi, dtype=float), np.asarray(sma, dtype=float)
+        else:
+            rsi_g, sma_g = indicadores_tradicionales(precios, periodo_rsi, periodo_sma)
+        sma_signal = np.where(precios > sma_g, 1, -1)
+        params = [variantes[i] for i in indices]
+        curvas[indices] = simular_tradicional(
+            precios, rsi_g, sma_signal, capital_inicial,
+            fraccion=np.array([p["fraccion"] for p in params]).reshape((-1,) + extra),
+            rsi_compra=np.array([p["rsi_compra"] for p in params]).reshape((-1,) + extra),
+            rsi_venta=np.array([p["rsi_venta"] for p in params]).reshape((-1,) + extra)
+        )
+    logger.debug("[Baseline] %d variantes evaluadas sobre %s", len(variantes), precios.shape)
+    return curvas
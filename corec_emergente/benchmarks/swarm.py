@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+swarm.py
+Benchmarks de escalado del enjambre: NanoEntidad, BloqueSimbiotico, PluginViviente y Nucleus.simular.
+
+Cada caso mide ciclos por segundo, percentiles de latencia por ciclo y memoria
+por entidad (tracemalloc, en una pasada separada para no distorsionar los
+tiempos). Todo corre con el transporte en proceso (CanalLocal). Los resultados
+se escriben en JSON y se comparan con un baseline guardado; un cambio en el
+camino caliente se mide ejecutando:
+
+    python -m benchmarks.swarm --preset rapido --baseline benchmarks/baseline.json
+
+El baseline se crea en la máquina de referencia con --guardar-baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from nucleus import Nucleus, generar_serie_mercado
+from entities.nano import NanoEntidad
+from blocks.symbiotic import BloqueSimbiotico
+from channels import CanalLocal
+from plugins.viviente.main import PluginViviente
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# nucleus: pares (entidades totales, bloques). bloque y nucleus se quedan en pocos miles de
+# entidades: el entrelazamiento enlaza cada par con la misma etiqueta, dentro del bloque y entre
+# bloques, así que construirlos y recorrerlos crece con n²; nano y viviente escalan linealmente.
+# En nucleus el coste lo marcan las entidades, no los bloques: 2000 entidades en 500 bloques
+# cuestan lo mismo que en 100, y así el preset completo cubre de 1 a 500 bloques
+PRESETS = {
+    "rapido": {
+        "nano": [10, 100, 1000],
+        "viviente": [10, 100, 1000],
+        "bloque": [10, 100, 1000],
+        "nucleus": [(10, 1), (100, 10), (500, 50)]
+    },
+    "completo": {
+        "nano": [10, 100, 1000, 10000, 100000],
+        "viviente": [10, 100, 1000, 10000, 100000],
+        "bloque": [10, 100, 1000, 5000],
+        "nucleus": [(10, 1), (100, 10), (1000, 50), (2000, 100), (2000, 500)]
+    }
+}
+
+# Métrica -> True si un valor mayor es mejor
+METRICAS_COMPARADAS = {
+    "ciclos_por_segundo": True,
+    "latencia_p99_ms": False,
+    "memoria_por_entidad_bytes": False
+}
+
+
+def _cargas(ciclos: int, semilla: int = 0) -> List[Dict[str, float]]:
+    datos = generar_serie_mercado(max(ciclos, 2), semilla)
+    rng = random.Random(semilla)
+    return [
+        {
+            "precio": datos["precios"][i],
+            "rsi": datos["rsi"][i],
+            "sma_signal": 1 if datos["precios"][i] > datos["sma"][i] else -1,
+            "volatilidad": 0.02 + 0.03 * rng.random(),
+            "dxy": datos["dxy"][i]
+        }
+        for i in range(ciclos)
+    ]
+
+
+def _resumen(duraciones: List[float], entidades: int, memoria: Optional[int]) -> Dict[str, Any]:
+    tiempos = np.asarray(duraciones)
+    total = float(tiempos.sum())
+    return {
+        "entidades": entidades,
+        "ciclos": len(duraciones),
+        "segundos": total,
+        "ciclos_por_segundo": len(duraciones) / total if total > 0 else 0.0,
+        "latencia_p50_ms": float(np.percentile(tiempos, 50) * 1000),
+        "latencia_p95_ms": float(np.percentile(tiempos, 95) * 1000),
+        "latencia_p99_ms": float(np.percentile(tiempos, 99) * 1000),
+        "memoria_por_entidad_bytes": memoria / entidades if memoria is not None and entidades else None
+    }
+
+
+def _memoria(construir: Callable[[], Any]) -> int:
+    """Bytes asignados (netos) al construir una estructura."""
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.take_snapshot()
+        objeto = construir()
+        despues = tracemalloc.take_snapshot()
+        neto = sum(s.size_diff for s in despues.compare_to(antes, "filename"))
+        del objeto
+        return neto
+    finally:
+        tracemalloc.stop()
+
+
+async def _medir(ciclo: Callable[[int], Any], ciclos: int, tiempo_max: float) -> List[float]:
+    """Ejecuta ciclos hasta agotar el número pedido o el tiempo máximo (al menos uno)."""
+    duraciones = []
+    limite = time.perf_counter() + tiempo_max
+    for i in range(ciclos):
+        inicio = time.perf_counter()
+        await ciclo(i)
+        duraciones.append(time.perf_counter() - inicio)
+        if time.perf_counter() > limite:
+            break
+    return duraciones
+
+
+def _nucleus_local() -> Nucleus:
+    return Nucleus({"transporte": "local", "memoria_max_global": 200, "log_level": "WARNING"})
+
+
+async def bench_nano(entidades: int, ciclos: int, tiempo_max: float) -> Dict[str, Any]:
+    canal = CanalLocal()
+    enjambre = [NanoEntidad(id=f"ent_{i}", canal=canal) for i in range(entidades)]
+    cargas = _cargas(ciclos)
+
+    async def ciclo(i):
+        for entidad in enjambre:
+            await entidad.procesar(cargas[i])
+
+    duraciones = await _medir(ciclo, ciclos, tiempo_max)
+    memoria = _memoria(lambda: [NanoEntidad(id=f"ent_{i}", canal=canal) for i in range(entidades)])
+    return _resumen(duraciones, entidades, memoria)
+
+
+async def bench_viviente(entidades: int, ciclos: int, tiempo_max: float) -> Dict[str, Any]:
+    nucleus = _nucleus_local()
+    plugin = PluginViviente(nucleus)
+    nucleus.plugins["viviente"] = plugin
+    nucleus.entidades = [NanoEntidad(id=f"ent_{i}", canal=nucleus.canal) for i in range(entidades)]
+    cargas = _cargas(ciclos)
+    rng = random.Random(0)
+    # Los eventos se generan antes de medir: un ciclo es el procesamiento de un evento
+    mensajes = [json.dumps(await rng.choice(nucleus.entidades).procesar(cargas[i])) for i in range(ciclos)]
+
+    async def ciclo(i):
+        await plugin.procesar_evento(mensajes[i])
+
+    duraciones = await _medir(ciclo, ciclos, tiempo_max)
+    return _resumen(duraciones, entidades, None)
+
+
+async def bench_bloque(entidades: int, ciclos: int, tiempo_max: float) -> Dict[str, Any]:
+    nucleus = _nucleus_local()
+    # El grafo de resonancia se necesita para el entrelazamiento, pero sin suscribir el
+    # plugin: así se mide sólo el coste del bloque y sus entidades
+    nucleus.plugins["viviente"] = PluginViviente(nucleus)
+    miembros = [NanoEntidad(id=f"ent_{i}", canal=nucleus.canal) for i in range(entidades)]
+    bloque = BloqueSimbiotico(id="bloque_0", entidades=miembros, canal=nucleus.canal, config={"capital": 10000})
+    await nucleus.registrar_bloque(bloque)
+    cargas = _cargas(ciclos)
+
+    async def ciclo(i):
+        nucleus.ciclo_actual = i + 1
+        await bloque.procesar(cargas[i])
+
+    duraciones = await _medir(ciclo, ciclos, tiempo_max)
+    memoria = _memoria(lambda: BloqueSimbiotico(
+        id="bloque_m", entidades=[NanoEntidad(id=f"m_{i}", canal=CanalLocal()) for i in range(entidades)],
+        canal=CanalLocal(), config={"capital": 10000}
+    ))
+    return _resumen(duraciones, entidades, memoria)
+
+
+async def bench_nucleus(entidades: int, bloques: int, ciclos: int) -> Dict[str, Any]:
+    nucleus = _nucleus_local()
+    await nucleus.registrar_plugin("viviente", PluginViviente(nucleus))
+    por_bloque = max(1, entidades // bloques)
+    for b in range(bloques):
+        miembros = [NanoEntidad(id=f"ent_{b}_{i}", canal=nucleus.canal) for i in range(por_bloque)]
+        for entidad in miembros:
+            await nucleus.registrar_entidad(entidad)
+        await nucleus.registrar_bloque(BloqueSimbiotico(
+            id=f"bloque_{b}", entidades=miembros, canal=nucleus.canal, config={"capital": 10000}
+        ))
+    try:
+        await nucleus.simular(ciclos, datos_mercado=generar_serie_mercado(max(ciclos, 2), 0))
+    finally:
+        await nucleus.shutdown()
+    resultado = _resumen(nucleus.duraciones_ciclo, por_bloque * bloques, None)
+    resultado["bloques"] = bloques
+    return resultado
+
+
+async def ejecutar_suite(casos: Dict[str, List[Any]], ciclos: int = 50, ciclos_nucleus: int = 5,
+                         tiempo_max: float = 10.0) -> Dict[str, Dict[str, Any]]:
+    resultados = {}
+    for tipo, tamanos in casos.items():
+        for tamano in tamanos:
+            random.seed(0)
+            if tipo == "nucleus":
+                entidades, bloques = tamano
+                clave = f"nucleus/{entidades}x{bloques}"
+                resultado = await bench_nucleus(entidades, bloques, ciclos_nucleus)
+            else:
+                clave = f"{tipo}/{tamano}"
+                medir = {"nano": bench_nano, "viviente": bench_viviente, "bloque": bench_bloque}[tipo]
+                resultado = await medir(tamano, ciclos, tiempo_max)
+            resultados[clave] = resultado
+            logger.info("[Benchmark] %s: %.2f ciclos/s, p99 %.2f ms", clave, resultado["ciclos_por_segundo"], resultado["latencia_p99_ms"])
+    return resultados
+
+
+def comparar(actual: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+             tolerancia: float = 0.1) -> List[Dict[str, Any]]:
+    """Cambios relativos por caso y métrica; regresion=True si empeora más que la tolerancia."""
+    filas = []
+    for clave in sorted(set(actual) & set(baseline)):
+        for metrica, mayor_es_mejor in METRICAS_COMPARADAS.items():
+            nuevo, referencia = actual[clave].get(metrica), baseline[clave].get(metrica)
+            if nuevo is None or not referencia:
+                continue
+            cambio = (nuevo - referencia) / referencia
+            empeora = -cambio if mayor_es_mejor else cambio
+            filas.append({
+                "caso": clave,
+                "metrica": metrica,
+                "baseline": referencia,
+                "actual": nuevo,
+                "cambio": cambio,
+                "regresion": empeora > tolerancia
+            })
+    return filas
+
+
+def _casos_desde_args(preset: str, tipos: Optional[List[str]]) -> Dict[str, List[Any]]:
+    casos = dict(PRESETS[preset])
+    if tipos:
+        casos = {t: casos[t] for t in tipos}
+    return casos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de escalado del enjambre CoreC")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="rapido")
+    parser.add_argument("--tipos", nargs="+", choices=["nano", "viviente", "bloque", "nucleus"])
+    parser.add_argument("--ciclos", type=int, default=50)
+    parser.add_argument("--ciclos-nucleus", type=int, default=5)
+    parser.add_argument("--tiempo-max", type=float, default=10.0, help="Segundos máximos por caso (salvo nucleus)")
+    parser.add_argument("--salida", default="benchmarks/resultados.json")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--guardar-baseline", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.1)
+    parser.add_argument("--estricto", action="store_true", help="Código de salida 1 si hay regresiones")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    resultados = asyncio.run(ejecutar_suite(
+        _casos_desde_args(args.preset, args.tipos), args.ciclos, args.ciclos_nucleus, args.tiempo_max
+    ))
+    logging.disable(logging.NOTSET)
+    informe = {
+        "fecha": datetime.utcnow().isoformat(),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "preset": args.preset,
+        "resultados": resultados
+    }
+    try:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["resultados"]
+        informe["comparacion"] = comparar(resultados, baseline, args.tolerancia)
+    except FileNotFoundError:
+        logger.warning("[Benchmark] Sin baseline en %s; sólo se guardan los resultados", args.baseline)
+        informe["comparacion"] = []
+
+    with open(args.salida, "w") as f:
+        json.dump(informe, f, indent=2)
+    if args.guardar_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({k: v for k, v in informe.items() if k != "comparacion"}, f, indent=2)
+        logger.info("[Benchmark] Baseline guardado en %s", args.baseline)
+
+    regresiones = [c for c in informe["comparacion"] if c["regresion"]]
+    for c in regresiones:
+        logger.warning("[Benchmark] Regresión en %s %s: %.4g -> %.4g (%+.1f%%)",
+                       c["caso"], c["metrica"], c["baseline"], c["actual"], c["cambio"] * 100)
+    if regresiones and args.estricto:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
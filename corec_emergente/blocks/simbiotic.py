@@ -1,6 +1,7 @@
 from collections import Counter
 import json
 import random
+import time
 import logging
 from entities.nano import NanoEntidad
 
@@ -17,6 +18,7 @@ class BloqueSimbiotico:
         self.ganancia_neta = 0
         self.memoria_colectiva = []
         self.memoria_max = config.get("memoria_max", 50)
+        self.fraccion_posicion = config.get("fraccion_posicion", 0.1)
         self.estres_consecutivo = 0
         self._inicializar_entrelazamiento()
         self.canal.subscribe("bloque_comunicacion", self.recibir_mensaje)
@@ -28,7 +30,7 @@ class BloqueSimbiotico:
                 if i != j and entidad.etiqueta == otra_entidad.etiqueta:
                     entidad.entrelazadas.append(otra_entidad)
                     otra_entidad.entrelazadas.append(entidad)
-            for bloque in [b for b in self.canal.subscribers["bloque_comunicacion"] if b != self]:
+            for bloque in [b for b in self.canal.bloques_suscritos() if b is not self]:
                 for otra_entidad in bloque.entidades:
                     if entidad.etiqueta == otra_entidad.etiqueta and random.random() < 0.2:
                         entidad.entrelazadas.append(otra_entidad)
@@ -36,9 +38,12 @@ class BloqueSimbiotico:
 
     def _actualizar_entrelazamiento(self):
         grafo_resonancia = self.canal.nucleus.plugins["viviente"].grafo
+        bloques = self.canal.bloques_suscritos()
+        if self not in bloques:
+            bloques.append(self)
         for entidad in self.entidades:
             entidad.entrelazadas = []
-            for bloque in [b for b in self.canal.subscribers["bloque_comunicacion"] + [self]]:
+            for bloque in bloques:
                 for otra_entidad in bloque.entidades:
                     if entidad.id != otra_entidad.id and random.random() < 0.3:
                         fitness = bloque._calcular_fitness(bloque.memoria_colectiva[-5:], bloque.memoria_colectiva[-1]["precio"]) if bloque.memoria_colectiva else 0
@@ -70,7 +75,7 @@ class BloqueSimbiotico:
 
         decisiones = [r["decision"] for r in resultados]
         if decisiones.count("comprar") > len(decisiones) / 2 and self.capital > 0 and carga["dxy"] < 100:
-            cantidad = (self.capital * 0.1) / precio
+            cantidad = (self.capital * self.fraccion_posicion) / precio
             self.posicion += cantidad
             self.capital -= cantidad * precio
             logger.info(f"Bloque {self.id}: Compra {cantidad:.4f} BTC/ETH a {precio:.2f}")
@@ -2,11 +2,20 @@ import aioredis
 import json
 import logging
 import asyncio
+from collections import defaultdict
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class Channel:
+class _CanalBase:
+    """Consultas comunes a Channel y CanalLocal sobre sus suscriptores."""
+
+    def bloques_suscritos(self, channel="bloque_comunicacion"):
+        """Bloques suscritos a `channel` (el canal guarda sus métodos recibir_mensaje)."""
+        suscritos = self.subscribers.get(channel, [])
+        return [cb.__self__ for cb in suscritos if hasattr(getattr(cb, "__self__", None), "entidades")]
+
+class Channel(_CanalBase):
     def __init__(self, redis_config):
         self.redis_config = redis_config
         self.redis = None
@@ -57,3 +66,41 @@ class Channel:
             self.redis.close()
             await self.redis.wait_closed()
         logger.info("[Channel] Desconectado de Redis")
+
+class _Suscrito:
+    """Awaitable ya resuelto: la suscripción local queda hecha antes de esperarlo."""
+
+    def __await__(self):
+        return iter(())
+
+class CanalLocal(_CanalBase):
+    """Transporte en proceso con la misma interfaz que Channel, sin Redis.
+
+    Útil para simulaciones, barridos de parámetros y benchmarks donde todo el
+    enjambre vive en un único proceso.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.subscribers = defaultdict(list)
+        self.nucleus = None
+
+    async def connect(self):
+        logger.info("[CanalLocal] Transporte en proceso listo")
+
+    async def publish(self, channel, message):
+        for callback in list(self.subscribers.get(channel, [])):
+            try:
+                await callback(message)
+            except Exception as e:
+                logger.error(f"[CanalLocal] Error entregando mensaje en {channel}: {e}")
+
+    def subscribe(self, channel, callback):
+        # Se registra en el acto: los bloques se suscriben desde su __init__, sin await
+        self.subscribers[channel].append(callback)
+        logger.debug(f"[CanalLocal] Suscrito a {channel}")
+        return _Suscrito()
+
+    async def shutdown(self):
+        self.subscribers.clear()
+        logger.info("[CanalLocal] Cerrado")
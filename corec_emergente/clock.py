@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+clock.py
+Reloj intercambiable para el sistema: tiempo real o tiempo virtual por eventos discretos.
+
+Las entidades piden la hora y duermen a través de reloj_actual() y crean sus
+planificadores con crear_scheduler(). Con el reloj del sistema todo funciona
+como antes (APScheduler en tiempo de pared). Con un RelojVirtual instalado, los
+trabajos cron/interval y las esperas se disparan en instantes simulados tan
+rápido como permita la CPU, y el tiempo sólo avanza con avanzar()/avanzar_hasta().
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class RelojSistema:
+    virtual = False
+
+    def now(self, tz=None) -> datetime:
+        return datetime.now(tz)
+
+    def utcnow(self) -> datetime:
+        return datetime.utcnow()
+
+    def time(self) -> float:
+        return time.time()
+
+    async def sleep(self, segundos: float) -> None:
+        await asyncio.sleep(segundos)
+
+
+class RelojVirtual:
+    """Reloj de eventos discretos; la hora virtual es UTC sin zona horaria."""
+
+    virtual = True
+
+    def __init__(self, inicio: Optional[datetime] = None, max_pasos_drenado: int = 1000):
+        self._ahora = inicio or datetime(2024, 1, 1)
+        self._eventos = []
+        self._secuencia = itertools.count()
+        self._tareas = set()
+        self._dormidas = set()
+        self.max_pasos_drenado = max_pasos_drenado
+        self.eventos_disparados = 0
+
+    def now(self, tz=None) -> datetime:
+        if tz is None:
+            return self._ahora
+        return self._ahora.replace(tzinfo=timezone.utc).astimezone(tz)
+
+    def utcnow(self) -> datetime:
+        return self._ahora
+
+    def time(self) -> float:
+        return self._ahora.replace(tzinfo=timezone.utc).timestamp()
+
+    async def sleep(self, segundos: float) -> None:
+        if segundos <= 0:
+            await asyncio.sleep(0)
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        self.programar(self._ahora + timedelta(seconds=segundos), futuro)
+        tarea = asyncio.current_task()
+        if tarea is not None:
+            self._tareas.add(tarea)
+            self._dormidas.add(tarea)
+        try:
+            await futuro
+        finally:
+            self._dormidas.discard(tarea)
+
+    def programar(self, instante: datetime, accion) -> None:
+        """Programa un futuro a resolver o un callable a invocar en un instante virtual."""
+        heapq.heappush(self._eventos, (instante, next(self._secuencia), accion))
+
+    def lanzar(self, coro) -> asyncio.Task:
+        tarea = asyncio.create_task(coro)
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+        return tarea
+
+    def proximo_evento(self) -> Optional[datetime]:
+        return self._eventos[0][0] if self._eventos else None
+
+    async def avanzar(self, segundos: float) -> None:
+        await self.avanzar_hasta(self._ahora + timedelta(seconds=segundos))
+
+    async def avanzar_hasta(self, instante: datetime) -> None:
+        await self._drenar()
+        while self._eventos and self._eventos[0][0] <= instante:
+            momento, _, accion = heapq.heappop(self._eventos)
+            self._ahora = max(self._ahora, momento)
+            if isinstance(accion, asyncio.Future):
+                if not accion.done():
+                    accion.set_result(None)
+            else:
+                accion()
+            self.eventos_disparados += 1
+            await self._drenar()
+        self._ahora = max(self._ahora, instante)
+
+    async def _drenar(self) -> None:
+        """Cede el bucle hasta que todas las tareas del reloj estén terminadas o durmiendo."""
+        for _ in range(self.max_pasos_drenado):
+            await asyncio.sleep(0)
+            if all(t.done() or t in self._dormidas for t in self._tareas):
+                return
+        logger.debug("[RelojVirtual] Drenado incompleto: hay tareas esperando E/S real")
+
+
+class DisparadorIntervalo:
+    def __init__(self, intervalo: timedelta):
+        self.intervalo = intervalo
+        self.anterior = None
+
+    def siguiente(self, ahora: datetime) -> datetime:
+        base = self.anterior or ahora
+        self.anterior = base + self.intervalo
+        return self.anterior
+
+
+class DisparadorCron:
+    def __init__(self, hour: Optional[int] = None, minute: Optional[int] = None, second: int = 0):
+        self.hour = int(hour) if hour is not None else None
+        # Igual que APScheduler: los campos menos significativos que el indicado valen 0
+        self.minute = int(minute) if minute is not None else (0 if hour is not None else None)
+        self.second = int(second)
+
+    def siguiente(self, ahora: datetime) -> datetime:
+        candidato = ahora.replace(second=self.second, microsecond=0)
+        if candidato <= ahora:
+            candidato += timedelta(minutes=1)
+        for _ in range(60 * 24 * 2):
+            if (self.hour is None or candidato.hour == self.hour) and (self.minute is None or candidato.minute == self.minute):
+                return candidato
+            candidato += timedelta(minutes=1)
+        raise ValueError("[DisparadorCron] Sin coincidencias en 48 horas")
+
+
+def _crear_disparador(trigger, kwargs: Dict[str, Any]):
+    if trigger == "interval":
+        return DisparadorIntervalo(timedelta(
+            weeks=kwargs.get("weeks", 0), days=kwargs.get("days", 0), hours=kwargs.get("hours", 0),
+            minutes=kwargs.get("minutes", 0), seconds=kwargs.get("seconds", 0)
+        ))
+    if trigger == "cron":
+        return DisparadorCron(kwargs.get("hour"), kwargs.get("minute"), kwargs.get("second", 0))
+    if hasattr(trigger, "interval"):
+        # apscheduler.triggers.interval.IntervalTrigger
+        return DisparadorIntervalo(trigger.interval)
+    raise ValueError(f"[PlanificadorVirtual] Trigger no soportado: {trigger}")
+
+
+class PlanificadorVirtual:
+    """Subconjunto de la API de AsyncIOScheduler que dispara trabajos en tiempo virtual."""
+
+    def __init__(self, reloj: RelojVirtual):
+        self.reloj = reloj
+        self.jobs = {}
+        self.running = False
+
+    def add_job(self, func: Callable, trigger, id: Optional[str] = None, replace_existing: bool = False, **kwargs):
+        job_id = id or getattr(func, "__name__", str(func))
+        if job_id in self.jobs and not replace_existing:
+            raise ValueError(f"[PlanificadorVirtual] Trabajo {job_id} ya existe")
+        job = {"id": job_id, "func": func, "disparador": _crear_disparador(trigger, kwargs), "token": None}
+        self.jobs[job_id] = job
+        if self.running:
+            self._programar(job)
+        return job
+
+    def remove_job(self, job_id: str) -> None:
+        self.jobs.pop(job_id, None)
+
+    def start(self) -> None:
+        self.running = True
+        for job in self.jobs.values():
+            if job["token"] is None:
+                self._programar(job)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self.running = False
+        self.jobs.clear()
+
+    def _programar(self, job: Dict[str, Any]) -> None:
+        token = object()
+        job["token"] = token
+        instante = job["disparador"].siguiente(self.reloj.utcnow())
+        self.reloj.programar(instante, lambda: self._disparar(job, token))
+
+    def _disparar(self, job: Dict[str, Any], token: object) -> None:
+        if not self.running or self.jobs.get(job["id"]) is not job or job["token"] is not token:
+            return
+        try:
+            resultado = job["func"]()
+            if asyncio.iscoroutine(resultado):
+                self.reloj.lanzar(resultado)
+        except Exception as e:
+            logger.error(f"[PlanificadorVirtual] Error ejecutando {job['id']}: {e}")
+        self._programar(job)
+
+
+_reloj = RelojSistema()
+
+
+def reloj_actual():
+    return _reloj
+
+
+def usar_reloj(reloj) -> None:
+    """Instala el reloj de todo el proceso; debe hacerse antes de crear las entidades."""
+    global _reloj
+    _reloj = reloj
+    logger.info("[Clock] Reloj %s instalado", "virtual" if reloj.virtual else "del sistema")
+
+
+def crear_scheduler():
+    if _reloj.virtual:
+        return PlanificadorVirtual(_reloj)
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    return AsyncIOScheduler()
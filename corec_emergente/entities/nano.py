@@ -25,6 +25,7 @@ class NanoEntidad:
         }
         self.etiqueta = random.choice(list(self.etiquetas_posibles.keys()))
         self.estado_cuantico = self.etiquetas_posibles[self.etiqueta]
+        self.etiqueta_colapsada = max(self.estado_cuantico, key=self.estado_cuantico.get)
         self.entrelazadas = []
         logger.debug(f"[NanoEntidad] {self.id} inicializada")
 
@@ -53,6 +54,7 @@ class NanoEntidad:
             "decision": decision,
             "valor": impacto,
             "emocion": self.estado_emocional,
+            "precio": carga.get("precio"),
             "timestamp": time.time()
         }
         self.memoria_simbolica.append(evento)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+indicators.py
+Motor de indicadores incrementales: RSI de Wilder, SMA, EMA/MACD, ATR y volatilidad por rango.
+
+Cada vela cerrada actualiza el estado en O(1) (amortizado para el rango), sin
+recalcular ventanas. El estado se guarda por símbolo en MotorIndicadores y es
+serializable a JSON, de modo que una entidad puede arrancar en caliente sin
+volver a descargar el historial. serie_indicadores aplica el mismo motor a
+una serie completa para backtests y simulaciones.
+"""
+
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PARAMETROS_DEFECTO = {
+    "periodo_rsi": 14,
+    "periodo_sma": 50,
+    "ema_rapida": 12,
+    "ema_lenta": 26,
+    "periodo_senal": 9,
+    "periodo_atr": 14,
+    "periodo_volatilidad": 14
+}
+
+
+class EMA:
+    """EMA sembrada con la media simple de los primeros `periodo` valores."""
+
+    def __init__(self, periodo: int):
+        self.periodo = periodo
+        self.alfa = 2 / (periodo + 1)
+        self.n = 0
+        self.suma = 0.0
+        self.valor = None
+
+    def actualizar(self, x: float) -> Optional[float]:
+        if self.valor is None:
+            self.n += 1
+            self.suma += x
+            if self.n == self.periodo:
+                self.valor = self.suma / self.periodo
+        else:
+            self.valor += self.alfa * (x - self.valor)
+        return self.valor
+
+
+class MediaWilder:
+    """Media suavizada de Wilder: semilla simple y luego (media * (n - 1) + x) / n."""
+
+    def __init__(self, periodo: int):
+        self.periodo = periodo
+        self.n = 0
+        self.suma = 0.0
+        self.valor = None
+
+    def actualizar(self, x: float) -> Optional[float]:
+        if self.valor is None:
+            self.n += 1
+            self.suma += x
+            if self.n == self.periodo:
+                self.valor = self.suma / self.periodo
+        else:
+            self.valor = (self.valor * (self.periodo - 1) + x) / self.periodo
+        return self.valor
+
+
+class EstadoIndicadores:
+    """Estado incremental de indicadores para un símbolo."""
+
+    def __init__(self, **parametros):
+        self.parametros = {**PARAMETROS_DEFECTO, **parametros}
+        p = self.parametros
+        self.ganancia = MediaWilder(p["periodo_rsi"])
+        self.perdida = MediaWilder(p["periodo_rsi"])
+        self.ventana_sma = deque(maxlen=p["periodo_sma"])
+        self.suma_sma = 0.0
+        self.ema_rapida = EMA(p["ema_rapida"])
+        self.ema_lenta = EMA(p["ema_lenta"])
+        self.ema_senal = EMA(p["periodo_senal"])
+        self.macd = None
+        self.macd_senal = None
+        self.tr = MediaWilder(p["periodo_atr"])
+        self.ventana_rango = deque(maxlen=p["periodo_volatilidad"])
+        self._maximos = deque()
+        self._minimos = deque()
+        self.velas = 0
+        self.ultimo_cierre = None
+        self.ultimo_timestamp = None
+
+    def actualizar(self, cierre: float, maximo: Optional[float] = None, minimo: Optional[float] = None,
+                   timestamp: Optional[int] = None) -> bool:
+        """Incorpora una vela cerrada; las velas con timestamp ya visto se ignoran."""
+        if timestamp is not None and self.ultimo_timestamp is not None and timestamp <= self.ultimo_timestamp:
+            return False
+        maximo = cierre if maximo is None else maximo
+        minimo = cierre if minimo is None else minimo
+        previo = self.ultimo_cierre
+
+        if previo is not None:
+            delta = cierre - previo
+            self.ganancia.actualizar(max(delta, 0.0))
+            self.perdida.actualizar(max(-delta, 0.0))
+            self.tr.actualizar(max(maximo - minimo, abs(maximo - previo), abs(minimo - previo)))
+        else:
+            self.tr.actualizar(maximo - minimo)
+
+        if len(self.ventana_sma) == self.ventana_sma.maxlen:
+            self.suma_sma -= self.ventana_sma[0]
+        self.ventana_sma.append(cierre)
+        self.suma_sma += cierre
+
+        rapida = self.ema_rapida.actualizar(cierre)
+        lenta = self.ema_lenta.actualizar(cierre)
+        if rapida is not None and lenta is not None:
+            self.macd = rapida - lenta
+            self.macd_senal = self.ema_senal.actualizar(self.macd)
+
+        self._agregar_rango(cierre)
+        self.ultimo_cierre = cierre
+        if timestamp is not None:
+            self.ultimo_timestamp = timestamp
+        self.velas += 1
+        return True
+
+    def _agregar_rango(self, cierre: float) -> None:
+        # Máximo y mínimo de la ventana con colas monótonas (índice = número de vela)
+        indice = self.velas
+        limite = indice - self.ventana_rango.maxlen
+        self.ventana_rango.append(cierre)
+        while self._maximos and self._maximos[-1][1] <= cierre:
+            self._maximos.pop()
+        self._maximos.append((indice, cierre))
+        while self._minimos and self._minimos[-1][1] >= cierre:
+            self._minimos.pop()
+        self._minimos.append((indice, cierre))
+        while self._maximos[0][0] <= limite:
+            self._maximos.popleft()
+        while self._minimos[0][0] <= limite:
+            self._minimos.popleft()
+
+    @property
+    def listo(self) -> bool:
+        return self.ganancia.valor is not None and len(self.ventana_sma) == self.ventana_sma.maxlen
+
+    @property
+    def rsi(self) -> float:
+        if self.ganancia.valor is None:
+            return 50.0
+        if self.perdida.valor == 0:
+            return 100.0 if self.ganancia.valor > 0 else 50.0
+        return 100 - 100 / (1 + self.ganancia.valor / self.perdida.valor)
+
+    @property
+    def sma(self) -> Optional[float]:
+        """Media de la ventana; durante el calentamiento, media de las velas disponibles."""
+        return self.suma_sma / len(self.ventana_sma) if self.ventana_sma else None
+
+    @property
+    def atr(self) -> Optional[float]:
+        return self.tr.valor
+
+    @property
+    def volatilidad(self) -> float:
+        if not self.ventana_rango or not self.ultimo_cierre:
+            return 0.02
+        return (self._maximos[0][1] - self._minimos[0][1]) / self.ultimo_cierre
+
+    def snapshot(self, precio: Optional[float] = None) -> Dict[str, Any]:
+        precio = self.ultimo_cierre if precio is None else precio
+        sma = self.sma
+        return {
+            "rsi": self.rsi,
+            "sma": sma,
+            "sma_signal": (1 if precio > sma else -1) if sma is not None and precio is not None else 0,
+            "macd": self.macd if self.macd is not None else 0.0,
+            "macd_signal": self.macd_senal if self.macd_senal is not None else 0.0,
+            "atr": self.atr,
+            "volatilidad": self.volatilidad
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        def media(m):
+            return {"n": m.n, "suma": m.suma, "valor": m.valor}
+        return {
+            "parametros": self.parametros,
+            "ganancia": media(self.ganancia),
+            "perdida": media(self.perdida),
+            "tr": media(self.tr),
+            "ema_rapida": media(self.ema_rapida),
+            "ema_lenta": media(self.ema_lenta),
+            "ema_senal": media(self.ema_senal),
+            "macd": self.macd,
+            "macd_senal": self.macd_senal,
+            "ventana_sma": list(self.ventana_sma),
+            "ventana_rango": list(self.ventana_rango),
+            "velas": self.velas,
+            "ultimo_cierre": self.ultimo_cierre,
+            "ultimo_timestamp": self.ultimo_timestamp
+        }
+
+    @classmethod
+    def from_dict(cls, datos: Dict[str, Any]) -> "EstadoIndicadores":
+        estado = cls(**datos["parametros"])
+        for nombre in ("ganancia", "perdida", "tr", "ema_rapida", "ema_lenta", "ema_senal"):
+            media = getattr(estado, nombre)
+            media.n, media.suma, media.valor = datos[nombre]["n"], datos[nombre]["suma"], datos[nombre]["valor"]
+        estado.macd = datos["macd"]
+        estado.macd_senal = datos["macd_senal"]
+        estado.ventana_sma.extend(datos["ventana_sma"])
+        estado.suma_sma = sum(estado.ventana_sma)
+        # Las colas monótonas se reconstruyen desde la ventana de rango
+        estado.velas = datos["velas"] - len(datos["ventana_rango"])
+        for cierre in datos["ventana_rango"]:
+            estado._agregar_rango(cierre)
+            estado.velas += 1
+        estado.ultimo_cierre = datos["ultimo_cierre"]
+        estado.ultimo_timestamp = datos["ultimo_timestamp"]
+        return estado
+
+
+class MotorIndicadores:
+    """Estados de indicadores por símbolo, con persistencia JSON para arranque en caliente."""
+
+    def __init__(self, **parametros):
+        self.parametros = parametros
+        self.estados: Dict[str, EstadoIndicadores] = {}
+
+    def estado(self, symbol: str) -> EstadoIndicadores:
+        if symbol not in self.estados:
+            self.estados[symbol] = EstadoIndicadores(**self.parametros)
+        return self.estados[symbol]
+
+    def actualizar(self, symbol: str, cierre: float, maximo: Optional[float] = None,
+                   minimo: Optional[float] = None, timestamp: Optional[int] = None) -> bool:
+        return self.estado(symbol).actualizar(cierre, maximo, minimo, timestamp)
+
+    def actualizar_ohlcv(self, symbol: str, ohlcv: Iterable[Sequence[float]], incluye_abierta: bool = True) -> int:
+        """Incorpora velas ccxt [ts, o, h, l, c, v]; la última se omite si sigue abierta. Devuelve las nuevas."""
+        velas = list(ohlcv)
+        if incluye_abierta:
+            velas = velas[:-1]
+        return sum(self.actualizar(symbol, v[4], v[2], v[3], int(v[0])) for v in velas)
+
+    def snapshot(self, symbol: str, precio: Optional[float] = None) -> Dict[str, Any]:
+        return self.estado(symbol).snapshot(precio)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {symbol: estado.to_dict() for symbol, estado in self.estados.items()}
+
+    def cargar_dict(self, datos: Dict[str, Any]) -> None:
+        self.estados = {symbol: EstadoIndicadores.from_dict(estado) for symbol, estado in datos.items()}
+
+    def guardar(self, path: str) -> None:
+        temporal = f"{path}.tmp"
+        with open(temporal, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(temporal, path)
+
+    def cargar(self, path: str) -> bool:
+        try:
+            with open(path, "r") as f:
+                self.cargar_dict(json.load(f))
+            logger.info("[Indicadores] Estado cargado para %d símbolos desde %s", len(self.estados), path)
+            return True
+        except FileNotFoundError:
+            return False
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logger.error(f"[Indicadores] Estado inválido en {path}: {e}")
+            return False
+
+
+def serie_indicadores(cierres: Sequence[float], maximos: Optional[Sequence[float]] = None,
+                      minimos: Optional[Sequence[float]] = None, **parametros) -> Dict[str, np.ndarray]:
+    """Indicadores vela a vela de una serie completa (mismo motor que en tiempo real)."""
+    estado = EstadoIndicadores(**parametros)
+    n = len(cierres)
+    claves = ("rsi", "sma", "macd", "macd_signal", "atr", "volatilidad")
+    salida = {clave: np.empty(n) for clave in claves}
+    for i in range(n):
+        estado.actualizar(
+            float(cierres[i]),
+            float(maximos[i]) if maximos is not None else None,
+            float(minimos[i]) if minimos is not None else None
+        )
+        valores = estado.snapshot()
+        for clave in claves:
+            valor = valores[clave]
+            salida[clave][i] = np.nan if valor is None else valor
+    salida["sma_signal"] = np.sign(np.asarray(cierres, dtype=float) - salida["sma"]).astype(int)
+    return salida
+
+
+def calcular_macd(precios: List[float], **parametros) -> float:
+    """MACD de la última vela de una ventana de precios (0.0 si no hay velas suficientes)."""
+    if not precios:
+        return 0.0
+    return float(serie_indicadores(precios, **parametros)["macd"][-1])
@@ -2,13 +2,18 @@ import asyncio
 import logging
 import random
 import math
+import time
 from collections import Counter
 import json
 import aioredis
 from datetime import datetime
 from entities.nano import NanoEntidad
 from blocks.symbiotic import BloqueSimbiotico
-from channels import Channel
+from channels import Channel, CanalLocal
+from baseline import simular_tradicional
+from indicators import serie_indicadores
+from scenarios import generar_escenario
+import numpy as np
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,6 +41,22 @@ class SistemaTradingTradicional:
         
         return (self.capital + self.posicion * precio - 10000) / 10000
 
+def generar_serie_mercado(horas=720, semilla=None):
+    rng = random.Random(semilla) if semilla is not None else random
+    precio_inicial = 50000
+    precios = [precio_inicial]
+    dxy = [100]
+    for _ in range(horas - 1):
+        cambio = rng.gauss(0, 0.01) + 0.0005 * math.sin(_ / 24)
+        precios.append(precios[-1] * (1 + cambio))
+        dxy_cambio = rng.gauss(0, 0.005) - 0.0002 * math.sin(_ / 24)
+        dxy.append(dxy[-1] * (1 + dxy_cambio))
+    
+    indicadores = serie_indicadores(precios)
+    rsi = indicadores["rsi"].tolist()
+    sma = indicadores["sma"].tolist()
+    return {"precios": precios, "rsi": rsi, "sma": sma, "dxy": dxy}
+
 class Nucleus:
     def __init__(self, config=None):
         self.config = config or {
@@ -43,7 +64,11 @@ class Nucleus:
             "memoria_max_global": 200,
             "log_level": "INFO"
         }
-        self.canal = Channel(self.config["redis"])
+        if self.config.get("transporte") == "local":
+            self.canal = CanalLocal(self.config.get("redis"))
+        else:
+            self.canal = Channel(self.config["redis"])
+        self.canal.nucleus = self
         self.entidades = []
         self.bloques = []
         self.plugins = {}
@@ -53,8 +78,10 @@ class Nucleus:
         self.dxy = []
         self.memoria_global = []
         self.memoria_max_global = self.config["memoria_max_global"]
+        self.fitness_threshold = self.config.get("fitness_threshold", 0.01)
         self.ciclo_actual = 0
-        logger.setLevel(self.config["log_level"])
+        self.duraciones_ciclo = []
+        logger.setLevel(self.config.get("log_level", "INFO"))
         logger.info("[Nucleus] Inicializado")
 
     async def registrar_entidad(self, entidad):
@@ -70,40 +97,18 @@ class Nucleus:
         await plugin.inicializar()
         logger.debug(f"[Nucleus] Plugin {nombre} registrado")
 
-    def generar_datos_mercado(self, horas=720):
-        precio_inicial = 50000
-        precios = [precio_inicial]
-        dxy = [100]
-        for _ in range(horas - 1):
-            cambio = random.gauss(0, 0.01) + 0.0005 * math.sin(_ / 24)
-            precios.append(precios[-1] * (1 + cambio))
-            dxy_cambio = random.gauss(0, 0.005) - 0.0002 * math.sin(_ / 24)
-            dxy.append(dxy[-1] * (1 + dxy_cambio))
-        
-        rsi = []
-        for i in range(horas):
-            if i < 14:
-                rsi.append(50)
-            else:
-                ganancias = [max(precios[j] - precios[j-1], 0) for j in range(i-13, i+1)]
-                perdidas = [max(precios[j-1] - precios[j], 0) for j in range(i-13, i+1)]
-                avg_ganancia = sum(ganancias) / 14
-                avg_perdida = sum(perdidas) / 14
-                rs = avg_ganancia / avg_perdida if avg_perdida > 0 else 100
-                rsi.append(100 - 100 / (1 + rs))
-        
-        sma = []
-        for i in range(horas):
-            if i < 50:
-                sma.append(precios[i])
-            else:
-                sma.append(sum(precios[i-49:i+1]) / 50)
-        
-        self.precios = precios
-        self.rsi = rsi
-        self.sma = sma
-        self.dxy = dxy
-        logger.info("[Nucleus] Datos de mercado generados para %d horas", horas)
+    def generar_datos_mercado(self, horas=720, semilla=None, escenario=None):
+        if escenario:
+            self.cargar_datos_mercado(generar_escenario(escenario, horas, semilla=semilla).datos_nucleus())
+        else:
+            self.cargar_datos_mercado(generar_serie_mercado(horas, semilla))
+        logger.info("[Nucleus] Datos de mercado generados para %d horas (escenario: %s)", horas, escenario or "aleatorio")
+
+    def cargar_datos_mercado(self, datos):
+        self.precios = list(datos["precios"])
+        self.rsi = list(datos["rsi"])
+        self.sma = list(datos["sma"])
+        self.dxy = list(datos["dxy"])
 
     async def analizar_memoria_global(self):
         if not self.memoria_global:
@@ -159,18 +164,25 @@ class Nucleus:
             return True, nueva_etiqueta, nueva_emocion
         return False, None, None
 
-    async def simular(self, ciclos=720):
-        self.generar_datos_mercado(ciclos)
+    async def simular(self, ciclos=720, datos_mercado=None):
+        if datos_mercado is not None:
+            self.cargar_datos_mercado(datos_mercado)
+            ciclos = min(ciclos, len(self.precios))
+        else:
+            self.generar_datos_mercado(ciclos)
         capital_inicial = sum(b.capital for b in self.bloques) / len(self.bloques)
         drawdown_max = 0
-        sistema_tradicional = SistemaTradingTradicional(capital_inicial)
-        retornos_tradicional = []
+        precios = np.asarray(self.precios[:ciclos])
+        curva_tradicional = simular_tradicional(precios, self.rsi[:ciclos], np.where(precios > np.asarray(self.sma[:ciclos]), 1, -1), capital_inicial)
+        retornos_tradicional = ((curva_tradicional - 10000) / 10000).tolist()
         mutaciones = 0
         relaciones_simbolicas = []
         entrelazamientos = []
         ajustes_salud = 0
+        self.duraciones_ciclo = []
         
         for ciclo in range(ciclos):
+            inicio_ciclo = time.perf_counter()
             self.ciclo_actual = ciclo
             logger.info(f"\n--- Ciclo {ciclo + 1} (Hora {ciclo}) ---")
             precio = self.precios[ciclo]
@@ -194,7 +206,7 @@ class Nucleus:
                 logger.info(f"Bloque {bloque.id} - Fitness: {fitness:.2%}, Capital: {capital_actual:.2f}, Drawdown: {drawdown:.2%}")
                 for entidad in bloque.entidades:
                     logger.debug(f"  Entidad {entidad.id}: Etiqueta={entidad.etiqueta_colapsada}, Emoción={entidad.estado_emocional}, Decisión={entidad.memoria_simbolica[-1]['decision']}")
-                if await bloque.reparar(fitness_threshold=0.01):
+                if await bloque.reparar(fitness_threshold=self.fitness_threshold):
                     logger.info(f"Bloque {bloque.id} reparado mediante mutación")
                     mutaciones += 1
             
@@ -215,20 +227,18 @@ class Nucleus:
                     logger.info(f"Enjambre: Ajuste de salud simbólica a {nueva_etiqueta} con emoción {nueva_emocion}")
                     ajustes_salud += 1
 
-            fitness_tradicional = sistema_tradicional.procesar(carga)
-            capital_tradicional = sistema_tradicional.capital + sistema_tradicional.posicion * precio
-            retornos_tradicional.append(fitness_tradicional)
-            logger.info(f"Sistema Tradicional - Fitness: {fitness_tradicional:.2%}, Capital: {capital_tradicional:.2f}")
+            logger.info(f"Sistema Tradicional - Fitness: {retornos_tradicional[ciclo]:.2%}, Capital: {curva_tradicional[ciclo]:.2f}")
             
             relaciones_simbolicas.append(len(self.plugins["viviente"].grafo.relaciones))
             entrelazamientos.append(sum(len(e.entrelazadas) for e in self.entidades) / len(self.entidades) if self.entidades else 0)
+            self.duraciones_ciclo.append(time.perf_counter() - inicio_ciclo)
 
         capital_final = sum(b.capital + b.posicion * precio for b in self.bloques) / len(self.bloques)
         roi = (capital_final - capital_inicial) / capital_inicial
         retornos = [(sum(b.capital + b.posicion * self.precios[i] for b in self.bloques) / len(self.bloques) - capital_inicial) / capital_inicial for i in range(ciclos)]
         sharpe = (sum(retornos) / len(retornos)) / (max(0.0001, sum((r - sum(retornos)/len(retornos))**2 for r in retornos)**0.5 / len(retornos))) if retornos else 0
         
-        capital_final_tradicional = sistema_tradicional.capital + sistema_tradicional.posicion * precio
+        capital_final_tradicional = float(curva_tradicional[-1])
         roi_tradicional = (capital_final_tradicional - capital_inicial) / capital_inicial
         sharpe_tradicional = (sum(retornos_tradicional) / len(retornos_tradicional)) / (max(0.0001, sum((r - sum(retornos_tradicional)/len(retornos_tradicional))**2 for r in retornos_tradicional)**0.5 / len(retornos_tradicional))) if retornos_tradicional else 0
         
@@ -247,6 +257,20 @@ class Nucleus:
         logger.info(f"  Sharpe Ratio: {sharpe_tradicional:.2f}")
         logger.info(f"  Capital Final: {capital_final_tradicional:.2f} USDT")
 
+        return {
+            "roi": roi,
+            "sharpe": sharpe,
+            "drawdown_max": drawdown_max,
+            "capital_final": capital_final,
+            "mutaciones": mutaciones,
+            "ajustes_salud": ajustes_salud,
+            "relaciones_simbolicas": max(relaciones_simbolicas),
+            "entrelazamientos_promedio": sum(entrelazamientos) / len(entrelazamientos),
+            "roi_tradicional": roi_tradicional,
+            "sharpe_tradicional": sharpe_tradicional,
+            "capital_final_tradicional": capital_final_tradicional
+        }
+
     async def shutdown(self):
         for plugin in self.plugins.values():
             await plugin.shutdown()
@@ -35,7 +35,7 @@ class TradingSymbioticBlock:
                 if i != j and entidad.etiqueta == otra_entidad.etiqueta:
                     entidad.entrelazadas.append(otra_entidad)
                     otra_entidad.entrelazadas.append(entidad)
-            for bloque in [b for b in self.canal.subscribers["bloque_comunicacion"] if b != self]:
+            for bloque in [b for b in self.canal.bloques_suscritos() if b is not self]:
                 for otra_entidad in bloque.entidades:
                     if entidad.etiqueta == otra_entidad.etiqueta and random.random() < 0.2:
                         entidad.entrelazadas.append(otra_entidad)
@@ -44,9 +44,12 @@ class TradingSymbioticBlock:
     def _actualizar_entrelazamiento(self):
         try:
             grafo_resonancia = self.canal.nucleus.plugins["viviente"].grafo
+            bloques = self.canal.bloques_suscritos()
+            if self not in bloques:
+                bloques.append(self)
             for entidad in self.entidades:
                 entidad.entrelazadas = []
-                for bloque in [b for b in self.canal.subscribers["bloque_comunicacion"] + [self]]:
+                for bloque in bloques:
                     for otra_entidad in bloque.entidades:
                         if entidad.id != otra_entidad.id and random.random() < 0.3:
                             fitness = bloque._calcular_fitness(bloque.memoria_colectiva[-5:], bloque.memoria_colectiva[-1]["precio"]) if bloque.memoria_colectiva else 0
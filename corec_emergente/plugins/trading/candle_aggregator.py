@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+candle_aggregator.py
+Agregador incremental de velas multi-timeframe (1m/5m/15m/1h/4h/1d) a partir de trades o klines de 1m.
+
+Cada símbolo guarda, por timeframe, la vela abierta y un buffer circular numpy
+con las últimas velas cerradas [ts, open, high, low, close, volume]. Un trade o
+una kline cerrada de 1m actualiza a la vez todos los timeframes, así que las
+estrategias e indicadores pueden leer varios timeframes sin pedir más velas al
+exchange ni remuestrear con pandas. aggregate_array hace lo mismo de forma
+vectorizada sobre una serie completa (p. ej. en backtests).
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from .ohlcv_store import timeframe_ms
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEFRAMES = ("1m", "5m", "15m", "1h", "4h", "1d")
+
+
+class RingBuffer:
+    """Buffer circular de velas (capacity x 6) sin realocaciones."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, 6))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, vela: Sequence[float]) -> None:
+        fin = (self.start + self.size) % self.capacity
+        self.data[fin] = vela
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def array(self, n: Optional[int] = None) -> np.ndarray:
+        """Últimas n velas en orden cronológico (vista si no da la vuelta al buffer)."""
+        n = self.size if n is None else min(n, self.size)
+        inicio = (self.start + self.size - n) % self.capacity
+        if inicio + n <= self.capacity:
+            return self.data[inicio:inicio + n]
+        return np.concatenate((self.data[inicio:], self.data[:inicio + n - self.capacity]))
+
+
+class CandleAggregator:
+    def __init__(self, timeframes: Iterable[str] = DEFAULT_TIMEFRAMES, capacity: int = 500):
+        self.timeframes = {tf: timeframe_ms(tf) for tf in timeframes}
+        self.capacity = capacity
+        self.buffers: Dict[str, Dict[str, RingBuffer]] = {}
+        self.current: Dict[str, Dict[str, List[float]]] = {}
+        self.listeners: List[Callable[[str, str, List[float]], None]] = []
+        self.late = 0
+
+    def subscribe(self, callback: Callable[[str, str, List[float]], None]) -> None:
+        """callback(symbol, timeframe, vela) se llama al cerrar cada vela."""
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, str, List[float]], None]) -> None:
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _symbol(self, symbol: str):
+        if symbol not in self.buffers:
+            self.buffers[symbol] = {tf: RingBuffer(self.capacity) for tf in self.timeframes}
+            self.current[symbol] = {}
+        return self.buffers[symbol], self.current[symbol]
+
+    def _close(self, symbol: str, timeframe: str, vela: List[float]) -> None:
+        self.buffers[symbol][timeframe].append(vela)
+        for callback in self.listeners:
+            try:
+                callback(symbol, timeframe, vela)
+            except Exception as e:
+                logger.error(f"[CandleAggregator] Error en callback de cierre para {symbol} {timeframe}: {e}")
+
+    def add_bar(self, symbol: str, open_time: int, open_: float, high: float, low: float, close: float,
+                volume: float) -> None:
+        """Incorpora una vela cerrada del timeframe base (o un trade como vela degenerada)."""
+        _, actuales = self._symbol(symbol)
+        for tf, paso in self.timeframes.items():
+            inicio = (int(open_time) // paso) * paso
+            vela = actuales.get(tf)
+            if vela is not None and inicio < vela[0]:
+                self.late += 1
+                continue
+            if vela is not None and inicio > vela[0]:
+                self._close(symbol, tf, vela)
+                vela = None
+            if vela is None:
+                actuales[tf] = [inicio, open_, high, low, close, volume]
+            else:
+                vela[2] = max(vela[2], high)
+                vela[3] = min(vela[3], low)
+                vela[4] = close
+                vela[5] += volume
+
+    def add_trade(self, symbol: str, price: float, qty: float, timestamp: int) -> None:
+        self.add_bar(symbol, timestamp, price, price, price, price, qty)
+
+    def flush(self, now_ms: int) -> None:
+        """Cierra las velas cuyo periodo ya terminó aunque no haya llegado un trade posterior."""
+        for symbol, actuales in self.current.items():
+            for tf, vela in list(actuales.items()):
+                if vela[0] + self.timeframes[tf] <= now_ms:
+                    self._close(symbol, tf, vela)
+                    del actuales[tf]
+
+    def candles(self, symbol: str, timeframe: str, n: Optional[int] = None, include_open: bool = False) -> np.ndarray:
+        if symbol not in self.buffers:
+            return np.empty((0, 6))
+        velas = self.buffers[symbol][timeframe].array(n)
+        abierta = self.current[symbol].get(timeframe)
+        if include_open and abierta is not None:
+            velas = np.vstack((velas, abierta))[-n:] if n else np.vstack((velas, abierta))
+        return velas
+
+    def closes(self, symbol: str, timeframe: str, n: Optional[int] = None) -> np.ndarray:
+        return self.candles(symbol, timeframe, n)[:, 4]
+
+    def last(self, symbol: str, timeframe: str) -> Optional[List[float]]:
+        """Vela en curso del timeframe (o None)."""
+        return self.current.get(symbol, {}).get(timeframe)
+
+
+def aggregate_array(ohlcv: np.ndarray, timeframe: str) -> np.ndarray:
+    """Agrega velas [ts, o, h, l, c, v] ordenadas (ts en ms) al timeframe indicado, vectorizado."""
+    ohlcv = np.asarray(ohlcv, dtype=float)
+    if not len(ohlcv):
+        return np.empty((0, 6))
+    paso = timeframe_ms(timeframe)
+    grupos = (ohlcv[:, 0] // paso).astype(np.int64)
+    inicios = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+    fines = np.r_[inicios[1:], len(ohlcv)] - 1
+    return np.column_stack((
+        grupos[inicios] * paso,
+        ohlcv[inicios, 1],
+        np.maximum.reduceat(ohlcv[:, 2], inicios),
+        np.minimum.reduceat(ohlcv[:, 3], inicios),
+        ohlcv[fines, 4],
+        np.add.reduceat(ohlcv[:, 5], inicios)
+    ))
+
+
+_aggregator: Optional[CandleAggregator] = None
+
+
+def get_candle_aggregator() -> CandleAggregator:
+    """Agregador compartido por watchers y estrategias del proceso."""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = CandleAggregator()
+    return _aggregator
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+conflation.py
+Buffer de conflación de datos de mercado entre los watchers y la estrategia.
+
+Guarda sólo el último snapshot de cada símbolo y una marca de "sucio" desde la
+última pasada del consumidor. Si los watchers publican más rápido de lo que la
+estrategia procesa, los ticks intermedios se sustituyen en lugar de acumularse:
+el trabajo por pasada queda acotado por el número de símbolos, no por el
+número de ticks.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ConflatingBuffer:
+    def __init__(self):
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        # dict como conjunto ordenado: los símbolos se procesan en orden de llegada
+        self.dirty: Dict[str, None] = {}
+        self.updates = 0
+        self.conflated = 0
+
+    def put(self, symbol: str, datos: Dict[str, Any]) -> None:
+        if symbol in self.dirty:
+            self.conflated += 1
+        self.latest[symbol] = datos
+        self.dirty[symbol] = None
+        self.updates += 1
+
+    def update(self, snapshot: Dict[str, Dict[str, Any]]) -> None:
+        for symbol, datos in snapshot.items():
+            self.put(symbol, datos)
+
+    def get(self, symbol: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return self.latest.get(symbol, default)
+
+    def __getitem__(self, symbol: str) -> Dict[str, Any]:
+        return self.latest[symbol]
+
+    def __setitem__(self, symbol: str, datos: Dict[str, Any]) -> None:
+        self.put(symbol, datos)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.latest
+
+    def __len__(self) -> int:
+        return len(self.latest)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(self.latest.items())
+
+    def mark_dirty(self, symbols: Optional[Iterable[str]] = None) -> None:
+        """Marca símbolos (o todos) para reprocesarlos, p. ej. tras un cambio de datos macro."""
+        for symbol in (self.latest if symbols is None else symbols):
+            if symbol in self.latest:
+                self.dirty[symbol] = None
+
+    def pending(self) -> int:
+        return len(self.dirty)
+
+    def drain(self) -> Dict[str, Dict[str, Any]]:
+        """Últimos datos de los símbolos cambiados desde la última llamada, limpiando las marcas."""
+        sucios, self.dirty = self.dirty, {}
+        return {symbol: self.latest[symbol] for symbol in sucios}
+
+    def stats(self) -> Dict[str, Any]:
+        return {"symbols": len(self.latest), "pending": len(self.dirty), "updates": self.updates,
+                "conflated": self.conflated}
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+delta_publisher.py
+Publicación por umbrales de cambio para los watchers, con números de secuencia.
+
+En modo delta un símbolo sólo se vuelve a publicar cuando el precio, el RSI o
+la volatilidad se alejan de lo último publicado más de un umbral, o cuando
+vence el heartbeat. Cada publicación lleva una secuencia por símbolo y el id de
+sesión del publicador; SequenceTracker permite al consumidor descartar
+mensajes atrasados y contar huecos. Los mensajes siguen siendo estados
+completos, así que un hueco sólo significa que se perdieron estados
+intermedios.
+"""
+
+import logging
+import uuid
+from typing import Any, Dict, Optional
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class DeltaPublisher:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.enabled = config.get("enabled", False)
+        self.price_threshold = config.get("price_threshold", 0.001)
+        self.rsi_threshold = config.get("rsi_threshold", 2.0)
+        self.volatility_threshold = config.get("volatility_threshold", 0.005)
+        self.heartbeat = config.get("heartbeat", 300)
+        self.session = uuid.uuid4().hex[:8]
+        self.seq: Dict[str, int] = {}
+        self.last: Dict[str, Dict[str, Any]] = {}
+        self.last_time: Dict[str, float] = {}
+        self.suppressed = 0
+
+    def changed(self, symbol: str, datos: Dict[str, Any], now: Optional[float] = None) -> bool:
+        """True si el estado supera algún umbral respecto a lo último publicado o vence el heartbeat."""
+        previo = self.last.get(symbol)
+        if previo is None or not self.enabled:
+            return True
+        ahora = reloj_actual().time() if now is None else now
+        if ahora - self.last_time[symbol] >= self.heartbeat:
+            return True
+        precio_previo = previo.get("price") or 0
+        if precio_previo and abs(datos.get("price", 0) - precio_previo) / precio_previo >= self.price_threshold:
+            return True
+        if abs(datos.get("rsi", 50) - previo.get("rsi", 50)) >= self.rsi_threshold:
+            return True
+        return abs(datos.get("volatilidad", 0) - previo.get("volatilidad", 0)) >= self.volatility_threshold
+
+    def prepare(self, symbol: str, datos: Dict[str, Any], now: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Datos con secuencia si hay que publicarlos; None si el cambio no supera los umbrales."""
+        ahora = reloj_actual().time() if now is None else now
+        if not self.changed(symbol, datos, ahora):
+            self.suppressed += 1
+            return None
+        self.seq[symbol] = self.seq.get(symbol, 0) + 1
+        self.last[symbol] = datos
+        self.last_time[symbol] = ahora
+        return {**datos, "seq": self.seq[symbol], "session": self.session}
+
+
+class SequenceTracker:
+    """Lado consumidor: detecta huecos y mensajes atrasados por símbolo."""
+
+    def __init__(self):
+        self.last: Dict[str, tuple] = {}
+        self.gaps: Dict[str, int] = {}
+        self.stale = 0
+
+    def accept(self, symbol: str, datos: Dict[str, Any]) -> bool:
+        """False si el mensaje es anterior al último aceptado; los mensajes sin secuencia se aceptan."""
+        seq = datos.get("seq")
+        if seq is None:
+            return True
+        session = datos.get("session")
+        previo = self.last.get(symbol)
+        if previo is not None and previo[0] == session:
+            if seq <= previo[1]:
+                self.stale += 1
+                return False
+            if seq > previo[1] + 1:
+                self.gaps[symbol] = self.gaps.get(symbol, 0) + seq - previo[1] - 1
+                logger.warning(f"[SequenceTracker] Hueco en {symbol}: {seq - previo[1] - 1} actualizaciones perdidas")
+        self.last[symbol] = (session, seq)
+        return True
@@ -14,8 +14,8 @@ import json
 from datetime import datetime
 import pytz
 import aioredis
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from clock import reloj_actual, crear_scheduler
 from collections import Counter
 import random
 
@@ -70,7 +70,7 @@ class EntidadAlphaVantageSync(EntidadBase):
             'Oil': 'CL=F'
         }
         self.cmc_symbols = ['BTC', 'ETH', 'SOL', 'ADA', 'XRP']
-        self.scheduler = AsyncIOScheduler()
+        self.scheduler = crear_scheduler()
         logger.info("[AlphaVantageSync] Inicializado")
 
     async def init(self):
@@ -127,7 +127,7 @@ class EntidadAlphaVantageSync(EntidadBase):
 
     async def fetch_critical_news(self) -> Dict[str, Any]:
         try:
-            news_data = {"fed_rate_change": random.choice([0, 0.25, -0.25]), "timestamp": datetime.utcnow().isoformat()}
+            news_data = {"fed_rate_change": random.choice([0, 0.25, -0.25]), "timestamp": reloj_actual().utcnow().isoformat()}
             await self.redis.set("critical_news", json.dumps(news_data))
             logger.info(f"[AlphaVantageSync] Noticias críticas obtenidas: {news_data}")
             return news_data
@@ -136,7 +136,7 @@ class EntidadAlphaVantageSync(EntidadBase):
             return {}
 
     async def is_market_active(self) -> bool:
-        now = datetime.now(self.timezone).time()
+        now = reloj_actual().now(self.timezone).time()
         return self.active_start <= now <= self.active_end
 
     async def process_macro_symbolically(self, macro_data: Dict[str, Any]) -> Dict[str, Any]:
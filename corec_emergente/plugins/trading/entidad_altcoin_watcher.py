@@ -7,14 +7,14 @@ Monitorea datos de altcoins en tiempo real usando ccxt.
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional
-from corec.entidad_base import EntidadBase, Event
-import ccxt.async_support as ccxt
+from typing import Dict, Any, List, Optional
+from corec.entidad_base import Event
+from .watcher_base import EntidadWatcherBase
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class EntidadAltcoinWatcher(EntidadBase):
+class EntidadAltcoinWatcher(EntidadWatcherBase):
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         config = config or {
             "canales": ["trading_altcoin", "alertas"],
@@ -25,75 +25,96 @@ class EntidadAltcoinWatcher(EntidadBase):
             "altcoins": ["ALT1/USDT", "ALT2/USDT", "ALT3/USDT", "ALT4/USDT", "ALT5/USDT",
                          "ALT6/USDT", "ALT7/USDT", "ALT8/USDT", "ALT9/USDT", "ALT10/USDT"],
             "auto_register_channels": True,
-            "update_interval": 60
+            "update_interval": 60,
+            "max_concurrency": 5
         }
-        super().__init__(id="altcoin_watcher", config=config)
-        self.altcoins = config["altcoins"]
-        self.update_interval = config["update_interval"]
+        super().__init__("altcoin_watcher", config, config["altcoins"], "trading_altcoin", "AltcoinWatcher")
+        self.altcoins = self.symbols
+        self.semaphore = asyncio.Semaphore(config.get("max_concurrency", 5))
         logger.info("[AltcoinWatcher] Inicializado para altcoins: %s", ", ".join(self.altcoins))
 
+    async def _limited(self, coro):
+        async with self.semaphore:
+            return await coro
+
+    async def _fetch_tickers(self, exchange, symbols: List[str]) -> Dict[str, Any]:
+        if exchange.has.get("fetchTickers"):
+            try:
+                return await self._limited(exchange.fetch_tickers(symbols))
+            except Exception as e:
+                logger.warning(f"[AltcoinWatcher] fetch_tickers falló, se consulta símbolo a símbolo: {e}")
+        results = await asyncio.gather(*(self._limited(exchange.fetch_ticker(s)) for s in symbols), return_exceptions=True)
+        tickers = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"[AltcoinWatcher] Error obteniendo ticker de {symbol}: {result}")
+            else:
+                tickers[symbol] = result
+        return tickers
+
+    async def fetch_snapshot(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Ticker y velas de todos los símbolos en paralelo, con concurrencia acotada."""
+        symbols = list(symbols or self.altcoins)
+        exchange = await self._get_exchange()
+        tickers = await self._fetch_tickers(exchange, symbols)
+        symbols = [s for s in symbols if s in tickers]
+        results = await asyncio.gather(
+            *(self._limited(self._sync_candles(exchange, s)) for s in symbols),
+            return_exceptions=True
+        )
+        snapshot = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"[AltcoinWatcher] Error actualizando datos para {symbol}: {result}")
+                continue
+            snapshot[symbol] = self._build_data(symbol, tickers[symbol]['last'])
+        return snapshot
+
+    async def update_altcoins_snapshot(self, symbols: Optional[List[str]] = None):
+        try:
+            snapshot = await self.fetch_snapshot(symbols)
+            if not snapshot:
+                return
+            cambios = {}
+            for symbol, datos in snapshot.items():
+                self.scheduler.update_volatility(symbol, self.indicadores.estado(symbol).volatilidad)
+                datos = self.delta.prepare(symbol, datos)
+                if datos is not None:
+                    cambios[symbol] = datos
+            if not cambios:
+                return
+            await self.controller.publicar_evento(
+                canal="trading_altcoin",
+                datos={"tipo": "snapshot", "symbols": cambios},
+                destino="trading"
+            )
+            logger.debug("[AltcoinWatcher] Snapshot publicado para %d/%d altcoins", len(cambios), len(self.altcoins))
+        except Exception as e:
+            logger.error(f"[AltcoinWatcher] Error actualizando snapshot: {e}")
+
     async def update_altcoin_data(self, symbol: str):
         try:
-            exchange = ccxt.binance()
+            exchange = await self._get_exchange()
             ticker = await exchange.fetch_ticker(symbol)
-            ohlcv = await exchange.fetch_ohlcv(symbol, timeframe='1h', limit=14)
-            prices = [candle[4] for candle in ohlcv]
-            rsi = self._calculate_rsi(prices)
-            sma = sum(prices[-50:]) / 50 if len(prices) >= 50 else prices[-1]
-            sma_signal = 1 if ticker['last'] > sma else -1
-            volatilidad = (max(prices[-14:]) - min(prices[-14:])) / prices[-1] if prices else 0.02
+            await self._sync_candles(exchange, symbol)
+            datos = self.delta.prepare(symbol, self._build_data(symbol, ticker['last']))
+            if datos is None:
+                return
             await self.controller.publicar_evento(
                 canal="trading_altcoin",
-                datos={
-                    "symbol": symbol,
-                    "price": ticker['last'],
-                    "rsi": rsi,
-                    "sma_signal": sma_signal,
-                    "volatilidad": volatilidad
-                },
+                datos=datos,
                 destino="trading"
             )
             logger.debug("[AltcoinWatcher] Datos actualizados para %s: precio=%s", symbol, ticker['last'])
-            await exchange.close()
         except Exception as e:
             logger.error(f"[AltcoinWatcher] Error actualizando datos para {symbol}: {e}")
 
-    def _calculate_rsi(self, prices):
-        if len(prices) < 14:
-            return 50.0
-        gains = []
-        losses = []
-        for i in range(1, len(prices)):
-            diff = prices[i] - prices[i-1]
-            if diff > 0:
-                gains.append(diff)
-                losses.append(0)
-            else:
-                gains.append(0)
-                losses.append(-diff)
-        avg_gain = sum(gains) / 14
-        avg_loss = sum(losses) / 14
-        rs = avg_gain / avg_loss if avg_loss > 0 else 100
-        return 100 - (100 / (1 + rs))
-
-    async def monitorear_altcoins(self):
-        while not self._shutdown:
-            for symbol in self.altcoins:
-                await self.update_altcoin_data(symbol)
-            await asyncio.sleep(self.update_interval)
-
-    async def init(self) -> None:
-        await super().init()
-        asyncio.create_task(self.monitorear_altcoins())
+    async def _poll(self, due: List[str]) -> None:
+        await self.update_altcoins_snapshot(due)
 
     async def manejar_evento(self, event: Event) -> None:
         try:
             if event.canal == "trading_comandos" and event.datos.get("texto") == "monitorear altcoins":
-                for symbol in self.altcoins:
-                    await self.update_altcoin_data(symbol)
+                await self.update_altcoins_snapshot()
         except Exception as e:
             logger.error(f"[AltcoinWatcher] Error manejando evento: {e}")
-
-    async def shutdown(self) -> None:
-        logger.info("[AltcoinWatcher] Apagado")
-        await super().shutdown()
@@ -9,9 +9,14 @@ import asyncio
 import logging
 from typing import Dict, Any, Optional
 from corec.entidad_base import EntidadBase, Event
-import ccxt.async_support as ccxt
 import pandas as pd
 import numpy as np
+from scenarios import generar_escenario
+from indicators import serie_indicadores
+from .exchange_pool import get_exchange_pool
+from .ohlcv_store import OHLCVStore
+from .rate_governor import get_rate_governor
+from .candle_aggregator import aggregate_array
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -38,68 +43,99 @@ class EntidadBacktestManager(EntidadBase):
         self.end_date = config["end_date"]
         self.altcoins = config["altcoins"]
         self.timeframe = config["timeframe"]
+        # Timeframes superiores derivados de la serie base, sin más descargas
+        self.timeframes = config.get("timeframes", [])
+        self.multi_timeframe_data = {}
+        self.exchange_name = config.get("exchange", "binance")
+        self.escenario = config.get("escenario")
+        self.semilla = config.get("semilla")
+        self.store = OHLCVStore(config.get("ohlcv_store_path", "data/ohlcv"))
         self.historical_data = {}
         logger.info("[BacktestManager] Inicializado")
 
     async def fetch_historical_data(self, symbol: str):
+        pool = get_exchange_pool()
+        # El historial va por el carril de menor prioridad para no frenar órdenes ni datos de mercado
+        exchange = get_rate_governor().wrap(await pool.acquire(self.exchange_name, "spot"), self.exchange_name, "history")
         try:
-            exchange = ccxt.binance()
             since = int(pd.to_datetime(self.start_date).timestamp() * 1000)
-            ohlcv = await exchange.fetch_ohlcv(symbol, self.timeframe, since=since)
-            data = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-            data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
-            data['rsi'] = self._calculate_rsi(data['close'])
-            data['sma'] = data['close'].rolling(window=50).mean()
-            data['sma_signal'] = (data['close'] > data['sma']).astype(int) - (data['close'] < data['sma']).astype(int)
-            data['volatilidad'] = (data['close'].rolling(window=14).max() - data['close'].rolling(window=14).min()) / data['close']
+            until = int(pd.to_datetime(self.end_date).timestamp() * 1000)
+            # Sólo se descarga la cola que falta en el almacén local
+            await self.store.top_up(exchange, self.exchange_name, symbol, self.timeframe, since=since, until=until)
+            data = self.store.dataframe(self.exchange_name, symbol, self.timeframe, since=since, until=until)
+            self._add_indicators(data)
             self.historical_data[symbol] = data
+            self._add_timeframes(symbol, data)
             logger.info(f"[BacktestManager] Datos históricos cargados para {symbol}")
-            await exchange.close()
         except Exception as e:
             logger.error(f"[BacktestManager] Error cargando datos para {symbol}: {e}")
+        finally:
+            await pool.release(self.exchange_name, "spot")
 
-    def _calculate_rsi(self, prices):
-        if len(prices) < 14:
-            return pd.Series([50.0] * len(prices), index=prices.index)
-        delta = prices.diff()
-        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
-        loss = -delta.where(delta < 0, 0).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi.fillna(50.0)
+    def _add_indicators(self, data: pd.DataFrame) -> None:
+        indicadores = serie_indicadores(data['close'].to_numpy(), data['high'].to_numpy(), data['low'].to_numpy())
+        for columna in ("rsi", "sma", "sma_signal", "macd", "atr", "volatilidad"):
+            data[columna] = indicadores[columna]
+
+    def _add_timeframes(self, symbol: str, data: pd.DataFrame) -> None:
+        if not self.timeframes:
+            return
+        base = np.column_stack((
+            data['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64),
+            data[['open', 'high', 'low', 'close', 'volume']].to_numpy(dtype=float)
+        ))
+        self.multi_timeframe_data[symbol] = {}
+        for timeframe in self.timeframes:
+            frame = pd.DataFrame(aggregate_array(base, timeframe),
+                                 columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='ms')
+            self._add_indicators(frame)
+            self.multi_timeframe_data[symbol][timeframe] = frame
 
     async def generate_dummy_data(self):
         symbols = ["BTC/USDT", "ETH/USDT"] + self.altcoins
+        timestamps = pd.date_range(start=self.start_date, end=self.end_date, freq=self.timeframe)
+        n = len(timestamps)
+        escenario = None
+        if self.escenario:
+            escenario = generar_escenario(self.escenario, horas=n, simbolos=symbols, semilla=self.semilla)
         for symbol in symbols:
-            data = pd.DataFrame({
-                "timestamp": pd.date_range(start=self.start_date, end=self.end_date, freq=self.timeframe),
-                "open": np.random.uniform(30000, 40000, 8760) if "BTC" in symbol else
-                        np.random.uniform(2000, 3000, 8760) if "ETH" in symbol else
-                        np.random.uniform(10, 50, 8760),
-                "high": np.random.uniform(30500, 40500, 8760) if "BTC" in symbol else
-                        np.random.uniform(2050, 3050, 8760) if "ETH" in symbol else
-                        np.random.uniform(11, 55, 8760),
-                "low": np.random.uniform(29500, 39500, 8760) if "BTC" in symbol else
-                       np.random.uniform(1950, 2950, 8760) if "ETH" in symbol else
-                       np.random.uniform(9, 45, 8760),
-                "close": np.random.uniform(30000, 40000, 8760) if "BTC" in symbol else
-                         np.random.uniform(2000, 3000, 8760) if "ETH" in symbol else
-                         np.random.uniform(10, 50, 8760),
-                "volume": np.random.uniform(100, 1000, 8760)
-            })
-            data['rsi'] = self._calculate_rsi(data['close'])
-            data['sma'] = data['close'].rolling(window=50).mean()
-            data['sma_signal'] = (data['close'] > data['sma']).astype(int) - (data['close'] < data['sma']).astype(int)
-            data['volatilidad'] = (data['close'].rolling(window=14).max() - data['close'].rolling(window=14).min()) / data['close']
+            if escenario is not None:
+                data = escenario.dataframe(symbol, inicio=self.start_date, freq=self.timeframe)
+            else:
+                data = pd.DataFrame({
+                    "timestamp": timestamps,
+                    "open": np.random.uniform(30000, 40000, n) if "BTC" in symbol else
+                            np.random.uniform(2000, 3000, n) if "ETH" in symbol else
+                            np.random.uniform(10, 50, n),
+                    "high": np.random.uniform(30500, 40500, n) if "BTC" in symbol else
+                            np.random.uniform(2050, 3050, n) if "ETH" in symbol else
+                            np.random.uniform(11, 55, n),
+                    "low": np.random.uniform(29500, 39500, n) if "BTC" in symbol else
+                           np.random.uniform(1950, 2950, n) if "ETH" in symbol else
+                           np.random.uniform(9, 45, n),
+                    "close": np.random.uniform(30000, 40000, n) if "BTC" in symbol else
+                             np.random.uniform(2000, 3000, n) if "ETH" in symbol else
+                             np.random.uniform(10, 50, n),
+                    "volume": np.random.uniform(100, 1000, n)
+                })
+            self._add_indicators(data)
             self.historical_data[symbol] = data
-        logger.info("[BacktestManager] Datos dummy generados para %s símbolos", len(symbols))
+            self._add_timeframes(symbol, data)
+        logger.info("[BacktestManager] Datos dummy generados para %s símbolos (escenario: %s)", len(symbols), self.escenario or "uniforme")
 
     async def manejar_evento(self, event: Event) -> None:
         try:
             if event.canal == "trading_backtest" and event.datos.get("texto") == "iniciar backtest":
                 if event.datos.get("use_real_data", False):
-                    for symbol in ["BTC/USDT", "ETH/USDT"] + self.altcoins:
-                        await self.fetch_historical_data(symbol)
+                    # Se mantiene una referencia durante todo el bucle para reutilizar el cliente
+                    pool = get_exchange_pool()
+                    await pool.acquire(self.exchange_name, "spot")
+                    try:
+                        for symbol in ["BTC/USDT", "ETH/USDT"] + self.altcoins:
+                            await self.fetch_historical_data(symbol)
+                    finally:
+                        await pool.release(self.exchange_name, "spot")
                 else:
                     await self.generate_dummy_data()
                 logger.info("[BacktestManager] Backtest iniciado")
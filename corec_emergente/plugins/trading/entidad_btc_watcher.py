@@ -5,16 +5,15 @@ entidad_btc_watcher.py
 Monitorea datos de BTC/USDT en tiempo real usando ccxt.
 """
 
-import asyncio
 import logging
-from typing import Dict, Any, Optional
-from corec.entidad_base import EntidadBase, Event
-import ccxt.async_support as ccxt
+from typing import Dict, Any, List, Optional
+from corec.entidad_base import Event
+from .watcher_base import EntidadWatcherBase
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class EntidadBTCWatcher(EntidadBase):
+class EntidadBTCWatcher(EntidadWatcherBase):
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         config = config or {
             "canales": ["trading_btc", "alertas"],
@@ -25,62 +24,29 @@ class EntidadBTCWatcher(EntidadBase):
             "auto_register_channels": True,
             "update_interval": 60
         }
-        super().__init__(id="btc_watcher", config=config)
-        self.update_interval = config["update_interval"]
+        super().__init__("btc_watcher", config, ["BTC/USDT"], "trading_btc", "BTCWatcher")
         logger.info("[BTCWatcher] Inicializado")
 
     async def update_btc_data(self):
         try:
-            exchange = ccxt.binance()
+            exchange = await self._get_exchange()
             ticker = await exchange.fetch_ticker("BTC/USDT")
-            ohlcv = await exchange.fetch_ohlcv("BTC/USDT", timeframe='1h', limit=14)
-            prices = [candle[4] for candle in ohlcv]
-            rsi = self._calculate_rsi(prices)
-            sma = sum(prices[-50:]) / 50 if len(prices) >= 50 else prices[-1]
-            sma_signal = 1 if ticker['last'] > sma else -1
-            volatilidad = (max(prices[-14:]) - min(prices[-14:])) / prices[-1] if prices else 0.02
+            await self._sync_candles(exchange, "BTC/USDT")
+            self.scheduler.update_volatility("BTC/USDT", self.indicadores.estado("BTC/USDT").volatilidad)
+            datos = self.delta.prepare("BTC/USDT", self._build_data("BTC/USDT", ticker['last']))
+            if datos is None:
+                return
             await self.controller.publicar_evento(
                 canal="trading_btc",
-                datos={
-                    "symbol": "BTC/USDT",
-                    "price": ticker['last'],
-                    "rsi": rsi,
-                    "sma_signal": sma_signal,
-                    "volatilidad": volatilidad
-                },
+                datos=datos,
                 destino="trading"
             )
-            logger.info("[BTCWatcher] Datos de BTC/USDT actualizados: precio=%s, rsi=%s", ticker['last'], rsi)
-            await exchange.close()
+            logger.info("[BTCWatcher] Datos de BTC/USDT actualizados: precio=%s, rsi=%s", ticker['last'], datos['rsi'])
         except Exception as e:
             logger.error(f"[BTCWatcher] Error actualizando datos: {e}")
 
-    def _calculate_rsi(self, prices):
-        if len(prices) < 14:
-            return 50.0
-        gains = []
-        losses = []
-        for i in range(1, len(prices)):
-            diff = prices[i] - prices[i-1]
-            if diff > 0:
-                gains.append(diff)
-                losses.append(0)
-            else:
-                gains.append(0)
-                losses.append(-diff)
-        avg_gain = sum(gains) / 14
-        avg_loss = sum(losses) / 14
-        rs = avg_gain / avg_loss if avg_loss > 0 else 100
-        return 100 - (100 / (1 + rs))
-
-    async def monitorear(self):
-        while not self._shutdown:
-            await self.update_btc_data()
-            await asyncio.sleep(self.update_interval)
-
-    async def init(self) -> None:
-        await super().init()
-        asyncio.create_task(self.monitorear())
+    async def _poll(self, due: List[str]) -> None:
+        await self.update_btc_data()
 
     async def manejar_evento(self, event: Event) -> None:
         try:
@@ -88,7 +54,3 @@ class EntidadBTCWatcher(EntidadBase):
                 await self.update_btc_data()
         except Exception as e:
             logger.error(f"[BTCWatcher] Error manejando evento: {e}")
-
-    async def shutdown(self) -> None:
-        logger.info("[BTCWatcher] Apagado")
-        await super().shutdown()
@@ -6,14 +6,17 @@ Ejecuta el cierre diario a las 23:59, aplicando resultados y consolidando métri
 """
 
 import asyncio
+import json
 import logging
 from typing import Dict, Any, Optional
 from corec.entidad_base import EntidadBase, Event
 from datetime import datetime, time
 import asyncpg
 import plotly.graph_objects as go
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from collections import Counter
+from clock import reloj_actual, crear_scheduler
+from .order_tracker import get_order_tracker
+from .portfolio_risk import get_portfolio_risk
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -39,6 +42,7 @@ class EntidadCierreTrading(EntidadBase):
             "auto_register_channels": True,
             "crash_threshold": -0.2,
             "stress_threshold": 0.5,
+            "var_threshold": 0.1,
             "micro_cycle_profit_threshold": 0.05
         }
         super().__init__(id="cierre_trading", config=config)
@@ -47,13 +51,15 @@ class EntidadCierreTrading(EntidadBase):
         self.postgres_config = config["postgres"]
         self.crash_threshold = config["crash_threshold"]
         self.stress_threshold = config["stress_threshold"]
+        # VaR conjunto de los bloques (fracción del patrimonio) a partir del cual se trata como caída
+        self.var_threshold = config.get("var_threshold", 0.1)
         self.micro_cycle_profit_threshold = config["micro_cycle_profit_threshold"]
         self.is_paused = False
         self.recovery_capital_percentage = 0.1
         self.crash_count = 0
         self.crash_duration = 0
         self.db_pool = None
-        self.scheduler = AsyncIOScheduler()
+        self.scheduler = crear_scheduler()
         self.trades_history = []
         logger.info("[CierreTrading] Inicializado")
 
@@ -110,6 +116,11 @@ class EntidadCierreTrading(EntidadBase):
                 "sharpe_ratio": 0.0,
                 "max_drawdown": 0.0
             }
+            # Exposición en órdenes abiertas desde el registro de órdenes, sin recorrer logs ni la base de datos
+            tracker = get_order_tracker()
+            metrics["open_orders"] = tracker.open_count()
+            metrics["open_exposure"] = tracker.total_exposure()
+            metrics["portfolio_var"] = self.portfolio_var()
             if not self.postgres_config.get("enabled") or not self.db_pool:
                 return metrics
 
@@ -189,7 +200,7 @@ class EntidadCierreTrading(EntidadBase):
                     metrics.get("users_count", 0), metrics.get("trades_count", 0),
                     metrics.get("win_rate", 0.0), metrics.get("profit_factor", 0.0),
                     metrics.get("max_consecutive_losses", 0), metrics.get("sharpe_ratio", 0.0),
-                    metrics.get("max_drawdown", 0.0), datetime.utcnow()
+                    metrics.get("max_drawdown", 0.0), reloj_actual().utcnow()
                 )
             logger.debug("[CierreTrading] Métricas guardadas en PostgreSQL")
         except Exception as e:
@@ -235,13 +246,13 @@ class EntidadCierreTrading(EntidadBase):
             bloque.capital += trade["cantidad"] + profit
             self.trades_history.append({
                 "profit": profit,
-                "timestamp": datetime.utcnow().isoformat(),
+                "timestamp": reloj_actual().utcnow().isoformat(),
                 "is_win": profit > 0
             })
             bloque.memoria_colectiva.append({
                 "decision": "cerrar",
                 "profit": profit,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": reloj_actual().utcnow().isoformat()
             })
             logger.info(f"[CierreTrading] Operación cerrada: Profit=${profit}, Capital=${bloque.capital}")
         except Exception as e:
@@ -249,7 +260,7 @@ class EntidadCierreTrading(EntidadBase):
 
     async def micro_cycle(self):
         try:
-            now = datetime.now()
+            now = reloj_actual().now()
             daily_profit = 0
             for bloque in self.controller.nucleus.bloques:
                 if bloque.memoria_colectiva:
@@ -265,12 +276,22 @@ class EntidadCierreTrading(EntidadBase):
         except Exception as e:
             logger.error(f"[CierreTrading] Error en micro-ciclo: {e}")
 
+    def portfolio_var(self) -> Dict[str, Any]:
+        """VaR conjunto de las posiciones de todos los bloques y su peso sobre el patrimonio."""
+        bloques = self.controller.nucleus.bloques
+        # Los bloques de la estrategia se llaman bloque_<símbolo>
+        posiciones = {b.id[len("bloque_"):]: b.posicion for b in bloques
+                      if str(getattr(b, "id", "")).startswith("bloque_") and b.posicion}
+        var = get_portfolio_risk().value_at_risk(posiciones)
+        patrimonio = sum(b.capital for b in bloques) + var["exposure"]
+        var["ratio"] = max(var["parametric"], var["historical"]) / patrimonio if patrimonio > 0 else 0.0
+        return var
+
     async def handle_market_crash(self):
         try:
-            macro_data = await self.redis.get("market:macro")
-            if not macro_data:
-                return
-            macro_data = json.loads(macro_data)
+            redis = getattr(self, "redis", None)
+            macro_data = await redis.get("market:macro") if redis else None
+            macro_data = json.loads(macro_data) if macro_data else {}
             btc_change = self.controller.nucleus.historical_data.get("BTC/USDT", {}).get("price_change", 0)
             sp500_change = macro_data.get("SP500", 0.0)
 
@@ -278,8 +299,12 @@ class EntidadCierreTrading(EntidadBase):
             stress_count = sum(1 for b in self.controller.nucleus.bloques for e in b.entidades if e.memoria_simbolica and e.memoria_simbolica[-1]["emocion"] == "estrés")
             total_entities = sum(len(b.entidades) for b in self.controller.nucleus.bloques)
             stress_ratio = stress_count / total_entities if total_entities > 0 else 0.0
+            # Varias posiciones correlacionadas pueden sumar una pérdida probable grande sin que BTC caiga
+            var = self.portfolio_var()
+            var_ratio = var["ratio"] if var["ready"] else 0.0
 
-            if (btc_change < self.crash_threshold or sp500_change < self.crash_threshold or stress_ratio > self.stress_threshold):
+            if (btc_change < self.crash_threshold or sp500_change < self.crash_threshold or stress_ratio > self.stress_threshold
+                    or var_ratio > self.var_threshold):
                 logger.warning("[CierreTrading] Caída del mercado detectada: pausando operaciones")
                 self.is_paused = True
                 self.recovery_capital_percentage = 0.1
@@ -298,10 +323,12 @@ class EntidadCierreTrading(EntidadBase):
                     "tipo": "evento_critico",
                     "plugin_id": "crypto_trading",
                     "evento": "caida_mercado",
-                    "detalle": f"Caída detectada: BTC {btc_change*100:.2f}%, SP500 {sp500_change*100:.2f}%, Estrés {stress_ratio*100:.2f}%",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "detalle": f"Caída detectada: BTC {btc_change*100:.2f}%, SP500 {sp500_change*100:.2f}%, Estrés {stress_ratio*100:.2f}%, VaR {var_ratio*100:.2f}%",
+                    "var": {"parametric": var["parametric"], "historical": var["historical"], "components": var["components"]},
+                    "timestamp": reloj_actual().utcnow().isoformat()
                 }
-                await self.redis.xadd("critical_events", {"data": json.dumps(alert)})
+                if redis:
+                    await redis.xadd("critical_events", {"data": json.dumps(alert)})
                 await self.controller.publicar_evento(
                     canal="alertas",
                     datos=alert,
@@ -320,7 +347,7 @@ class EntidadCierreTrading(EntidadBase):
                             entidad.mutar(nueva_etiqueta="tierra", nueva_emocion="neutral")
 
                 for i in range(pause_hours * 6):
-                    await asyncio.sleep(600)
+                    await reloj_actual().sleep(600)
                     self.recovery_capital_percentage = min(1.0, self.recovery_capital_percentage + 0.15)
                     logger.info(f"[CierreTrading] Recuperación gradual: {self.recovery_capital_percentage*100:.2f}% del capital disponible")
                 self.is_paused = False
@@ -330,7 +357,7 @@ class EntidadCierreTrading(EntidadBase):
 
     async def execute_daily_close(self) -> None:
         try:
-            now = datetime.now()
+            now = reloj_actual().now()
             metrics = await self.calculate_advanced_metrics()
             await self.controller.publicar_evento(
                 canal="trading_capital",
@@ -351,7 +378,7 @@ class EntidadCierreTrading(EntidadBase):
     async def manejar_evento(self, event: Event) -> None:
         try:
             if event.canal == "trading_clock":
-                now = datetime.now().time()
+                now = reloj_actual().now().time()
                 if now.hour == self.cierre_hora.hour and now.minute == self.cierre_hora.minute:
                     await self.execute_daily_close()
                 elif event.datos.get("texto") == "micro_cycle":
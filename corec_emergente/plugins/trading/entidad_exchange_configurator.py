@@ -3,13 +3,25 @@
 """
 entidad_exchange_configurator.py
 Configura exchanges desde multi_exchange_config.yaml.
+
+Al arrancar precalienta en paralelo cada exchange y modo habilitados: abre el
+cliente compartido del pool, carga los mercados (de la caché en disco si está
+fresca) y comprueba las credenciales, para que la primera orden real no pague
+nada de eso. El fichero se vigila y, si cambia, sólo se reinicializan los
+venues cuya configuración es distinta; los que desaparecen se dan de baja.
 """
 
 import asyncio
 import logging
+import os
 from typing import Dict, Any, Optional
 from corec.entidad_base import EntidadBase, Event
 import yaml
+import ccxt.async_support as ccxt
+from .exchange_pool import get_exchange_pool
+from .exchange_simulator import simulator_factory
+from .rate_governor import get_rate_governor
+from clock import reloj_actual
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -23,36 +35,145 @@ class EntidadExchangeConfigurator(EntidadBase):
             "log_level": "INFO",
             "destino_default": "trading",
             "plantilla_path": "multi_exchange_config.yaml",
-            "auto_register_channels": True
+            "auto_register_channels": True,
+            "markets_cache_dir": "markets_cache",
+            "reload_interval": 5
         }
         super().__init__(id="exchange_configurator", config=config)
         self.plantilla_path = config["plantilla_path"]
+        self.prewarm_on_start = config.get("prewarm_on_start", True)
+        self.markets_cache_dir = config.get("markets_cache_dir")
+        self.reload_interval = config.get("reload_interval")
         self.active_exchanges = {}
+        # Clientes que el configurador mantiene adquiridos para que sigan abiertos y con mercados
+        self.warm: Dict[str, Dict[str, Any]] = {}
+        self._firma = None
         logger.info("[ExchangeConfigurator] Inicializado")
 
+    async def init(self) -> None:
+        await super().init()
+        if self.markets_cache_dir:
+            get_exchange_pool().configure(cache_dir=self.markets_cache_dir)
+        if self.prewarm_on_start:
+            await self.cargar_configuracion()
+        if self.reload_interval:
+            lanzar = getattr(reloj_actual(), "lanzar", asyncio.create_task)
+            lanzar(self._vigilar())
+
+    def _firma_fichero(self):
+        try:
+            estado = os.stat(self.plantilla_path)
+            return estado.st_mtime_ns, estado.st_size
+        except OSError:
+            return None
+
+    async def recargar_si_cambia(self) -> bool:
+        firma = self._firma_fichero()
+        if firma is None or firma == self._firma:
+            return False
+        logger.info(f"[ExchangeConfigurator] {self.plantilla_path} modificado; recargando")
+        await self.cargar_configuracion()
+        return True
+
+    async def _vigilar(self) -> None:
+        reloj = reloj_actual()
+        while not self._shutdown:
+            await reloj.sleep(self.reload_interval)
+            if self._shutdown:
+                break
+            try:
+                await self.recargar_si_cambia()
+            except Exception as e:
+                logger.error(f"[ExchangeConfigurator] Error vigilando la configuración: {e}")
+
+    async def prewarm(self, exchange: str, mode: str, settings: Dict[str, Any]) -> Dict[str, Any]:
+        """Abre el cliente, carga mercados y verifica credenciales de un venue."""
+        reloj = reloj_actual()
+        inicio = reloj.time()
+        pool = get_exchange_pool()
+        resultado = {"exchange": exchange, "modo": mode, "status": "ready", "markets": 0, "credentials": "none"}
+        try:
+            if settings.get("simulator") is not None:
+                pool.register_factory(exchange, simulator_factory(settings["simulator"]))
+            cliente = await pool.acquire(exchange, mode, api_key=settings.get("api_key"),
+                                         api_secret=settings.get("api_secret"))
+            self.warm[f"{exchange}_{mode}"] = {"exchange": exchange, "modo": mode, "api_key": settings.get("api_key")}
+            gobernado = get_rate_governor().wrap(cliente, exchange, "market_data", endpoint=mode)
+            resultado["markets"] = len(await pool.load_markets(exchange, mode, api_key=settings.get("api_key")) or {})
+            if settings.get("api_key"):
+                if (getattr(cliente, "has", None) or {}).get("fetchBalance"):
+                    await gobernado.fetch_balance()
+                    resultado["credentials"] = "verified"
+                else:
+                    resultado["credentials"] = "unverified"
+        except ccxt.AuthenticationError as e:
+            logger.error(f"[ExchangeConfigurator] Credenciales rechazadas por {exchange} ({mode}): {e}")
+            resultado.update(status="auth_error", credentials="invalid", error=str(e))
+        except Exception as e:
+            logger.error(f"[ExchangeConfigurator] Error precalentando {exchange} ({mode}): {e}")
+            resultado.update(status="error", error=str(e))
+        resultado["seconds"] = reloj.time() - inicio
+        return resultado
+
+    async def _cool(self, clave: str) -> None:
+        caliente = self.warm.pop(clave, None)
+        if caliente:
+            await get_exchange_pool().release(caliente["exchange"], caliente["modo"], caliente["api_key"])
+
     async def cargar_configuracion(self) -> None:
         try:
+            self._firma = self._firma_fichero()
             with open(self.plantilla_path, "r") as f:
                 config = yaml.safe_load(f)
+            deseados = {}
             for exchange, modes in config.items():
                 if exchange == "capital_pool":
                     continue
                 for mode, settings in modes.items():
                     if settings.get("enabled"):
-                        self.active_exchanges[f"{exchange}_{mode}"] = {
-                            "exchange": exchange,
-                            "modo": mode,
-                            "config": settings
-                        }
-                        await self.controller.publicar_evento(
-                            canal="trading_exchange",
-                            datos={"tipo": "registro_exchange", "exchange": exchange, "modo": mode, "config": settings},
-                            destino="trading"
-                        )
-            logger.info("[ExchangeConfigurator] Configuración cargada para %s exchanges", len(self.active_exchanges))
+                        deseados[f"{exchange}_{mode}"] = {"exchange": exchange, "modo": mode, "config": settings}
+            # Sólo se tocan los venues nuevos o con configuración distinta
+            cambiados = {k: v for k, v in deseados.items()
+                         if k not in self.active_exchanges or self.active_exchanges[k]["config"] != v["config"]}
+            retirados = [k for k in self.active_exchanges if k not in deseados]
+            for clave in retirados:
+                baja = self.active_exchanges.pop(clave)
+                await self._cool(clave)
+                logger.info(f"[ExchangeConfigurator] {baja['exchange']} ({baja['modo']}) dado de baja")
+                await self.controller.publicar_evento(
+                    canal="trading_exchange",
+                    datos={"tipo": "baja_exchange", "exchange": baja["exchange"], "modo": baja["modo"]},
+                    destino="trading"
+                )
+            for clave, venue in cambiados.items():
+                settings = venue["config"]
+                if settings.get("rate_limit"):
+                    get_rate_governor().configure(venue["exchange"], endpoint=venue["modo"], **settings["rate_limit"])
+                if clave in self.active_exchanges:
+                    # Se suelta el cliente anterior; el precalentado adquiere el de las credenciales nuevas y
+                    # cada entidad que lo use vuelve a adquirirlo al recibir de nuevo registro_exchange
+                    await self._cool(clave)
+            resultados = await asyncio.gather(*(self.prewarm(v["exchange"], v["modo"], v["config"])
+                                                for v in cambiados.values()))
+            for (clave, venue), resultado in zip(cambiados.items(), resultados):
+                if resultado["status"] == "auth_error":
+                    # Un venue con credenciales rechazadas no se ofrece para operar
+                    self.active_exchanges.pop(clave, None)
+                    await self._cool(clave)
+                    continue
+                self.active_exchanges[clave] = venue
+                await self.controller.publicar_evento(
+                    canal="trading_exchange",
+                    datos={"tipo": "registro_exchange", "exchange": venue["exchange"], "modo": venue["modo"],
+                           "config": venue["config"]},
+                    destino="trading"
+                )
+            logger.info("[ExchangeConfigurator] Configuración cargada para %s exchanges (%s reinicializados)",
+                        len(self.active_exchanges), len(cambiados))
             await self.controller.publicar_evento(
                 canal="alertas",
-                datos={"tipo": "config_cargada", "exchanges": list(self.active_exchanges.keys())},
+                datos={"tipo": "config_cargada", "exchanges": list(self.active_exchanges.keys()),
+                       "reinicializados": list(cambiados), "retirados": retirados, "prewarm": resultados},
                 destino="trading"
             )
         except Exception as e:
@@ -88,5 +209,7 @@ class EntidadExchangeConfigurator(EntidadBase):
             logger.error(f"[ExchangeConfigurator] Error manejando evento: {e}")
 
     async def shutdown(self) -> None:
+        for clave in list(self.warm):
+            await self._cool(clave)
         logger.info("[ExchangeConfigurator] Apagado")
         await super().shutdown()
@@ -7,11 +7,21 @@ Gestiona operaciones en exchanges con circuit breaker, deslizamiento y fragmenta
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from corec.entidad_base import EntidadBase, Event
-from datetime import datetime, timedelta
-import ccxt.async_support as ccxt
-import random
+import numpy as np
+from clock import reloj_actual
+from .exchange_pool import get_exchange_pool
+from .rate_governor import get_rate_governor
+from .execution_algos import ExecutionEngine
+from .candle_aggregator import get_candle_aggregator
+from .exchange_simulator import simulator_factory
+from .order_router import OrderRouter
+from .slippage_model import SlippageModel
+from .order_tracker import get_order_tracker
+from .order_batcher import OrderBatcher
+from .venue_health import CircuitBreaker
+from .risk_engine import get_risk_engine
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -26,7 +36,10 @@ class EntidadExchangeManager(EntidadBase):
             "destino_default": "trading",
             "circuit_breaker": {
                 "max_failures": 3,
-                "reset_timeout": 900
+                "reset_timeout": 900,
+                "max_reset_timeout": 3600,
+                "probes": 1,
+                "slow_call": 5.0
             },
             "auto_register_channels": True,
             "slippage_tolerance": 0.01
@@ -36,82 +49,149 @@ class EntidadExchangeManager(EntidadBase):
         self.modo = config.get("modo", "spot")
         self.altcoins = config.get("altcoins", [])
         self.circuit_breaker_config = config["circuit_breaker"]
-        self.failure_count = 0
-        self.breaker_tripped = False
-        self.breaker_reset_time = None
+        # Fallos y respuestas lentas lo abren; al vencer la espera deja salir órdenes de prueba
+        self.breaker = CircuitBreaker(**self.circuit_breaker_config)
         self.api_key = config.get("api_key")
         self.api_secret = config.get("api_secret")
         self.leverage = config.get("leverage", 1)
         self.slippage_tolerance = config["slippage_tolerance"]
-        self.slippage_history = []
+        # Deslizamiento esperado según la profundidad L2 y las ejecuciones reales (ventanas acotadas)
+        self.slippage = SlippageModel(config.get("slippage_model"))
         self.exchange = None
+        # Con "simulator" el exchange se sirve desde el motor de casado local (sin red)
+        self.simulator = config.get("simulator")
+        self.fee = config.get("fee")
+        # Con routing.enabled las órdenes se reparten entre los exchanges del mismo modo registrados
+        self.routing = config.get("routing", {})
+        self.router = OrderRouter(self._on_venue_event, self.routing)
+        # Venues añadidos al enrutado con la configuración con la que se registraron
+        self.venue_clients: Dict[str, Dict[str, Any]] = {}
+        self.tracker = get_order_tracker()
+        # Exposición por símbolo y venue en caché, común a todos los managers del proceso
+        self.risk = get_risk_engine(**config.get("risk", {}))
+        self._bloques: Dict[str, Any] = {}
+        # Las hijas que salen en el mismo ciclo del bucle viajan juntas (create_orders si el exchange lo admite)
+        self.batcher = OrderBatcher(max_batch=config.get("max_batch", 20))
+        # TWAP/VWAP/participación: cada orden padre avanza en su propia tarea
+        self.execution = ExecutionEngine(self._place_child, self._volume_profile, self._on_execution_update,
+                                         config.get("execution", {}))
         logger.info(f"[ExchangeManager] Inicializado para {self.exchange_name} ({self.modo})")
 
     async def init(self) -> None:
         await super().init()
         try:
-            self.exchange = getattr(ccxt, self.exchange_name)({
-                'apiKey': self.api_key,
-                'secret': self.api_secret,
-                'enableRateLimit': True
-            })
+            if self.simulator is not None:
+                get_exchange_pool().register_factory(self.exchange_name, simulator_factory(self.simulator))
+            cliente = await get_exchange_pool().acquire(
+                self.exchange_name, self.modo, api_key=self.api_key, api_secret=self.api_secret
+            )
+            # Las órdenes tienen el carril prioritario del gobernador de peticiones
+            self.exchange = get_rate_governor().wrap(cliente, self.exchange_name, "orders", endpoint=self.modo)
+            self.router.add_venue(self.exchange_name, self.exchange, self.modo, self.fee, self.circuit_breaker_config)
+            self.batcher.client = self.exchange
+            self.tracker.subscribe(self._on_order_event)
+            self.tracker.start(self.exchange.with_lane("market_data"), self.exchange_name)
             if self.modo == "futures":
                 await self.exchange.set_leverage(self.leverage)
             logger.info(f"[ExchangeManager] Exchange {self.exchange_name} inicializado")
         except Exception as e:
             logger.error(f"[ExchangeManager] Error inicializando exchange: {e}")
-            self.breaker_tripped = True
-            self.breaker_reset_time = datetime.utcnow() + timedelta(seconds=self.circuit_breaker_config["reset_timeout"])
-
-    async def check_circuit_breaker(self) -> bool:
-        if self.breaker_tripped:
-            now = datetime.utcnow()
-            if now >= self.breaker_reset_time:
-                self.breaker_tripped = False
-                self.failure_count = 0
-                self.breaker_reset_time = None
-                logger.info(f"[ExchangeManager] Circuit breaker reseteado para {self.exchange_name} ({self.modo})")
-                await self.controller.publicar_evento(
-                    canal="alertas",
-                    datos={"tipo": "circuit_breaker_reset", "exchange": self.exchange_name, "modo": self.modo},
-                    destino="trading"
-                )
-            else:
-                logger.warning(f"[ExchangeManager] Circuit breaker activo hasta {self.breaker_reset_time}")
-                return False
-        return True
+            self.breaker.trip()
+
+    @property
+    def breaker_tripped(self) -> bool:
+        return self.breaker.tripped
+
+    async def _breaker_event(self, tipo: str) -> None:
+        await self.controller.publicar_evento(
+            canal="alertas",
+            datos={"tipo": tipo, "exchange": self.exchange_name, "modo": self.modo},
+            destino="trading"
+        )
+
+    async def check_circuit_breaker(self, probe: bool = True) -> bool:
+        """True si se puede operar; con probe=False no consume la petición de prueba del estado semiabierto."""
+        estado = self.breaker.state
+        if not probe:
+            return self.breaker.ready()
+        if self.breaker.allow():
+            if estado == "open":
+                logger.info(f"[ExchangeManager] Circuit breaker semiabierto para {self.exchange_name} ({self.modo}): orden de prueba")
+                await self._breaker_event("circuit_breaker_half_open")
+            return True
+        logger.warning(f"[ExchangeManager] Circuit breaker activo para {self.exchange_name} ({self.modo})")
+        return False
 
     async def register_failure(self) -> None:
-        self.failure_count += 1
-        if self.failure_count >= self.circuit_breaker_config["max_failures"]:
-            self.breaker_tripped = True
-            self.breaker_reset_time = datetime.utcnow() + timedelta(seconds=self.circuit_breaker_config["reset_timeout"])
+        if self.breaker.record_failure():
             logger.error(f"[ExchangeManager] Circuit breaker activado para {self.exchange_name} ({self.modo})")
-            await self.controller.publicar_evento(
-                canal="alertas",
-                datos={"tipo": "circuit_breaker_tripped", "exchange": self.exchange_name, "modo": self.modo},
-                destino="trading"
-            )
+            await self._breaker_event("circuit_breaker_tripped")
 
-    def calculate_slippage(self, volatilidad: float, volume: float) -> float:
-        base_slippage = volatilidad * 0.1
-        volume_factor = max(0.1, 1000000 / volume)
-        slippage = base_slippage * volume_factor * random.uniform(0.8, 1.2)
-        return slippage
+    async def register_success(self, latency: Optional[float] = None) -> None:
+        estado = self.breaker.state
+        if self.breaker.record_success(latency):
+            logger.info(f"[ExchangeManager] Circuit breaker reseteado para {self.exchange_name} ({self.modo})")
+            await self._breaker_event("circuit_breaker_reset")
+        elif self.breaker.state == "open" and estado != "open":
+            logger.error(f"[ExchangeManager] Circuit breaker activado para {self.exchange_name} ({self.modo}) por respuestas lentas")
+            await self._breaker_event("circuit_breaker_tripped")
+
+    async def _refresh_book(self, symbol: str) -> None:
+        if not self.slippage.stale(symbol):
+            return
+        try:
+            libro = await self.exchange.with_lane("market_data").fetch_order_book(symbol, 20)
+            self.slippage.update_book(symbol, libro)
+        except Exception as e:
+            logger.warning(f"[ExchangeManager] Libro de {symbol} no disponible; deslizamiento por ejecuciones recientes: {e}")
 
     async def execute_trade(self, decision):
         try:
-            if not await self.check_circuit_breaker():
-                return
-            symbol = decision["symbol"]
-            side = decision["type"]
-            price = decision["price"]
-            risk_per_trade = decision["risk_per_trade"]
-            trade_multiplier = decision["trade_multiplier"]
-            data = self.controller.nucleus.market_data.get(symbol, {})
-            volatilidad = data.get("volatilidad", 0.02)
-            volume = data.get("volume", 1000000)
-            slippage = self.calculate_slippage(volatilidad, volume)
+            return (await self.execute_batch([decision]))[0]["order"]
+        except Exception as e:
+            await self.register_failure()
+            logger.error(f"[ExchangeManager] Error ejecutando trade para {decision.get('symbol')}: {e}")
+
+    async def execute_batch(self, decisions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Comprueba y lanza todas las decisiones de un tick a la vez; devuelve un resultado por decisión."""
+        resultados = [{"symbol": d.get("symbol"), "status": "rejected", "reason": None, "order": None}
+                      for d in decisions]
+        if not decisions:
+            return resultados
+        if not await self.check_circuit_breaker(probe=False):
+            for resultado in resultados:
+                resultado["reason"] = "circuit_breaker"
+            return resultados
+        bloques = self.controller.nucleus.bloques
+        self.risk.set_equity(sum(b.capital for b in bloques))
+        validas = []
+        for i, decision in enumerate(decisions):
+            try:
+                # Cada símbolo se dimensiona con el capital de su propio bloque
+                bloque = self._block_for(decision["symbol"])
+                if bloque is None:
+                    resultados[i]["reason"] = "no_block"
+                    logger.warning(f"[ExchangeManager] Sin bloque para {decision['symbol']}; decisión descartada")
+                    continue
+                amount = (bloque.capital * decision["risk_per_trade"] * decision["trade_multiplier"]) / decision["price"]
+                validas.append((i, decision, amount))
+            except Exception as e:
+                # Una decisión mal formada es un error local: se rechaza sin tocar el circuit breaker del exchange
+                resultados[i]["reason"] = f"error: {e}"
+                logger.error(f"[ExchangeManager] Decisión inválida para {decision.get('symbol')}: {e}")
+        if not validas:
+            return resultados
+        # Un libro por símbolo, pedidos en paralelo, y una sola estimación vectorizada para todo el lote
+        await asyncio.gather(*(self._refresh_book(s) for s in {d["symbol"] for _, d, _ in validas}))
+        market_data = self.controller.nucleus.market_data
+        slippages = self.slippage.estimate_batch(
+            [d["symbol"] for _, d, _ in validas], [d["type"] for _, d, _ in validas], [a for _, _, a in validas],
+            [d["price"] for _, d, _ in validas],
+            [market_data.get(d["symbol"], {}).get("volatilidad") for _, d, _ in validas]
+        )
+        for (i, decision, amount), slippage in zip(validas, slippages):
+            symbol, side, price = decision["symbol"], decision["type"], decision["price"]
+            slippage = float(slippage)
             actual_price = price * (1 + slippage if side == "buy" else 1 - slippage)
             slippage_percent = abs((actual_price - price) / price)
             if slippage_percent > self.slippage_tolerance:
@@ -121,45 +201,174 @@ class EntidadExchangeManager(EntidadBase):
                     datos={"tipo": "slippage_exceed", "symbol": symbol, "slippage_percent": slippage_percent},
                     destino="trading"
                 )
-                return
-            self.slippage_history.append(slippage_percent)
-            bloque = self.controller.nucleus.bloques[0]
-            amount = (bloque.capital * risk_per_trade * trade_multiplier) / price
-            fragment_size = amount / 3
-            fragments = [fragment_size] * 3
-            if amount % fragment_size != 0:
-                fragments[-1] += amount % fragment_size
-            for i, fragment in enumerate(fragments):
-                if fragment == 0:
-                    continue
-                order = await self.exchange.create_market_order(symbol, side, fragment)
-                logger.info(f"[ExchangeManager] Fragmento {i+1}/{len(fragments)} ejecutado: {side} {fragment} {symbol} a {actual_price}")
+                resultados[i]["reason"] = "slippage"
+                continue
+            motivo = self.risk.check(symbol, side, amount, actual_price, self.exchange_name)
+            if motivo is not None:
+                logger.warning(f"[ExchangeManager] {side} {amount} {symbol} rechazada por riesgo: {motivo}")
                 await self.controller.publicar_evento(
                     canal="alertas",
-                    datos={"tipo": "trade_ejecutado", "order": order, "symbol": symbol, "fragment": i+1},
+                    datos={"tipo": "riesgo_rechazo", "symbol": symbol, "side": side, "amount": amount, "motivo": motivo},
                     destino="trading"
                 )
-                await asyncio.sleep(random.uniform(0.5, 1.0))
+                resultados[i]["reason"] = f"risk: {motivo}"
+                continue
+            # Cada orden padre arranca en su tarea: las primeras hijas de todo el lote salen juntas
+            resultados[i]["order"] = self.execution.submit(
+                symbol, side, amount, algo=decision.get("algo"), duration=decision.get("duration"),
+                slices=decision.get("slices"), participation=decision.get("participation", 0.1),
+                meta={"price": actual_price, "reference": price, "slippage": slippage,
+                      "strategy": decision.get("strategy")}
+            )
+            self.risk.reserve(resultados[i]["order"].id, symbol, side, amount, self.exchange_name, actual_price)
+            resultados[i]["status"] = "submitted"
+        return resultados
+
+    def _block_for(self, symbol: str):
+        bloques = self.controller.nucleus.bloques
+        if len(self._bloques) != len(bloques):
+            # Los bloques de la estrategia se llaman bloque_<símbolo>
+            self._bloques = {b.id[len("bloque_"):]: b for b in bloques if str(getattr(b, "id", "")).startswith("bloque_")}
+        return self._bloques.get(symbol)
+
+    async def _add_venue(self, exchange: str, modo: str, settings: Dict[str, Any]) -> None:
+        if not self.routing.get("enabled") or modo != self.modo or exchange == self.exchange_name:
+            return
+        if exchange in self.venue_clients:
+            if self.venue_clients[exchange] == settings:
+                return
+            # La configuración del venue cambió (recarga del YAML): se vuelve a añadir con la nueva
+            await self._remove_venue(exchange, modo)
+        try:
+            if settings.get("simulator") is not None:
+                get_exchange_pool().register_factory(exchange, simulator_factory(settings["simulator"]))
+            cliente = await get_exchange_pool().acquire(
+                exchange, modo, api_key=settings.get("api_key"), api_secret=settings.get("api_secret")
+            )
+            self.venue_clients[exchange] = settings
+            venue = get_rate_governor().wrap(cliente, exchange, "orders", endpoint=modo)
+            self.router.add_venue(exchange, venue, modo, settings.get("fee"), self.circuit_breaker_config)
         except Exception as e:
+            logger.error(f"[ExchangeManager] Error añadiendo {exchange} ({modo}) al enrutado: {e}")
+
+    async def _remove_venue(self, exchange: str, modo: str) -> None:
+        if modo != self.modo or exchange not in self.venue_clients:
+            return
+        self.router.remove_venue(exchange)
+        settings = self.venue_clients.pop(exchange)
+        await get_exchange_pool().release(exchange, modo, settings.get("api_key"))
+        logger.info(f"[ExchangeManager] {exchange} ({modo}) retirado del enrutado")
+
+    async def _on_venue_event(self, tipo: str, venue) -> None:
+        await self.controller.publicar_evento(
+            canal="alertas",
+            datos={"tipo": tipo, "exchange": venue.name, "modo": venue.modo},
+            destino="trading"
+        )
+
+    async def _place_child(self, symbol: str, side: str, amount: float) -> Dict[str, Any]:
+        # Con enrutado cada venue lleva su propio circuit breaker; sólo falla si ninguno puede ejecutar
+        if not self.routing.get("enabled") and not await self.check_circuit_breaker():
+            raise RuntimeError(f"circuit breaker activo para {self.exchange_name} ({self.modo})")
+        libro = self.slippage.book(symbol)
+        client_id = self.tracker.new_client_id()
+        self.tracker.track(client_id, symbol, side, amount, libro.mid if libro else None, venue=self.exchange_name)
+        inicio = reloj_actual().time()
+        try:
+            if self.routing.get("enabled"):
+                resultado = await self.router.execute(symbol, side, amount)
+            else:
+                resultado = await self.batcher.create_market_order(symbol, side, amount,
+                                                                   params={"clientOrderId": client_id})
+        except Exception:
+            await self.tracker.apply({"status": "rejected"}, client_id)
             await self.register_failure()
-            logger.error(f"[ExchangeManager] Error ejecutando trade para {decision.get('symbol')}: {e}")
+            raise
+        if not self.routing.get("enabled"):
+            await self.register_success(reloj_actual().time() - inicio)
+        await self.tracker.apply(resultado, client_id)
+        return resultado
+
+    async def _on_order_event(self, tipo: str, orden) -> None:
+        if orden.venue != self.exchange_name:
+            return
+        await self.controller.publicar_evento(
+            canal="alertas",
+            datos={"tipo": "orden_estado", "evento": tipo, "orden": orden.to_dict()},
+            destino="trading"
+        )
+
+    def _volume_profile(self, symbol: str, slices: int, intervalo: float) -> Optional[List[float]]:
+        """Volumen esperado por tramo a partir de las velas de 1m recientes del agregador."""
+        velas = get_candle_aggregator().candles(symbol, "1m", n=60)
+        if len(velas) < slices:
+            return None
+        volumenes = velas[:, 5]
+        pesos = np.array([tramo.mean() for tramo in np.array_split(volumenes, slices)])
+        if pesos.sum() <= 0:
+            return None
+        return (pesos / pesos.mean() * volumenes.mean() / 60 * intervalo).tolist()
+
+    async def _on_execution_update(self, order, child: Optional[Dict[str, Any]]) -> None:
+        if child is not None:
+            # Con enrutado la hija se reparte entre venues; cada uno suma su parte a la exposición
+            venues = (child.get("order") or {}).get("venues") or {None: child["amount"]}
+            for venue, cantidad in venues.items():
+                self.risk.fill(order.id, cantidad, child["price"], venue)
+            if order.meta.get("reference"):
+                self.slippage.record_fill(order.symbol, order.side, order.meta["reference"], child["price"],
+                                          order.meta.get("slippage"))
+            logger.info(f"[ExchangeManager] Fragmento {child['index']} de {order.id} ejecutado: {order.side} {child['amount']} {order.symbol} a {child['price']}")
+            await self.controller.publicar_evento(
+                canal="alertas",
+                datos={"tipo": "trade_ejecutado", "order": child["order"], "symbol": order.symbol,
+                       "fragment": child["index"], "parent_id": order.id},
+                destino="trading"
+            )
+        elif order.done:
+            self.risk.release(order.id)
+            await self.controller.publicar_evento(
+                canal="alertas",
+                datos={"tipo": "orden_padre", "orden": order.to_dict()},
+                destino="trading"
+            )
 
     async def manejar_evento(self, event: Event) -> None:
         try:
             datos = event.datos
             if event.canal == "trading_exchange" and datos.get("tipo") == "registro_exchange":
                 logger.info(f"[ExchangeManager] Registrado: {datos.get('exchange')} ({datos.get('modo')})")
+                await self._add_venue(datos.get("exchange"), datos.get("modo"), datos.get("config") or {})
+            elif event.canal == "trading_exchange" and datos.get("tipo") == "baja_exchange":
+                await self._remove_venue(datos.get("exchange"), datos.get("modo"))
             elif event.canal == "trading_exchange" and datos.get("tipo") == "top_altcoins_actualizado":
                 self.altcoins = datos.get("altcoins", [])
                 logger.info(f"[ExchangeManager] Altcoins actualizados: {self.altcoins}")
             elif event.canal == "trading_exchange" and datos.get("tipo") == "trade_execution":
                 await self.execute_trade(datos.get("decision"))
+            elif event.canal == "trading_exchange" and datos.get("tipo") == "trade_execution_batch":
+                resultados = await self.execute_batch(datos.get("decisions", []))
+                await self.controller.publicar_evento(
+                    canal="alertas",
+                    datos={"tipo": "resultado_lote", "resultados": [
+                        {"symbol": r["symbol"], "status": r["status"], "reason": r["reason"],
+                         "parent_id": r["order"].id if r["order"] else None} for r in resultados
+                    ]},
+                    destino="trading"
+                )
         except Exception as e:
             logger.error(f"[ExchangeManager] Error manejando evento: {e}")
 
     async def shutdown(self) -> None:
+        await self.execution.cancel_all()
+        self.tracker.unsubscribe(self._on_order_event)
+        await self.tracker.stop(self.exchange_name)
+        for exchange, settings in self.venue_clients.items():
+            await get_exchange_pool().release(exchange, self.modo, settings.get("api_key"))
+        self.venue_clients = {}
         if self.exchange:
-            await self.exchange.close()
-            logger.info(f"[ExchangeManager] Exchange {self.exchange_name} cerrado")
+            await get_exchange_pool().release(self.exchange_name, self.modo, self.api_key)
+            self.exchange = None
+            logger.info(f"[ExchangeManager] Exchange {self.exchange_name} liberado")
         logger.info("[ExchangeManager] Apagado")
         await super().shutdown()
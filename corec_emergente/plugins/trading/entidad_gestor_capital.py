@@ -15,6 +15,7 @@ import os
 import aioredis
 import asyncpg
 from collections import Counter
+from .order_tracker import get_order_tracker
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -311,7 +312,9 @@ class EntidadGestorCapitalPool(EntidadBase):
     async def allocate_trade(self, trade_amount: float, trade_id: str) -> Dict[str, float]:
         try:
             max_active = self.total_capital * self.max_capital_active_pct
-            if self.active_capital + trade_amount > max_active:
+            # El nocional de órdenes abiertas en los exchanges cuenta aunque no haya pasado por allocate_trade
+            comprometido = max(self.active_capital, get_order_tracker().total_exposure())
+            if comprometido + trade_amount > max_active:
                 logger.warning(f"[GestorCapitalPool] Límite de capital activo alcanzado ({self.active_capital}/{max_active})")
                 await self.controller.publicar_evento(
                     canal="alertas",
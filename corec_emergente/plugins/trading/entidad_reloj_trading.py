@@ -9,9 +9,9 @@ import asyncio
 import logging
 from typing import Dict, Any, Optional
 from corec.entidad_base import EntidadBase, Event
-from datetime import datetime, time
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from datetime import time
 from apscheduler.triggers.interval import IntervalTrigger
+from clock import reloj_actual, crear_scheduler
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,12 +36,12 @@ class EntidadRelojTrading(EntidadBase):
         self.settlement_time = config["settlement_time"]
         self.ciclo_intervalo = config["ciclo_intervalo"]
         self.modo = "activo"
-        self.scheduler = AsyncIOScheduler()
+        self.scheduler = crear_scheduler()
         logger.info("[RelojTrading] Inicializado")
 
     async def check_trading_mode(self) -> None:
         try:
-            now = datetime.utcnow().time()
+            now = reloj_actual().utcnow().time()
             if self.vigilancia_inicio <= now < self.vigilancia_fin:
                 if self.modo != "vigilancia":
                     self.modo = "vigilancia"
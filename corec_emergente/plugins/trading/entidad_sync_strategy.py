@@ -13,7 +13,11 @@ from datetime import datetime
 import json
 import aioredis
 from .blocks.trading_symbiotic import TradingSymbioticBlock
+from .delta_publisher import SequenceTracker
+from .conflation import ConflatingBuffer
+from .portfolio_risk import get_portfolio_risk
 from entities.nano import NanoEntidad
+from indicators import calcular_macd
 from collections import Counter
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -58,8 +62,11 @@ class EntidadSyncStrategy(EntidadBase):
         self.memoria_simbolica_max = config["memoria_simbolica_max"]
         self.bloques = {}
         self.macro_data = {}
-        self.market_data = {}
+        self.market_data = ConflatingBuffer()
         self.pending_signals = {}
+        self.sequences = SequenceTracker()
+        # Covarianza EWMA entre todos los símbolos, al día con cada tick
+        self.portfolio = get_portfolio_risk(**config.get("portfolio_risk", {}))
         self.redis = aioredis.Redis(
             host=config['redis']['host'],
             port=config['redis']['port'],
@@ -83,17 +90,17 @@ class EntidadSyncStrategy(EntidadBase):
         logger.info("[SyncStrategy] %d bloques simbióticos inicializados", len(self.bloques))
 
     def calculate_macd(self, prices: List[float]) -> float:
-        if len(prices) < 26:
-            return 0.0
-        exp12 = sum(prices[-12:]) / 12
-        exp26 = sum(prices[-26:]) / 26
-        return exp12 - exp26
+        return calcular_macd(prices)
 
-    async def detect_opportunities(self) -> List[Dict]:
+    async def detect_opportunities(self, full: bool = False) -> List[Dict]:
+        """Evalúa los bloques de los símbolos con datos nuevos desde la pasada anterior (o todos si full)."""
         opportunities = []
-        for symbol, bloque in self.bloques.items():
-            data = self.market_data.get(symbol, {})
-            if not data:
+        cambios = self.market_data.drain()
+        if full:
+            cambios = dict(self.market_data.items())
+        for symbol, data in cambios.items():
+            bloque = self.bloques.get(symbol)
+            if bloque is None or not data:
                 continue
             prices = data.get('prices', [data.get('price', 35000)] * 50)
             phase = self.get_phase(bloque.capital)
@@ -104,7 +111,8 @@ class EntidadSyncStrategy(EntidadBase):
                 "volatilidad": data.get('volatilidad', 0.02),
                 "dxy": self.macro_data.get('DXY', 100),
                 "sp500": self.macro_data.get('SP500', 0.0),
-                "macd": self.calculate_macd(prices)
+                # Los watchers publican el MACD de su motor incremental; sólo se recalcula si falta
+                "macd": data['macd'] if 'macd' in data else self.calculate_macd(prices)
             }
             fitness = await bloque.procesar(carga)
             trade_id = f"binance:{symbol}"
@@ -169,21 +177,37 @@ class EntidadSyncStrategy(EntidadBase):
     async def manejar_evento(self, event: Event) -> None:
         try:
             datos = event.datos
-            if event.canal in ["trading_btc", "trading_eth", "trading_altcoin"]:
-                self.market_data[datos["symbol"]] = datos
-                logger.debug("[SyncStrategy] Datos de mercado actualizados para %s", datos["symbol"])
+            if event.canal == "trading_altcoin" and datos.get("tipo") == "snapshot":
+                # Los mensajes atrasados (secuencia ya vista) se descartan
+                precios = {}
+                for symbol, valores in datos["symbols"].items():
+                    if self.sequences.accept(symbol, valores):
+                        self.market_data[symbol] = valores
+                        precios[symbol] = valores.get("price")
+                # Un snapshot es un solo tick para la covarianza; el búfer sólo guarda el último precio
+                self.portfolio.update(precios)
+                logger.debug("[SyncStrategy] Snapshot de mercado recibido para %d símbolos", len(datos["symbols"]))
+            elif event.canal in ["trading_btc", "trading_eth", "trading_altcoin"]:
+                if self.sequences.accept(datos["symbol"], datos):
+                    self.market_data[datos["symbol"]] = datos
+                    self.portfolio.update({datos["symbol"]: datos.get("price")})
+                    logger.debug("[SyncStrategy] Datos de mercado actualizados para %s", datos["symbol"])
             elif event.canal == "trading_macro":
                 self.macro_data = datos
+                # Los datos macro entran en la carga de todos los bloques
+                self.market_data.mark_dirty()
                 logger.info("[SyncStrategy] Datos macro recibidos: %s", datos)
             elif event.canal == "trading_strategy" and datos.get("texto") == "ejecutar predicciones":
-                opportunities = await self.detect_opportunities()
-                for opp in opportunities:
+                opportunities = await self.detect_opportunities(full=datos.get("full", False))
+                if opportunities:
+                    # Todas las oportunidades del tick viajan juntas para comprobarlas y enviarlas en una ronda
                     await self.controller.publicar_evento(
                         canal="trading_exchange",
-                        datos={"tipo": "trade_execution", "decision": opp},
+                        datos={"tipo": "trade_execution_batch", "decisions": opportunities},
                         destino="trading"
                     )
-                    logger.info("[SyncStrategy] Oportunidad detectada: %s", opp)
+                    logger.info("[SyncStrategy] %d oportunidades detectadas: %s", len(opportunities),
+                                [(o["symbol"], o["type"]) for o in opportunities])
             elif event.canal == "trading_strategy" and datos.get("accion") == "ajustar_salud":
                 for bloque in self.bloques.values():
                     for entidad in bloque.entidades:
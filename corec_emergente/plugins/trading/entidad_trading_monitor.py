@@ -9,6 +9,8 @@ import asyncio
 import logging
 from typing import Dict, Any, Optional
 from corec.entidad_base import EntidadBase, Event
+from .rate_governor import get_rate_governor
+from .venue_health import get_venue_health
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -34,7 +36,10 @@ class EntidadTradingMonitor(EntidadBase):
                 "capital_total": sum(b.capital + b.posicion * b.memoria_colectiva[-1]["precio"] for b in self.controller.nucleus.bloques if b.memoria_colectiva),
                 "memoria_global": len(self.controller.nucleus.memoria_global),
                 "relaciones_simbolicas": len(self.controller.nucleus.plugins["viviente"].grafo.relaciones),
-                "entrelazamientos_promedio": sum(len(e.entrelazadas) for b in self.controller.nucleus.bloques for e in b.entidades) / sum(len(b.entidades) for b in self.controller.nucleus.bloques) if self.controller.nucleus.bloques else 0
+                "entrelazamientos_promedio": sum(len(e.entrelazadas) for b in self.controller.nucleus.bloques for e in b.entidades) / sum(len(b.entidades) for b in self.controller.nucleus.bloques) if self.controller.nucleus.bloques else 0,
+                "rate_limits": get_rate_governor().metrics(),
+                # Latencias p50/p99 por endpoint, tasa de error y puntuación de cada exchange
+                "venue_health": get_venue_health().snapshot()
             }
             await self.controller.publicar_evento(
                 canal="alertas",
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+exchange_pool.py
+Registro de clientes ccxt compartidos por todo el proceso, indexados por
+(exchange, modo, huella de credenciales).
+
+Los watchers, el ExchangeManager y el BacktestManager piden el cliente con
+acquire() y lo devuelven con release(): la sesión HTTP, el handshake TLS y los
+mercados cargados se reutilizan entre sondeos y entre entidades. El cliente se
+cierra cuando nadie lo tiene adquirido. Cada cuenta tiene su propio cliente (la
+huella es un hash de la api key) y el cliente público no lleva credenciales:
+nunca se cambian las credenciales de un cliente compartido. load_markets() carga
+con un cliente ya abierto, se cachea con TTL y se inyecta en todos los clientes
+vivos y nuevos del mismo exchange y modo; con cache_dir los
+mercados se guardan también en disco y un arranque con la caché fresca no
+vuelve a pedirlos al exchange.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+import ccxt.async_support as ccxt
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ExchangeClientPool:
+    def __init__(self, markets_ttl: float = 3600, cache_dir: Optional[str] = None):
+        self.markets_ttl = markets_ttl
+        self.cache_dir = cache_dir
+        self._clientes: Dict[Tuple[str, str, Optional[str]], Dict[str, Any]] = {}
+        self._mercados: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        self._factories: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._lock = None
+
+    def configure(self, markets_ttl: Optional[float] = None, cache_dir: Optional[str] = None) -> None:
+        if markets_ttl is not None:
+            self.markets_ttl = markets_ttl
+        if cache_dir is not None:
+            self.cache_dir = cache_dir
+
+    def register_factory(self, exchange: str, factory: Callable[[Dict[str, Any]], Any]) -> None:
+        """Sustituye la clase ccxt de un exchange (p. ej. por un simulador); recibe las opciones ccxt."""
+        self._factories[exchange] = factory
+
+    def _opciones(self, modo: str, api_key: Optional[str], api_secret: Optional[str]) -> Dict[str, Any]:
+        opciones = {"enableRateLimit": True}
+        if api_key:
+            opciones["apiKey"] = api_key
+            opciones["secret"] = api_secret
+        if modo == "futures":
+            opciones["options"] = {"defaultType": "future"}
+        return opciones
+
+    def _crear(self, exchange: str, modo: str, api_key: Optional[str], api_secret: Optional[str]):
+        factory = self._factories.get(exchange) or getattr(ccxt, exchange)
+        cliente = factory(self._opciones(modo, api_key, api_secret))
+        cacheado = self._mercados.get((exchange, modo))
+        if cacheado and time.monotonic() - cacheado[0] < self.markets_ttl and hasattr(cliente, "set_markets"):
+            cliente.set_markets(cacheado[1])
+        logger.info(f"[ExchangePool] Cliente {exchange} ({modo}) creado")
+        return cliente
+
+    @staticmethod
+    def _clave(exchange: str, modo: str, api_key: Optional[str]) -> Tuple[str, str, Optional[str]]:
+        huella = hashlib.sha256(api_key.encode()).hexdigest()[:16] if api_key else None
+        return exchange, modo, huella
+
+    async def acquire(self, exchange: str = "binance", modo: str = "spot",
+                      api_key: Optional[str] = None, api_secret: Optional[str] = None):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            clave = self._clave(exchange, modo, api_key)
+            entrada = self._clientes.get(clave)
+            if entrada is None:
+                entrada = {"cliente": self._crear(exchange, modo, api_key, api_secret), "refs": 0, "secret": api_secret}
+                self._clientes[clave] = entrada
+            elif entrada["secret"] != api_secret:
+                raise ValueError(f"[ExchangePool] Secreto distinto para la misma api key de {exchange} ({modo})")
+            entrada["refs"] += 1
+            return entrada["cliente"]
+
+    async def release(self, exchange: str = "binance", modo: str = "spot", api_key: Optional[str] = None) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            clave = self._clave(exchange, modo, api_key)
+            entrada = self._clientes.get(clave)
+            if entrada is None:
+                return
+            entrada["refs"] -= 1
+            if entrada["refs"] <= 0:
+                del self._clientes[clave]
+                await self._cerrar(clave, entrada["cliente"])
+
+    async def load_markets(self, exchange: str = "binance", modo: str = "spot", reload: bool = False,
+                           api_key: Optional[str] = None) -> Dict[str, Any]:
+        """Mercados del exchange y modo; quedan cargados en todos sus clientes vivos."""
+        clave = (exchange, modo)
+        cacheado = self._mercados.get(clave)
+        if cacheado and not reload and time.monotonic() - cacheado[0] < self.markets_ttl:
+            return cacheado[1]
+        en_disco = None if reload else self._leer_cache(clave)
+        if en_disco is not None:
+            edad, mercados = en_disco
+            self._mercados[clave] = (time.monotonic() - edad, mercados)
+            self._inyectar(clave, mercados)
+            return mercados
+        # Los mercados son públicos: se cargan con un cliente ya abierto (el de la cuenta indicada si
+        # lo hay) y, sólo si no hay ninguno, con uno público temporal
+        vivo = self._clientes.get(self._clave(exchange, modo, api_key))
+        if vivo is None:
+            vivo = next((e for (ex, md, _), e in self._clientes.items() if (ex, md) == clave), None)
+        cliente = vivo["cliente"] if vivo else await self.acquire(exchange, modo)
+        try:
+            mercados = await cliente.load_markets(reload)
+            self._mercados[clave] = (time.monotonic(), mercados)
+            self._guardar_cache(clave, mercados)
+            self._inyectar(clave, mercados, salvo=cliente)
+            return mercados
+        finally:
+            if vivo is None:
+                await self.release(exchange, modo)
+
+    def _inyectar(self, clave: Tuple[str, str], mercados: Dict[str, Any], salvo: Any = None) -> None:
+        for (ex, md, _), entrada in self._clientes.items():
+            cliente = entrada["cliente"]
+            if (ex, md) == clave and cliente is not salvo and hasattr(cliente, "set_markets"):
+                cliente.set_markets(mercados)
+
+    def _ruta_cache(self, clave: Tuple[str, str]) -> str:
+        return os.path.join(self.cache_dir, f"{clave[0]}_{clave[1]}_markets.json")
+
+    def _leer_cache(self, clave: Tuple[str, str]) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if not self.cache_dir:
+            return None
+        ruta = self._ruta_cache(clave)
+        try:
+            edad = time.time() - os.path.getmtime(ruta)
+            if edad >= self.markets_ttl:
+                return None
+            with open(ruta, "r") as f:
+                return edad, json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _guardar_cache(self, clave: Tuple[str, str], mercados: Dict[str, Any]) -> None:
+        if not self.cache_dir:
+            return
+        ruta = self._ruta_cache(clave)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Escritura atómica con un temporal propio: otro proceso nunca lee un fichero a medias
+            fd, temporal = tempfile.mkstemp(dir=self.cache_dir, prefix=os.path.basename(ruta), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(mercados, f, default=str)
+                os.replace(temporal, ruta)
+            except BaseException:
+                os.unlink(temporal)
+                raise
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"[ExchangePool] No se pudo guardar la caché de mercados de {clave[0]} ({clave[1]}): {e}")
+
+    def refs(self, exchange: str = "binance", modo: str = "spot", api_key: Optional[str] = None) -> int:
+        entrada = self._clientes.get(self._clave(exchange, modo, api_key))
+        return entrada["refs"] if entrada else 0
+
+    def client(self, exchange: str = "binance", modo: str = "spot", api_key: Optional[str] = None):
+        """Cliente vivo de esa cuenta, o None si nadie lo tiene adquirido."""
+        entrada = self._clientes.get(self._clave(exchange, modo, api_key))
+        return entrada["cliente"] if entrada else None
+
+    async def _cerrar(self, clave: Tuple[str, ...], cliente) -> None:
+        try:
+            await cliente.close()
+            logger.info(f"[ExchangePool] Cliente {clave[0]} ({clave[1]}) cerrado")
+        except Exception as e:
+            logger.error(f"[ExchangePool] Error cerrando cliente {clave[0]} ({clave[1]}): {e}")
+
+    async def close_all(self) -> None:
+        clientes, self._clientes = self._clientes, {}
+        for clave, entrada in clientes.items():
+            await self._cerrar(clave, entrada["cliente"])
+
+
+_pool: Optional[ExchangeClientPool] = None
+
+
+def get_exchange_pool() -> ExchangeClientPool:
+    global _pool
+    if _pool is None:
+        _pool = ExchangeClientPool()
+    return _pool
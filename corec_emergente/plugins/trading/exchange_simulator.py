@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+exchange_simulator.py
+Exchange simulado en proceso con motor de casado, usable en lugar de un cliente ccxt.
+
+Cada símbolo tiene un libro de órdenes con prioridad precio-tiempo. Las órdenes
+de mercado barren el libro hasta agotar su cantidad (el resto queda expirado) y
+las limitadas casan lo que cruzan y dejan el resto en el libro, así que hay
+ejecuciones parciales. Un creador de mercado sintético mantiene niveles de
+liquidez alrededor del último precio. La latencia se inyecta con el reloj del
+sistema (virtual en simulación) y los fallos se inyectan con una probabilidad,
+con fail_next() o con set_outage(), lanzando los mismos errores de red que ccxt
+para que el circuit breaker del ExchangeManager reaccione igual que con un
+exchange real. Implementa la parte de la API asíncrona de ccxt que usan el
+ExchangeManager y el pool de clientes; se registra con:
+
+    get_exchange_pool().register_factory("simulator", simulator_factory({"latency": 0.01}))
+"""
+
+import bisect
+import itertools
+import logging
+import random
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+import ccxt.async_support as ccxt
+from clock import reloj_actual
+from scenarios import precio_inicial
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_SYMBOLS = ["BTC/USDT", "ETH/USDT"]
+EPSILON = 1e-12
+
+
+class OrderBook:
+    """Libro de un símbolo: niveles de precio ordenados y una cola FIFO por nivel."""
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.levels = {"buy": {}, "sell": {}}
+        # Precios ascendentes; el mejor bid es el último y el mejor ask el primero
+        self.prices = {"buy": [], "sell": []}
+
+    def best(self, side: str) -> Optional[float]:
+        precios = self.prices[side]
+        if not precios:
+            return None
+        return precios[-1] if side == "buy" else precios[0]
+
+    def best_bid(self) -> Optional[float]:
+        return self.best("buy")
+
+    def best_ask(self) -> Optional[float]:
+        return self.best("sell")
+
+    def add(self, order: Dict[str, Any]) -> None:
+        side, precio = order["side"], order["price"]
+        nivel = self.levels[side].get(precio)
+        if nivel is None:
+            nivel = self.levels[side][precio] = deque()
+            bisect.insort(self.prices[side], precio)
+        nivel.append(order)
+
+    def remove(self, order: Dict[str, Any]) -> bool:
+        side, precio = order["side"], order["price"]
+        nivel = self.levels[side].get(precio)
+        if nivel is None or order not in nivel:
+            return False
+        nivel.remove(order)
+        if not nivel:
+            self._drop_level(side, precio)
+        return True
+
+    def _drop_level(self, side: str, precio: float) -> None:
+        del self.levels[side][precio]
+        precios = self.prices[side]
+        del precios[bisect.bisect_left(precios, precio)]
+
+    def match(self, side: str, amount: float, limit: Optional[float] = None) -> List[tuple]:
+        """Casa contra el lado contrario en orden precio-tiempo; devuelve [(orden_maker, precio, cantidad)]."""
+        contrario = "sell" if side == "buy" else "buy"
+        casados = []
+        restante = amount
+        while restante > EPSILON:
+            precio = self.best(contrario)
+            if precio is None or (limit is not None and (precio > limit if side == "buy" else precio < limit)):
+                break
+            nivel = self.levels[contrario][precio]
+            while nivel and restante > EPSILON:
+                maker = nivel[0]
+                cantidad = min(restante, maker["remaining"])
+                maker["remaining"] -= cantidad
+                maker["filled"] += cantidad
+                restante -= cantidad
+                casados.append((maker, precio, cantidad))
+                if maker["remaining"] <= EPSILON:
+                    nivel.popleft()
+            if not nivel:
+                self._drop_level(contrario, precio)
+        return casados
+
+    def depth(self, side: str, n: Optional[int] = None) -> List[List[float]]:
+        """[[precio, cantidad]] del mejor nivel hacia fuera."""
+        precios = self.prices[side][::-1] if side == "buy" else self.prices[side]
+        return [[p, sum(o["remaining"] for o in self.levels[side][p])] for p in precios[:n]]
+
+
+class ExchangeSimulator:
+    """Cliente con la interfaz asíncrona de ccxt respaldado por libros locales.
+
+    config admite las opciones ccxt que pasa el pool (apiKey, secret, options)
+    y las del simulador: symbols, prices, latency y jitter (segundos),
+    failure_rate, seed, fee y liquidity {levels, step, size}.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.id = config.get("id", "simulator")
+        self.apiKey = config.get("apiKey")
+        self.secret = config.get("secret")
+        self.options = config.get("options", {})
+        self.has = {"createMarketOrder": True, "createLimitOrder": True, "createOrders": True, "cancelOrder": True,
+                    "fetchOrder": True, "fetchOpenOrders": True, "fetchOrderBook": True, "fetchTicker": True,
+                    "setLeverage": True}
+        self.latency = config.get("latency", 0.0)
+        self.jitter = config.get("jitter", 0.0)
+        self.failure_rate = config.get("failure_rate", 0.0)
+        self.fee = config.get("fee", 0.001)
+        liquidez = config.get("liquidity", {})
+        self.liquidity_levels = liquidez.get("levels", 10)
+        self.liquidity_step = liquidez.get("step", 0.0005)
+        self.liquidity_size = liquidez.get("size", 1.0)
+        self.rng = random.Random(config.get("seed"))
+        self.leverage: Dict[Optional[str], int] = {}
+        self.books: Dict[str, OrderBook] = {}
+        self.last_price: Dict[str, float] = {}
+        self.volume: Dict[str, float] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self._ids = itertools.count(1)
+        self._fail_next = 0
+        self._outage = False
+        self.stats = {"requests": 0, "orders": 0, "fills": 0, "failures": 0}
+        self.markets: Dict[str, Dict[str, Any]] = {}
+        precios = config.get("prices", {})
+        for symbol in config.get("symbols", DEFAULT_SYMBOLS):
+            self.add_market(symbol, precios.get(symbol, precio_inicial(symbol)))
+
+    # --- control del simulador ---
+
+    def add_market(self, symbol: str, price: float) -> None:
+        base, quote = symbol.split("/")
+        tipo = "future" if self.options.get("defaultType") == "future" else "spot"
+        self.markets[symbol] = {"id": symbol.replace("/", ""), "symbol": symbol, "base": base, "quote": quote,
+                                "type": tipo, "spot": tipo == "spot", "active": True,
+                                "limits": {"amount": {"min": 0.0}}}
+        self.books[symbol] = OrderBook(symbol)
+        self.volume[symbol] = 0.0
+        self.set_mid(symbol, price)
+
+    def set_mid(self, symbol: str, price: float) -> None:
+        """Mueve el mercado: retira la liquidez sintética y la vuelve a colocar alrededor de price."""
+        libro = self.books[symbol]
+        for side in ("buy", "sell"):
+            for orden in [o for p in list(libro.prices[side]) for o in libro.levels[side][p] if o["id"] is None]:
+                libro.remove(orden)
+        self.last_price[symbol] = price
+        self._replenish(symbol)
+
+    def fail_next(self, n: int = 1) -> None:
+        """Las siguientes n llamadas fallan con NetworkError."""
+        self._fail_next += n
+
+    def set_outage(self, caido: bool = True) -> None:
+        self._outage = caido
+
+    def _replenish(self, symbol: str) -> None:
+        # El creador de mercado rellena los niveles que falten alrededor del último precio sin cruzar el libro
+        libro = self.books[symbol]
+        ultimo = self.last_price[symbol]
+        for k in range(1, self.liquidity_levels + 1):
+            for side, signo in (("buy", -1), ("sell", 1)):
+                precio = round(ultimo * (1 + signo * k * self.liquidity_step), 8)
+                contrario = libro.best("sell" if side == "buy" else "buy")
+                if precio in libro.levels[side] or (contrario is not None and (
+                        precio >= contrario if side == "buy" else precio <= contrario)):
+                    continue
+                libro.add({"id": None, "side": side, "price": precio, "remaining": self.liquidity_size,
+                           "filled": 0.0})
+
+    async def _call(self, metodo: str) -> None:
+        self.stats["requests"] += 1
+        espera = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if espera > 0:
+            await reloj_actual().sleep(espera)
+        if self._outage:
+            self.stats["failures"] += 1
+            raise ccxt.ExchangeNotAvailable(f"{self.id} {metodo}: exchange no disponible")
+        if self._fail_next > 0 or (self.failure_rate and self.rng.random() < self.failure_rate):
+            self._fail_next = max(self._fail_next - 1, 0)
+            self.stats["failures"] += 1
+            raise ccxt.NetworkError(f"{self.id} {metodo}: fallo de red simulado")
+
+    def _book(self, symbol: str) -> OrderBook:
+        if symbol not in self.books:
+            raise ccxt.BadSymbol(f"{self.id} no tiene el mercado {symbol}")
+        return self.books[symbol]
+
+    # --- API ccxt ---
+
+    async def load_markets(self, reload: bool = False, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("load_markets")
+        return self.markets
+
+    def set_markets(self, markets: Dict[str, Any], currencies=None) -> Dict[str, Any]:
+        for symbol in markets:
+            if symbol not in self.markets and "/" in symbol:
+                self.add_market(symbol, precio_inicial(symbol))
+        return self.markets
+
+    async def close(self) -> None:
+        return None
+
+    async def set_leverage(self, leverage: int, symbol: Optional[str] = None,
+                           params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("set_leverage")
+        self.leverage[symbol] = leverage
+        return {"symbol": symbol, "leverage": leverage}
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float, price: Optional[float] = None,
+                           params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("create_order")
+        return self._create(symbol, type, side, amount, price, params)
+
+    async def create_orders(self, orders: List[Dict[str, Any]], params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Endpoint por lotes: una sola latencia; las órdenes inválidas vuelven como rechazadas."""
+        await self._call("create_orders")
+        resultados = []
+        for o in orders:
+            try:
+                resultados.append(self._create(o["symbol"], o["type"], o["side"], o["amount"], o.get("price"),
+                                               o.get("params")))
+            except ccxt.BaseError as e:
+                resultados.append({"symbol": o.get("symbol"), "status": "rejected", "info": str(e),
+                                   "clientOrderId": (o.get("params") or {}).get("clientOrderId")})
+        return resultados
+
+    def _create(self, symbol: str, type: str, side: str, amount: float, price: Optional[float],
+                params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        libro = self._book(symbol)
+        if side not in ("buy", "sell") or type not in ("market", "limit"):
+            raise ccxt.InvalidOrder(f"{self.id}: orden {type} {side} no soportada")
+        if amount is None or amount <= 0:
+            raise ccxt.InvalidOrder(f"{self.id}: cantidad inválida {amount}")
+        if type == "limit" and (price is None or price <= 0):
+            raise ccxt.InvalidOrder(f"{self.id}: una orden limitada necesita precio")
+        ahora = int(reloj_actual().time() * 1000)
+        orden = {"id": str(next(self._ids)), "clientOrderId": (params or {}).get("clientOrderId"),
+                 "timestamp": ahora, "symbol": symbol, "type": type, "side": side,
+                 "price": price if type == "limit" else None, "amount": amount, "filled": 0.0,
+                 "remaining": amount, "cost": 0.0, "average": None, "status": "open", "trades": [],
+                 "fee": {"cost": 0.0, "currency": self.markets[symbol]["quote"]}}
+        self.stats["orders"] += 1
+        for maker, precio, cantidad in libro.match(side, amount, price if type == "limit" else None):
+            self._fill(orden, precio, cantidad, ahora, taker=True)
+            if maker["id"] is not None:
+                self._fill(maker, precio, cantidad, ahora, taker=False)
+        if orden["filled"]:
+            self.last_price[symbol] = orden["trades"][-1]["price"]
+        if orden["remaining"] <= EPSILON:
+            orden["remaining"] = 0.0
+            orden["status"] = "closed"
+        elif type == "market":
+            # Como en Binance, lo que no encuentra contrapartida en el libro expira
+            orden["status"] = "expired"
+        else:
+            orden["price"] = price
+            libro.add(orden)
+        self.orders[orden["id"]] = orden
+        self._replenish(symbol)
+        return dict(orden)
+
+    def _fill(self, orden: Dict[str, Any], precio: float, cantidad: float, ahora: int, taker: bool) -> None:
+        if taker:
+            orden["filled"] += cantidad
+            orden["remaining"] -= cantidad
+            self.volume[orden["symbol"]] += cantidad
+            self.stats["fills"] += 1
+        elif orden["remaining"] <= EPSILON:
+            orden["remaining"] = 0.0
+            orden["status"] = "closed"
+        orden["cost"] += precio * cantidad
+        orden["average"] = orden["cost"] / orden["filled"]
+        orden["fee"]["cost"] += precio * cantidad * self.fee
+        orden["trades"].append({"price": precio, "amount": cantidad, "timestamp": ahora,
+                                "takerOrMaker": "taker" if taker else "maker"})
+
+    async def create_market_order(self, symbol: str, side: str, amount: float, price: Optional[float] = None,
+                                  params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.create_order(symbol, "market", side, amount, None, params)
+
+    async def create_limit_order(self, symbol: str, side: str, amount: float, price: float,
+                                 params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self.create_order(symbol, "limit", side, amount, price, params)
+
+    async def cancel_order(self, id: str, symbol: Optional[str] = None,
+                           params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("cancel_order")
+        orden = self.orders.get(id)
+        if orden is None or orden["status"] != "open":
+            raise ccxt.OrderNotFound(f"{self.id}: orden {id} no encontrada o ya cerrada")
+        self.books[orden["symbol"]].remove(orden)
+        orden["status"] = "canceled"
+        return dict(orden)
+
+    async def fetch_order(self, id: str, symbol: Optional[str] = None,
+                          params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("fetch_order")
+        if id not in self.orders:
+            raise ccxt.OrderNotFound(f"{self.id}: orden {id} no encontrada")
+        return dict(self.orders[id])
+
+    async def fetch_open_orders(self, symbol: Optional[str] = None, since: Optional[int] = None,
+                                limit: Optional[int] = None, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        await self._call("fetch_open_orders")
+        return [dict(o) for o in self.orders.values()
+                if o["status"] == "open" and (symbol is None or o["symbol"] == symbol)][:limit]
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None,
+                               params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("fetch_order_book")
+        libro = self._book(symbol)
+        return {"symbol": symbol, "bids": libro.depth("buy", limit), "asks": libro.depth("sell", limit),
+                "timestamp": int(reloj_actual().time() * 1000), "nonce": None}
+
+    async def fetch_ticker(self, symbol: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._call("fetch_ticker")
+        libro = self._book(symbol)
+        bid, ask = libro.depth("buy", 1), libro.depth("sell", 1)
+        return {"symbol": symbol, "timestamp": int(reloj_actual().time() * 1000), "last": self.last_price[symbol],
+                "bid": bid[0][0] if bid else None, "bidVolume": bid[0][1] if bid else None,
+                "ask": ask[0][0] if ask else None, "askVolume": ask[0][1] if ask else None,
+                "baseVolume": self.volume[symbol]}
+
+
+def simulator_factory(config: Optional[Dict[str, Any]] = None) -> Callable[[Dict[str, Any]], ExchangeSimulator]:
+    """Factory para ExchangeClientPool.register_factory: combina las opciones ccxt con las del simulador."""
+    def crear(opciones: Dict[str, Any]) -> ExchangeSimulator:
+        return ExchangeSimulator({**(config or {}), **opciones})
+    return crear
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+execution_algos.py
+Algoritmos de ejecución (TWAP, VWAP y participación) para órdenes padre concurrentes.
+
+Cada orden padre avanza en su propia tarea con una máquina de estados
+(pending -> working -> completed | cancelled | failed | expired) y reparte su
+cantidad en órdenes hijas a intervalos del reloj del sistema (virtual en
+simulación). El tamaño de cada hija depende del algoritmo y del volumen
+reciente del símbolo: VWAP sigue el perfil de volumen, participación envía una
+fracción del volumen esperado y todos respetan un tope de participación.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+TRANSICIONES = {
+    "pending": {"working", "cancelled"},
+    "working": {"completed", "cancelled", "failed", "expired"}
+}
+ESTADOS_FINALES = {"completed", "cancelled", "failed", "expired"}
+
+
+class ParentOrder:
+    _ids = itertools.count(1)
+
+    def __init__(self, symbol: str, side: str, amount: float, algo: str, duration: float, slices: int,
+                 participation: float = 0.1, meta: Optional[Dict[str, Any]] = None):
+        self.id = f"parent-{next(self._ids)}"
+        self.symbol = symbol
+        self.side = side
+        self.amount = amount
+        self.algo = algo
+        self.duration = duration
+        self.slices = slices
+        self.participation = participation
+        self.meta = meta or {}
+        self.state = "pending"
+        self.filled = 0.0
+        self.notional = 0.0
+        self.children: List[Dict[str, Any]] = []
+        self.failures = 0
+        self.error = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def remaining(self) -> float:
+        return max(self.amount - self.filled, 0.0)
+
+    @property
+    def average_price(self) -> Optional[float]:
+        return self.notional / self.filled if self.filled else None
+
+    @property
+    def done(self) -> bool:
+        return self.state in ESTADOS_FINALES
+
+    def transition(self, estado: str) -> None:
+        if estado not in TRANSICIONES.get(self.state, set()):
+            raise ValueError(f"[ExecutionEngine] Transición inválida {self.state} -> {estado} en {self.id}")
+        self.state = estado
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "symbol": self.symbol, "side": self.side, "amount": self.amount, "algo": self.algo,
+                "state": self.state, "filled": self.filled, "average_price": self.average_price,
+                "children": len(self.children), "error": self.error}
+
+
+def twap_size(order: ParentOrder, indice: int, perfil: List[float], volumen_intervalo: Optional[float]) -> float:
+    return order.remaining / (order.slices - indice)
+
+
+def vwap_size(order: ParentOrder, indice: int, perfil: List[float], volumen_intervalo: Optional[float]) -> float:
+    # Fracción del volumen que el perfil espera en este tramo respecto a lo que queda
+    restante = sum(perfil[indice:])
+    if restante <= 0:
+        return twap_size(order, indice, perfil, volumen_intervalo)
+    return order.remaining * perfil[indice] / restante
+
+
+def participation_size(order: ParentOrder, indice: int, perfil: List[float], volumen_intervalo: Optional[float]) -> float:
+    if not volumen_intervalo:
+        return twap_size(order, indice, perfil, volumen_intervalo)
+    return order.participation * volumen_intervalo
+
+
+ALGOS = {"twap": twap_size, "vwap": vwap_size, "participation": participation_size}
+
+
+class ExecutionEngine:
+    """Ejecuta órdenes padre en tareas independientes.
+
+    place_order(symbol, side, amount) envía una hija y devuelve la orden ccxt;
+    volume_profile(symbol, slices, intervalo) devuelve el volumen de mercado
+    esperado en cada tramo (o None si no se conoce); on_update(order, child)
+    se llama tras cada hija y en cada cambio de estado (child None).
+    """
+
+    def __init__(self, place_order: Callable[[str, str, float], Awaitable[Dict[str, Any]]],
+                 volume_profile: Optional[Callable[[str, int, float], Optional[List[float]]]] = None,
+                 on_update: Optional[Callable[[ParentOrder, Optional[Dict[str, Any]]], Awaitable[None]]] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.place_order = place_order
+        self.volume_profile = volume_profile
+        self.on_update = on_update
+        self.default_algo = config.get("algo", "twap")
+        self.default_duration = config.get("duration", 60)
+        self.default_slices = config.get("slices", 6)
+        self.max_participation = config.get("max_participation", 0.25)
+        self.min_child = config.get("min_child", 0.0)
+        self.max_failures = config.get("max_failures", 3)
+        self.orders: Dict[str, ParentOrder] = {}
+
+    def submit(self, symbol: str, side: str, amount: float, algo: Optional[str] = None,
+               duration: Optional[float] = None, slices: Optional[int] = None, participation: float = 0.1,
+               meta: Optional[Dict[str, Any]] = None) -> ParentOrder:
+        algo = algo or self.default_algo
+        if algo not in ALGOS:
+            raise ValueError(f"[ExecutionEngine] Algoritmo desconocido: {algo}")
+        order = ParentOrder(symbol, side, amount, algo, duration or self.default_duration,
+                            max(int(slices or self.default_slices), 1), participation, meta)
+        self.orders[order.id] = order
+        reloj = reloj_actual()
+        lanzar = getattr(reloj, "lanzar", asyncio.create_task)
+        order.task = lanzar(self._run(order))
+        logger.info(f"[ExecutionEngine] {order.id}: {algo} {side} {amount} {symbol} en {order.slices} tramos")
+        return order
+
+    def active(self) -> List[ParentOrder]:
+        return [o for o in self.orders.values() if not o.done]
+
+    async def wait(self, order_id: str) -> ParentOrder:
+        order = self.orders[order_id]
+        if order.task is not None:
+            await asyncio.gather(order.task, return_exceptions=True)
+        return order
+
+    async def cancel(self, order_id: str) -> None:
+        order = self.orders.get(order_id)
+        if order is None or order.done:
+            return
+        if order.task is not None:
+            order.task.cancel()
+            await asyncio.gather(order.task, return_exceptions=True)
+        if not order.done:
+            # La tarea se canceló antes de arrancar
+            order.transition("cancelled")
+
+    async def cancel_all(self) -> None:
+        for order in self.active():
+            await self.cancel(order.id)
+
+    async def _notify(self, order: ParentOrder, child: Optional[Dict[str, Any]] = None) -> None:
+        if self.on_update is None:
+            return
+        try:
+            await self.on_update(order, child)
+        except Exception as e:
+            logger.error(f"[ExecutionEngine] Error notificando {order.id}: {e}")
+
+    def _profile(self, order: ParentOrder) -> Optional[List[float]]:
+        if self.volume_profile is None:
+            return None
+        try:
+            perfil = self.volume_profile(order.symbol, order.slices, order.duration / order.slices)
+        except Exception as e:
+            logger.warning(f"[ExecutionEngine] Perfil de volumen no disponible para {order.symbol}: {e}")
+            return None
+        return list(perfil) if perfil else None
+
+    def _child_size(self, order: ParentOrder, indice: int, perfil: Optional[List[float]]) -> float:
+        perfil_tramos = perfil or [1.0] * order.slices
+        # Volumen esperado del mercado en este tramo según el perfil reciente
+        volumen = perfil[indice] if perfil else None
+        tamano = ALGOS[order.algo](order, indice, perfil_tramos, volumen)
+        ultimo = indice == order.slices - 1 and order.algo != "participation"
+        if volumen and not ultimo:
+            tamano = min(tamano, self.max_participation * volumen)
+        if ultimo:
+            tamano = order.remaining
+        tamano = min(tamano, order.remaining)
+        # Los restos por debajo del mínimo se acumulan en la hija siguiente
+        if tamano < self.min_child and order.remaining > tamano and not ultimo:
+            return 0.0
+        return tamano
+
+    async def _run(self, order: ParentOrder) -> None:
+        reloj = reloj_actual()
+        intervalo = order.duration / order.slices
+        try:
+            order.transition("working")
+            await self._notify(order)
+            perfil = self._profile(order)
+            if perfil is not None and len(perfil) != order.slices:
+                perfil = None
+            for indice in range(order.slices):
+                if order.remaining <= 0:
+                    break
+                tamano = self._child_size(order, indice, perfil)
+                if tamano > 0:
+                    await self._send_child(order, tamano)
+                    if order.state == "failed":
+                        return
+                if indice < order.slices - 1:
+                    await reloj.sleep(intervalo)
+            order.transition("completed" if order.remaining <= 1e-12 else "expired")
+            logger.info(f"[ExecutionEngine] {order.id} {order.state}: {order.filled}/{order.amount} {order.symbol}")
+            await self._notify(order)
+        except asyncio.CancelledError:
+            if not order.done:
+                order.transition("cancelled")
+                logger.info(f"[ExecutionEngine] {order.id} cancelada con {order.filled}/{order.amount} ejecutado")
+                await self._notify(order)
+            raise
+
+    async def _send_child(self, order: ParentOrder, tamano: float) -> None:
+        try:
+            resultado = await self.place_order(order.symbol, order.side, tamano) or {}
+        except Exception as e:
+            order.failures += 1
+            order.error = str(e)
+            logger.error(f"[ExecutionEngine] Error en hija de {order.id}: {e}")
+            if order.failures >= self.max_failures:
+                order.transition("failed")
+                await self._notify(order)
+            return
+        order.failures = 0
+        ejecutado = resultado.get("filled")
+        if ejecutado is None:
+            # Clientes que no informan lo ejecutado: se asume la hija completa
+            ejecutado = tamano
+        if ejecutado <= 0:
+            # Una orden de mercado caducada sin ejecución no avanza la padre
+            logger.warning(f"[ExecutionEngine] Hija de {order.id} sin ejecución ({resultado.get('status')})")
+            return
+        precio = resultado.get("average") or resultado.get("price") or order.meta.get("price", 0.0)
+        order.filled += ejecutado
+        order.notional += ejecutado * precio
+        child = {"order": resultado, "amount": ejecutado, "price": precio, "index": len(order.children) + 1}
+        order.children.append(child)
+        await self._notify(order, child)
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+market_stream.py
+Ingesta de datos de mercado por WebSocket (trades y klines) con reconexión automática.
+
+MarketStream mantiene una suscripción persistente por exchange y actualiza el
+estado de cada símbolo con cada mensaje de trade o kline, llamando en cuanto
+llega a los callbacks suscritos a ese símbolo. get_market_stream() comparte una
+sola conexión por exchange entre todos los watchers; con el socket abierto, los
+cambios del conjunto de símbolos se envían como SUBSCRIBE/UNSUBSCRIBE sin
+reconectar. Los watchers siguen sondeando REST sólo mientras el stream no está
+conectado o sus símbolos llevan demasiado tiempo sin mensajes.
+LocalFeedServer es un feed local con el mismo protocolo (estilo Binance) para
+pruebas y simulaciones.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+import aiohttp
+from aiohttp import web
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def stream_symbol(symbol: str) -> str:
+    """BTC/USDT -> btcusdt (nombre de stream de Binance)."""
+    return symbol.replace("/", "").lower()
+
+
+class MarketStream:
+    def __init__(self, url: str, symbols: Optional[List[str]] = None,
+                 on_update: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+                 exchange: str = "binance", kline_interval: str = "1m",
+                 reconnect_base: float = 1.0, reconnect_max: float = 30.0):
+        self.url = url
+        self.exchange = exchange
+        self.kline_interval = kline_interval
+        self.on_update = on_update
+        self.reconnect_base = reconnect_base
+        self.reconnect_max = reconnect_max
+        self._ws = None
+        self.symbols = {}
+        # Callbacks por símbolo; on_update, si se da, recibe todos los símbolos del stream
+        self.subscribers: Dict[str, List[Callable[[str, Dict[str, Any]], Awaitable[None]]]] = {}
+        self._base: List[str] = []
+        self.set_symbols(symbols or [])
+        self.state: Dict[str, Dict[str, Any]] = {}
+        self.latencias = deque(maxlen=1000)
+        self.connected = False
+        self.last_message = 0.0
+        self.reconexiones = 0
+        self._task = None
+        self._stopping = False
+        self._msg_id = 1
+
+    def set_symbols(self, symbols: Iterable[str]) -> None:
+        """Fija los símbolos propios del stream (además de los suscritos por callback)."""
+        self._base = list(symbols)
+        self._sync_symbols()
+
+    def _aplicar_simbolos(self, symbols: Iterable[str]) -> None:
+        """Cambia el conjunto suscrito; con el socket abierto envía sólo la diferencia."""
+        anteriores = set(self.symbols)
+        self.symbols = {stream_symbol(s).upper(): s for s in symbols}
+        if self._ws is None or self._ws.closed:
+            return
+        altas = [n for n in self.symbols if n not in anteriores]
+        bajas = [n for n in anteriores if n not in self.symbols]
+        if altas:
+            asyncio.create_task(self._send("SUBSCRIBE", self._streams(altas)))
+        if bajas:
+            asyncio.create_task(self._send("UNSUBSCRIBE", self._streams(bajas)))
+
+    def subscribe(self, symbols: Iterable[str], callback: Callable[[str, Dict[str, Any]], Awaitable[None]]) -> None:
+        for symbol in symbols:
+            callbacks = self.subscribers.setdefault(symbol, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+        self._sync_symbols()
+
+    def unsubscribe(self, symbols: Iterable[str], callback: Callable[[str, Dict[str, Any]], Awaitable[None]]) -> None:
+        for symbol in symbols:
+            callbacks = self.subscribers.get(symbol, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks:
+                self.subscribers.pop(symbol, None)
+        self._sync_symbols()
+
+    def _sync_symbols(self) -> None:
+        deseados = list(dict.fromkeys(self._base + list(self.subscribers)))
+        if {stream_symbol(s).upper() for s in deseados} != set(self.symbols):
+            self._aplicar_simbolos(deseados)
+
+    async def _send(self, metodo: str, streams: List[str]) -> None:
+        ws = self._ws
+        if ws is None or ws.closed:
+            return
+        self._msg_id += 1
+        try:
+            await ws.send_json({"method": metodo, "params": streams, "id": self._msg_id})
+            logger.info(f"[MarketStream] {metodo} de {len(streams)} streams en {self.exchange}")
+        except Exception as e:
+            # Si el socket cae, la reconexión suscribe el conjunto completo
+            logger.warning(f"[MarketStream] Error enviando {metodo} a {self.exchange}: {e}")
+
+    def _streams(self, nombres: Optional[Iterable[str]] = None) -> List[str]:
+        streams = []
+        for nombre in (self.symbols if nombres is None else nombres):
+            streams.append(f"{nombre.lower()}@trade")
+            streams.append(f"{nombre.lower()}@kline_{self.kline_interval}")
+        return streams
+
+    def is_live(self, max_age: float, symbols: Optional[Iterable[str]] = None) -> bool:
+        """Conectado y con mensajes recientes (de cada símbolo dado); si no, el watcher debe usar REST."""
+        if not self.connected:
+            return False
+        ahora = time.time()
+        if symbols is None:
+            return ahora - self.last_message < max_age
+        return all(ahora - self.state.get(s, {}).get("recibido", 0.0) < max_age for s in symbols)
+
+    async def start(self) -> None:
+        self._stopping = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._ws is not None:
+            await self._ws.close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self.connected = False
+        logger.info(f"[MarketStream] Stream {self.exchange} detenido")
+
+    async def _run(self) -> None:
+        espera = self.reconnect_base
+        async with aiohttp.ClientSession() as session:
+            while not self._stopping:
+                try:
+                    async with session.ws_connect(self.url, heartbeat=30) as ws:
+                        self._ws = ws
+                        await ws.send_json({"method": "SUBSCRIBE", "params": self._streams(), "id": 1})
+                        self.connected = True
+                        espera = self.reconnect_base
+                        logger.info(f"[MarketStream] Conectado a {self.url} ({len(self.symbols)} símbolos)")
+                        async for mensaje in ws:
+                            if mensaje.type == aiohttp.WSMsgType.TEXT:
+                                await self._procesar(mensaje.data)
+                            elif mensaje.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"[MarketStream] Error en stream {self.exchange}: {e}")
+                finally:
+                    self.connected = False
+                    self._ws = None
+                if self._stopping:
+                    break
+                self.reconexiones += 1
+                logger.info(f"[MarketStream] Reconectando en {espera:.1f}s")
+                await asyncio.sleep(espera)
+                espera = min(espera * 2, self.reconnect_max)
+
+    def parse_message(self, raw: str) -> Optional[Dict[str, Any]]:
+        """Normaliza un mensaje de trade o kline; devuelve None para respuestas de control."""
+        datos = json.loads(raw)
+        datos = datos.get("data", datos)
+        symbol = self.symbols.get(str(datos.get("s", "")).upper())
+        if symbol is None:
+            return None
+        if datos.get("e") == "trade":
+            return {"symbol": symbol, "tipo": "trade", "price": float(datos["p"]),
+                    "volume": float(datos["q"]), "timestamp": datos.get("T", datos.get("E"))}
+        if datos.get("e") == "kline":
+            k = datos["k"]
+            return {"symbol": symbol, "tipo": "kline", "price": float(k["c"]), "volume": float(k["v"]),
+                    "timestamp": datos.get("E", k.get("T")),
+                    "kline": {"open_time": k["t"], "open": float(k["o"]), "high": float(k["h"]),
+                              "low": float(k["l"]), "close": float(k["c"]), "volume": float(k["v"]),
+                              "closed": bool(k.get("x"))}}
+        return None
+
+    async def _procesar(self, raw: str) -> None:
+        try:
+            mensaje = self.parse_message(raw)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"[MarketStream] Mensaje inválido ignorado: {e}")
+            return
+        if mensaje is None:
+            return
+        ahora = time.time()
+        self.last_message = ahora
+        symbol = mensaje["symbol"]
+        estado = self.state.setdefault(symbol, {"symbol": symbol, "kline": None})
+        estado["price"] = mensaje["price"]
+        estado["timestamp"] = mensaje["timestamp"]
+        estado["recibido"] = ahora
+        estado["tipo"] = mensaje["tipo"]
+        if mensaje["tipo"] == "kline":
+            estado["kline"] = mensaje["kline"]
+            estado["volume"] = mensaje["volume"]
+        else:
+            estado["last_qty"] = mensaje["volume"]
+        if mensaje["timestamp"]:
+            self.latencias.append(ahora - mensaje["timestamp"] / 1000)
+        callbacks = ([self.on_update] if self.on_update else []) + self.subscribers.get(symbol, [])
+        for callback in callbacks:
+            try:
+                await callback(symbol, estado)
+            except Exception as e:
+                logger.error(f"[MarketStream] Error en callback para {symbol}: {e}")
+
+
+_market_streams: Dict[str, MarketStream] = {}
+
+
+def get_market_stream(exchange: str = "binance", url: str = "wss://stream.binance.com:9443/ws",
+                      kline_interval: str = "1m") -> MarketStream:
+    """Stream compartido del exchange (lo configura el primero que lo pide)."""
+    stream = _market_streams.get(exchange)
+    if stream is None:
+        stream = _market_streams[exchange] = MarketStream(url, exchange=exchange, kline_interval=kline_interval)
+    elif stream.kline_interval != kline_interval:
+        logger.warning(f"[MarketStream] {exchange} ya emite klines de {stream.kline_interval}; se ignora {kline_interval}")
+    return stream
+
+
+async def release_market_stream(exchange: str, symbols: Iterable[str],
+                                callback: Callable[[str, Dict[str, Any]], Awaitable[None]]) -> None:
+    """Retira la suscripción de un watcher; el último en irse cierra la conexión."""
+    stream = _market_streams.get(exchange)
+    if stream is None:
+        return
+    stream.unsubscribe(symbols, callback)
+    if not stream.subscribers and not stream._base:
+        del _market_streams[exchange]
+        await stream.stop()
+
+
+class LocalFeedServer:
+    """Feed WebSocket local con el protocolo de suscripción de Binance, para pruebas."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.clientes: Dict[web.WebSocketResponse, set] = {}
+        self._runner = None
+        self.url = None
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get("/ws", self._handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://{self.host}:{self.port}/ws"
+        logger.info(f"[LocalFeedServer] Escuchando en {self.url}")
+        return self.url
+
+    async def stop(self) -> None:
+        await self.drop_clients()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def drop_clients(self) -> None:
+        """Cierra todas las conexiones (para probar la reconexión)."""
+        for ws in list(self.clientes):
+            await ws.close()
+        self.clientes.clear()
+
+    async def _handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.clientes[ws] = set()
+        try:
+            async for mensaje in ws:
+                if mensaje.type == aiohttp.WSMsgType.TEXT:
+                    datos = json.loads(mensaje.data)
+                    if datos.get("method") == "SUBSCRIBE":
+                        self.clientes.get(ws, set()).update(datos.get("params", []))
+                        await ws.send_json({"result": None, "id": datos.get("id")})
+                    elif datos.get("method") == "UNSUBSCRIBE":
+                        self.clientes.get(ws, set()).difference_update(datos.get("params", []))
+                        await ws.send_json({"result": None, "id": datos.get("id")})
+        finally:
+            self.clientes.pop(ws, None)
+        return ws
+
+    async def wait_for_subscribers(self, stream: str, timeout: float = 5.0) -> None:
+        limite = time.time() + timeout
+        while not any(stream in s for s in self.clientes.values()):
+            if time.time() > limite:
+                raise TimeoutError(f"[LocalFeedServer] Sin suscriptores para {stream}")
+            await asyncio.sleep(0.01)
+
+    async def _broadcast(self, stream: str, datos: Dict[str, Any]) -> None:
+        for ws, streams in list(self.clientes.items()):
+            if stream in streams and not ws.closed:
+                await ws.send_str(json.dumps(datos))
+
+    async def publish_trade(self, symbol: str, price: float, qty: float = 1.0) -> None:
+        ahora = int(time.time() * 1000)
+        nombre = stream_symbol(symbol)
+        await self._broadcast(f"{nombre}@trade", {
+            "e": "trade", "E": ahora, "s": nombre.upper(), "p": str(price), "q": str(qty), "T": ahora
+        })
+
+    async def publish_kline(self, symbol: str, open_: float, high: float, low: float, close: float,
+                            volume: float = 1.0, closed: bool = True, interval: str = "1m") -> None:
+        ahora = int(time.time() * 1000)
+        nombre = stream_symbol(symbol)
+        await self._broadcast(f"{nombre}@kline_{interval}", {
+            "e": "kline", "E": ahora, "s": nombre.upper(),
+            "k": {"t": ahora - 60000, "T": ahora, "i": interval, "o": str(open_), "h": str(high),
+                  "l": str(low), "c": str(close), "v": str(volume), "x": closed}
+        })
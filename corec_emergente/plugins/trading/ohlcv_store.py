@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ohlcv_store.py
+Almacén local de velas OHLCV en columnas, append-only y mapeable en memoria.
+
+Cada (exchange, símbolo, timeframe) es un directorio con un fichero binario por
+columna (timestamp int64 y open/high/low/close/volume float64). Sólo se añaden
+velas cerradas y posteriores a la última guardada, así que los datos ya escritos
+no cambian nunca y las lecturas devuelven vistas np.memmap sin copia. Un fichero
+.lock con fcntl serializa las escrituras entre procesos. top_up pide al exchange
+sólo la cola que falta.
+"""
+
+import fcntl
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COLUMNAS = (("timestamp", np.int64), ("open", np.float64), ("high", np.float64),
+            ("low", np.float64), ("close", np.float64), ("volume", np.float64))
+
+UNIDADES_MS = {"s": 1000, "m": 60000, "h": 3600000, "d": 86400000, "w": 604800000, "M": 2592000000}
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """'1m', '4h', '1d'... en milisegundos."""
+    try:
+        return int(timeframe[:-1]) * UNIDADES_MS[timeframe[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"[OHLCVStore] Timeframe no soportado: {timeframe}")
+
+
+class OHLCVStore:
+    def __init__(self, root: str = "data/ohlcv", page_limit: int = 1000):
+        self.root = root
+        self.page_limit = page_limit
+
+    def _dir(self, exchange: str, symbol: str, timeframe: str) -> str:
+        nombre = symbol.replace("/", "-").replace(":", "_")
+        return os.path.join(self.root, exchange, nombre, timeframe)
+
+    def _path(self, directorio: str, columna: str) -> str:
+        return os.path.join(directorio, f"{columna}.bin")
+
+    @contextmanager
+    def _lock(self, directorio: str, exclusivo: bool):
+        os.makedirs(directorio, exist_ok=True)
+        with open(os.path.join(directorio, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusivo else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _filas(self, directorio: str) -> int:
+        # Tras una escritura interrumpida las columnas pueden diferir; vale la más corta
+        filas = []
+        for columna, dtype in COLUMNAS:
+            path = self._path(directorio, columna)
+            filas.append(os.path.getsize(path) // np.dtype(dtype).itemsize if os.path.exists(path) else 0)
+        return min(filas)
+
+    def count(self, exchange: str, symbol: str, timeframe: str) -> int:
+        directorio = self._dir(exchange, symbol, timeframe)
+        with self._lock(directorio, exclusivo=False):
+            return self._filas(directorio)
+
+    def last_timestamp(self, exchange: str, symbol: str, timeframe: str) -> Optional[int]:
+        timestamps = self.read(exchange, symbol, timeframe)["timestamp"]
+        return int(timestamps[-1]) if len(timestamps) else None
+
+    def first_timestamp(self, exchange: str, symbol: str, timeframe: str) -> Optional[int]:
+        timestamps = self.read(exchange, symbol, timeframe)["timestamp"]
+        return int(timestamps[0]) if len(timestamps) else None
+
+    def append(self, exchange: str, symbol: str, timeframe: str, ohlcv: Sequence[Sequence[float]],
+               now_ms: Optional[int] = None) -> int:
+        """Añade velas ccxt [ts, o, h, l, c, v] cerradas y posteriores a la última guardada."""
+        paso = timeframe_ms(timeframe)
+        ahora = int(time.time() * 1000) if now_ms is None else now_ms
+        directorio = self._dir(exchange, symbol, timeframe)
+        with self._lock(directorio, exclusivo=True):
+            filas = self._filas(directorio)
+            ultimo = None
+            if filas:
+                ultimo = int(np.fromfile(self._path(directorio, "timestamp"), dtype=np.int64,
+                                         count=1, offset=(filas - 1) * 8)[0])
+            velas = []
+            for vela in sorted(ohlcv, key=lambda v: v[0]):
+                ts = int(vela[0])
+                if ts + paso > ahora or (ultimo is not None and ts <= ultimo):
+                    continue
+                velas.append(vela)
+                ultimo = ts
+            if not velas:
+                return 0
+            matriz = np.asarray([v[:6] for v in velas], dtype=np.float64)
+            for i, (columna, dtype) in enumerate(COLUMNAS):
+                path = self._path(directorio, columna)
+                with open(path, "ab") as f:
+                    f.truncate(filas * np.dtype(dtype).itemsize)
+                    f.write(matriz[:, i].astype(dtype).tobytes())
+            logger.debug("[OHLCVStore] %d velas añadidas a %s", len(velas), directorio)
+            return len(velas)
+
+    def read(self, exchange: str, symbol: str, timeframe: str, since: Optional[int] = None,
+             until: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Vistas memmap (sin copia) de las columnas con timestamp en [since, until]."""
+        directorio = self._dir(exchange, symbol, timeframe)
+        with self._lock(directorio, exclusivo=False):
+            filas = self._filas(directorio)
+        if not filas:
+            return {columna: np.empty(0, dtype=dtype) for columna, dtype in COLUMNAS}
+        columnas = {
+            columna: np.memmap(self._path(directorio, columna), dtype=dtype, mode="r", shape=(filas,))
+            for columna, dtype in COLUMNAS
+        }
+        timestamps = columnas["timestamp"]
+        inicio = int(np.searchsorted(timestamps, since, side="left")) if since is not None else 0
+        fin = int(np.searchsorted(timestamps, until, side="right")) if until is not None else filas
+        return {columna: valores[inicio:fin] for columna, valores in columnas.items()}
+
+    def rows(self, exchange: str, symbol: str, timeframe: str, since: Optional[int] = None,
+             until: Optional[int] = None) -> List[List[float]]:
+        """Velas en formato ccxt [ts, o, h, l, c, v]."""
+        columnas = self.read(exchange, symbol, timeframe, since, until)
+        return [[int(ts), o, h, l, c, v] for ts, o, h, l, c, v in zip(
+            *(columnas[columna].tolist() for columna, _ in COLUMNAS))]
+
+    def dataframe(self, exchange: str, symbol: str, timeframe: str, since: Optional[int] = None,
+                  until: Optional[int] = None) -> pd.DataFrame:
+        columnas = self.read(exchange, symbol, timeframe, since, until)
+        data = pd.DataFrame({columna: np.asarray(valores) for columna, valores in columnas.items()})
+        data['timestamp'] = pd.to_datetime(data['timestamp'], unit='ms')
+        return data
+
+    def _inicio(self, exchange: str, symbol: str, timeframe: str) -> Optional[int]:
+        # Primer timestamp pedido al crear el almacén (el exchange puede no tener velas tan antiguas)
+        path = os.path.join(self._dir(exchange, symbol, timeframe), "inicio")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return int(f.read().strip())
+
+    def _guardar_inicio(self, exchange: str, symbol: str, timeframe: str, since: int) -> None:
+        directorio = self._dir(exchange, symbol, timeframe)
+        with self._lock(directorio, exclusivo=True):
+            with open(os.path.join(directorio, "inicio"), "w") as f:
+                f.write(str(int(since)))
+
+    def clear(self, exchange: str, symbol: str, timeframe: str) -> None:
+        directorio = self._dir(exchange, symbol, timeframe)
+        with self._lock(directorio, exclusivo=True):
+            for columna, _ in COLUMNAS:
+                path = self._path(directorio, columna)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    async def top_up(self, client, exchange: str, symbol: str, timeframe: str, since: Optional[int] = None,
+                     until: Optional[int] = None, now_ms: Optional[int] = None) -> int:
+        """Descarga sólo las velas cerradas que faltan hasta `until` (o hasta ahora). Devuelve las añadidas.
+
+        Si `since` es anterior al inicio con el que se creó el almacén, éste se
+        reconstruye desde `since`, porque sólo admite añadir por el final.
+        """
+        paso = timeframe_ms(timeframe)
+        ahora = int(time.time() * 1000) if now_ms is None else now_ms
+        # Apertura de la última vela que interesa: la que contiene `until` o la última ya cerrada
+        objetivo = (ahora // paso) * paso - paso
+        if until is not None:
+            objetivo = min(objetivo, (until // paso) * paso)
+        inicio = self._inicio(exchange, symbol, timeframe)
+        if since is not None and (inicio is None or since < inicio):
+            if inicio is not None:
+                logger.info(f"[OHLCVStore] Reconstruyendo {exchange} {symbol} {timeframe} desde {since}")
+            self.clear(exchange, symbol, timeframe)
+            self._guardar_inicio(exchange, symbol, timeframe, since)
+        ultimo = self.last_timestamp(exchange, symbol, timeframe)
+        if ultimo is not None and ultimo >= objetivo:
+            return 0
+        cursor = ultimo + 1 if ultimo is not None else since
+        total = 0
+        while True:
+            ohlcv = await client.fetch_ohlcv(symbol, timeframe, since=cursor, limit=self.page_limit)
+            if not ohlcv:
+                break
+            total += self.append(exchange, symbol, timeframe, ohlcv, now_ms=ahora)
+            ultimo_pagina = int(ohlcv[-1][0])
+            if ultimo_pagina >= objetivo or (cursor is not None and ultimo_pagina < cursor):
+                break
+            cursor = ultimo_pagina + 1
+        logger.info(f"[OHLCVStore] {symbol} {timeframe} en {exchange}: {total} velas nuevas descargadas")
+        return total
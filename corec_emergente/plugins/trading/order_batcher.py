@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+order_batcher.py
+Agrupa las órdenes de mercado que se envían en el mismo ciclo del bucle de eventos.
+
+Cuando varias órdenes padre lanzan su hija a la vez (p. ej. todas las
+oportunidades de un tick), las peticiones se acumulan hasta que el bucle cede y
+salen juntas: por create_orders si el exchange tiene endpoint de órdenes por
+lotes, o en paralelo si no. Cada llamador recibe su propia orden o su propio
+error, así que un lote de 20 señales cuesta una ronda de latencia y no 20.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class OrderBatcher:
+    def __init__(self, client=None, max_batch: int = 20):
+        self.client = client
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self.batches = 0
+
+    async def create_market_order(self, symbol: str, side: str, amount: float,
+                                  params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        futuro = asyncio.get_running_loop().create_future()
+        self._pending.append(({"symbol": symbol, "type": "market", "side": side, "amount": amount,
+                               "params": params or {}}, futuro))
+        if self._flush_task is None or self._flush_task.done():
+            lanzar = getattr(reloj_actual(), "lanzar", asyncio.create_task)
+            self._flush_task = lanzar(self._flush())
+        return await futuro
+
+    async def _flush(self) -> None:
+        # Un ciclo del bucle para que el resto de órdenes del mismo tick se sumen al lote
+        await asyncio.sleep(0)
+        pendientes, self._pending = self._pending, []
+        # Lo que llegue a partir de aquí (p. ej. la siguiente hija de un padre ya atendido) abre otro lote
+        self._flush_task = None
+        lotes = [pendientes[i:i + self.max_batch] for i in range(0, len(pendientes), self.max_batch)]
+        await asyncio.gather(*(self._send(lote) for lote in lotes))
+
+    async def _send(self, lote: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        self.batches += 1
+        if len(lote) > 1 and (getattr(self.client, "has", None) or {}).get("createOrders"):
+            try:
+                resultados = await self.client.create_orders([orden for orden, _ in lote])
+            except Exception as e:
+                resultados = [e] * len(lote)
+        else:
+            resultados = await asyncio.gather(
+                *(self.client.create_market_order(o["symbol"], o["side"], o["amount"], params=o["params"])
+                  for o, _ in lote),
+                return_exceptions=True
+            )
+        resultados = list(resultados)
+        resultados += [RuntimeError("[OrderBatcher] El exchange no devolvió la orden")] * (len(lote) - len(resultados))
+        for (_, futuro), resultado in zip(lote, resultados):
+            if futuro.done():
+                continue
+            if isinstance(resultado, dict) and resultado.get("status") == "rejected":
+                # En los endpoints por lotes una orden rechazada no hace fallar al resto
+                futuro.set_exception(RuntimeError(f"[OrderBatcher] Orden rechazada: {resultado.get('info')}"))
+            elif isinstance(resultado, BaseException):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+        logger.debug(f"[OrderBatcher] Lote de {len(lote)} órdenes enviado")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+order_router.py
+Enrutado inteligente de órdenes entre los exchanges configurados.
+
+El router guarda por venue (exchange) el último libro de órdenes de cada
+símbolo y lo refresca en paralelo cuando caduca. Para repartir una orden junta
+los niveles de todos los venues disponibles, los ordena por precio efectivo
+(precio más comisión) y toma los más baratos hasta cubrir la cantidad: cada
+venue recibe lo que aporta al coste mínimo esperado. Las hijas salen en
+paralelo; lo que falla o no se ejecuta se vuelve a repartir entre el resto.
+Cada venue tiene su propio circuit breaker, de modo que un exchange caído deja
+de recibir órdenes sin detener a los demás, y la puntuación de salud del venue
+(latencia y errores recientes) encarece su precio efectivo: con libros
+parecidos gana el exchange que responde más rápido.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import numpy as np
+from clock import reloj_actual
+from .venue_health import CircuitBreaker, get_venue_health
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-12
+
+
+class Venue:
+    def __init__(self, name: str, client, modo: str = "spot", fee: float = 0.001,
+                 breaker: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.client = client
+        self.modo = modo
+        self.fee = fee
+        self.breaker = CircuitBreaker(**(breaker or {}))
+        self.books: Dict[str, Dict[str, Any]] = {}
+        self.updated: Dict[str, float] = {}
+
+    def quote(self, symbol: str) -> Dict[str, Optional[float]]:
+        libro = self.books.get(symbol) or {}
+        bids, asks = libro.get("bids") or [], libro.get("asks") or []
+        return {"bid": bids[0][0] if bids else None, "ask": asks[0][0] if asks else None,
+                "bid_depth": float(sum(n[1] for n in bids)), "ask_depth": float(sum(n[1] for n in asks))}
+
+
+class OrderRouter:
+    """Reparte órdenes de mercado entre venues por coste esperado de ejecución.
+
+    on_event(tipo, venue) se llama (si se indica) cuando el breaker de un venue
+    se activa ("circuit_breaker_tripped"), deja pasar peticiones de prueba
+    ("circuit_breaker_half_open") o se rearma ("circuit_breaker_reset").
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, on_event: Optional[Callable[[str, Venue], Awaitable[None]]] = None,
+                 config: Optional[Dict[str, Any]] = None, health=None):
+        config = config or {}
+        self.on_event = on_event
+        self.health = health or get_venue_health()
+        # Sobrecoste relativo que se suma al precio de un venue con puntuación 0
+        self.health_penalty = config.get("health_penalty", 0.001)
+        self.depth_limit = config.get("depth_limit", 20)
+        self.book_ttl = config.get("book_ttl", 2.0)
+        self.max_rounds = config.get("max_rounds", 2)
+        self.min_allocation = config.get("min_allocation", 0.0)
+        self.venues: Dict[str, Venue] = {}
+
+    def add_venue(self, name: str, client, modo: str = "spot", fee: Optional[float] = None,
+                  breaker: Optional[Dict[str, Any]] = None) -> Venue:
+        venue = Venue(name, client, modo, 0.001 if fee is None else fee, breaker)
+        self.venues[name] = venue
+        logger.info(f"[OrderRouter] Venue {name} ({modo}) registrado")
+        return venue
+
+    def remove_venue(self, name: str) -> None:
+        self.venues.pop(name, None)
+
+    def update_book(self, name: str, symbol: str, book: Dict[str, Any], now: Optional[float] = None) -> None:
+        """Incorpora un libro recibido por otra vía (stream o sondeo ajeno)."""
+        venue = self.venues[name]
+        venue.books[symbol] = book
+        venue.updated[symbol] = reloj_actual().time() if now is None else now
+
+    async def _available(self, exclude: Optional[set] = None) -> List[Venue]:
+        disponibles = []
+        for venue in self.venues.values():
+            if exclude and venue.name in exclude:
+                continue
+            estado = venue.breaker.state
+            if venue.breaker.allow():
+                if estado == "open":
+                    logger.info(f"[OrderRouter] Circuit breaker semiabierto para {venue.name} ({venue.modo}): peticiones de prueba")
+                    await self._emit("circuit_breaker_half_open", venue)
+                disponibles.append(venue)
+        return disponibles
+
+    async def _emit(self, tipo: str, venue: Venue) -> None:
+        if self.on_event is None:
+            return
+        try:
+            await self.on_event(tipo, venue)
+        except Exception as e:
+            logger.error(f"[OrderRouter] Error notificando {tipo} de {venue.name}: {e}")
+
+    async def _failure(self, venue: Venue, error: Exception) -> None:
+        logger.error(f"[OrderRouter] Fallo en {venue.name}: {error}")
+        if venue.breaker.record_failure():
+            logger.error(f"[OrderRouter] Circuit breaker activado para {venue.name} ({venue.modo})")
+            await self._emit("circuit_breaker_tripped", venue)
+
+    async def _success(self, venue: Venue, latency: float) -> None:
+        estado = venue.breaker.state
+        if venue.breaker.record_success(latency):
+            logger.info(f"[OrderRouter] Circuit breaker reseteado para {venue.name} ({venue.modo})")
+            await self._emit("circuit_breaker_reset", venue)
+        elif venue.breaker.state == "open" and estado != "open":
+            logger.error(f"[OrderRouter] Circuit breaker activado para {venue.name} ({venue.modo}) por respuestas lentas")
+            await self._emit("circuit_breaker_tripped", venue)
+
+    async def refresh(self, symbol: str, venues: Optional[List[Venue]] = None, force: bool = False) -> None:
+        """Refresca en paralelo los libros caducados del símbolo."""
+        ahora = reloj_actual().time()
+        venues = venues if venues is not None else await self._available()
+        caducados = [v for v in venues if force or ahora - v.updated.get(symbol, float("-inf")) > self.book_ttl]
+        resultados = await asyncio.gather(*(self._fetch_book(v, symbol) for v in caducados))
+        for venue, (libro, latencia) in zip(caducados, resultados):
+            if isinstance(libro, Exception):
+                # Un libro viejo no sirve para repartir
+                venue.books.pop(symbol, None)
+                await self._failure(venue, libro)
+            else:
+                self.update_book(venue.name, symbol, libro, ahora)
+                # En semiabierto el libro hace de petición de prueba antes de arriesgar una orden
+                await self._success(venue, latencia)
+
+    async def _fetch_book(self, venue: Venue, symbol: str):
+        inicio = reloj_actual().time()
+        try:
+            libro = await venue.client.fetch_order_book(symbol, self.depth_limit)
+        except Exception as e:
+            return e, None
+        return libro, reloj_actual().time() - inicio
+
+    def quotes(self, symbol: str) -> Dict[str, Dict[str, Optional[float]]]:
+        return {nombre: venue.quote(symbol) for nombre, venue in self.venues.items() if symbol in venue.books}
+
+    def plan(self, symbol: str, side: str, amount: float, venues: Optional[List[Venue]] = None) -> Dict[str, Dict[str, float]]:
+        """Reparto de coste mínimo: {venue: {"amount", "expected_price"}} según los libros guardados."""
+        venues = [v for v in (venues if venues is not None else self.venues.values()) if symbol in v.books]
+        lado = "asks" if side == "buy" else "bids"
+        precios, cantidades, indices, efectivos = [], [], [], []
+        for i, venue in enumerate(venues):
+            # Algunos exchanges añaden un tercer campo (número de órdenes) a cada nivel
+            niveles = np.array([n[:2] for n in venue.books[symbol].get(lado) or []], dtype=float).reshape(-1, 2)
+            precios.append(niveles[:, 0])
+            cantidades.append(niveles[:, 1])
+            indices.append(np.full(len(niveles), i))
+            # Para vender se ordena por el precio neto más alto; un venue poco sano se encarece
+            coste = venue.fee + self.health_penalty * (1 - self.health.score(venue.name))
+            efectivos.append(niveles[:, 0] * (1 + coste) if side == "buy" else -niveles[:, 0] * (1 - coste))
+        if not venues or not sum(len(p) for p in precios):
+            return {}
+        orden = np.argsort(np.concatenate(efectivos), kind="stable")
+        precios = np.concatenate(precios)[orden]
+        cantidades = np.concatenate(cantidades)[orden]
+        indices = np.concatenate(indices)[orden]
+        previas = np.cumsum(cantidades) - cantidades
+        tomado = np.clip(amount - previas, 0.0, cantidades)
+        por_venue = np.bincount(indices, weights=tomado, minlength=len(venues))
+        coste = np.bincount(indices, weights=tomado * precios, minlength=len(venues))
+        # Lo que no cabe en la profundidad conocida va al venue con mejor precio
+        sobrante = amount - por_venue.sum()
+        if sobrante > EPSILON:
+            por_venue[indices[0]] += sobrante
+            coste[indices[0]] += sobrante * precios[indices == indices[0]][-1]
+        if self.min_allocation:
+            pequenos = (por_venue > 0) & (por_venue < self.min_allocation)
+            if pequenos.any() and not pequenos.all():
+                mayor = int(np.argmax(por_venue))
+                por_venue[mayor] += por_venue[pequenos].sum()
+                coste[mayor] += coste[pequenos].sum()
+                por_venue[pequenos] = 0.0
+                coste[pequenos] = 0.0
+        return {venues[i].name: {"amount": float(por_venue[i]), "expected_price": float(coste[i] / por_venue[i])}
+                for i in np.flatnonzero(por_venue > EPSILON)}
+
+    async def _send(self, venue: Venue, symbol: str, side: str, amount: float) -> Optional[Dict[str, Any]]:
+        inicio = reloj_actual().time()
+        try:
+            resultado = await venue.client.create_market_order(symbol, side, amount) or {}
+        except Exception as e:
+            await self._failure(venue, e)
+            return None
+        await self._success(venue, reloj_actual().time() - inicio)
+        # El libro guardado ya no refleja la liquidez consumida
+        venue.updated.pop(symbol, None)
+        return resultado
+
+    async def execute(self, symbol: str, side: str, amount: float) -> Dict[str, Any]:
+        """Ejecuta una orden de mercado repartida; devuelve una orden agregada al estilo ccxt."""
+        hijas: List[Dict[str, Any]] = []
+        ejecutado, nocional = 0.0, 0.0
+        excluidos: set = set()
+        for _ in range(self.max_rounds):
+            restante = amount - ejecutado
+            if restante <= EPSILON:
+                break
+            venues = await self._available(excluidos)
+            await self.refresh(symbol, venues)
+            reparto = self.plan(symbol, side, restante, venues)
+            if not reparto:
+                break
+            nombres = list(reparto)
+            resultados = await asyncio.gather(*(self._send(self.venues[n], symbol, side, reparto[n]["amount"])
+                                                for n in nombres))
+            for nombre, resultado in zip(nombres, resultados):
+                if resultado is None:
+                    excluidos.add(nombre)
+                    continue
+                cantidad = resultado.get("filled")
+                cantidad = reparto[nombre]["amount"] if cantidad is None else cantidad
+                precio = resultado.get("average") or resultado.get("price") or reparto[nombre]["expected_price"]
+                ejecutado += cantidad
+                nocional += cantidad * precio
+                hijas.append({"venue": nombre, "order": resultado, "amount": cantidad, "price": precio,
+                              "expected_price": reparto[nombre]["expected_price"]})
+                if cantidad < reparto[nombre]["amount"] - EPSILON:
+                    # Venue sin liquidez: el resto se reparte entre los demás
+                    excluidos.add(nombre)
+        if not hijas:
+            raise RuntimeError(f"[OrderRouter] Sin venues disponibles para {side} {amount} {symbol}")
+        venues_ejecutados: Dict[str, float] = {}
+        for hija in hijas:
+            venues_ejecutados[hija["venue"]] = venues_ejecutados.get(hija["venue"], 0.0) + hija["amount"]
+        logger.info(f"[OrderRouter] {side} {ejecutado}/{amount} {symbol} repartido en {venues_ejecutados}")
+        return {"id": f"route-{next(self._ids)}", "symbol": symbol, "side": side, "type": "market",
+                "amount": amount, "filled": ejecutado, "remaining": max(amount - ejecutado, 0.0),
+                "average": nocional / ejecutado if ejecutado else None,
+                "status": "closed" if amount - ejecutado <= EPSILON else "expired",
+                "venues": venues_ejecutados, "children": hijas}
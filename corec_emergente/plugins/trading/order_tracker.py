@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+order_tracker.py
+Registro del estado de las órdenes enviadas, indexado por client id, id del exchange y símbolo.
+
+Cada actualización (la respuesta de create_order, un mensaje de un stream de
+usuario o una consulta de reconciliación) pasa por apply(), que calcula lo
+ejecutado desde la última vez, emite eventos de ejecución parcial, total o
+cancelación y mantiene de forma incremental la exposición por símbolo: nocional
+pendiente de las órdenes abiertas y posición ejecutada. Así el capital pool y
+el cierre diario consultan la exposición en O(1). La reconciliación consulta
+fetch_open_orders una vez por símbolo con órdenes abiertas, en paralelo, y sólo
+pide fetch_order para las que ya no aparecen abiertas.
+"""
+
+import asyncio
+import itertools
+import logging
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ESTADOS_ABIERTOS = {"new", "open"}
+ESTADOS_CANCELADOS = {"canceled", "cancelled", "expired", "rejected"}
+EPSILON = 1e-12
+
+
+class TrackedOrder:
+    __slots__ = ("client_id", "exchange_id", "venue", "symbol", "side", "amount", "price", "filled", "average",
+                 "status", "parent_id", "updated")
+
+    def __init__(self, client_id: str, symbol: str, side: str, amount: float, price: Optional[float] = None,
+                 parent_id: Optional[str] = None, venue: Optional[str] = None):
+        self.client_id = client_id
+        self.venue = venue
+        self.exchange_id: Optional[str] = None
+        self.symbol = symbol
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.filled = 0.0
+        self.average: Optional[float] = None
+        self.status = "new"
+        self.parent_id = parent_id
+        self.updated = reloj_actual().time()
+
+    @property
+    def remaining(self) -> float:
+        return max(self.amount - self.filled, 0.0)
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in ESTADOS_ABIERTOS
+
+    def open_notional(self) -> float:
+        if not self.is_open:
+            return 0.0
+        return self.remaining * (self.price or self.average or 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class OrderTracker:
+    """Estado de órdenes con índices y exposición incremental.
+
+    Los suscriptores reciben callback(tipo, orden) con tipo "partial", "fill" o "cancel".
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.listeners: List[Callable[[str, TrackedOrder], Awaitable[None]]] = []
+        self.reconcile_interval = config.get("reconcile_interval", 30)
+        self.history = config.get("history", 1000)
+        self.prefix = config.get("prefix", "corec")
+        self.orders: Dict[str, TrackedOrder] = {}
+        # Los ids del exchange sólo son únicos dentro de cada venue
+        self.by_exchange_id: Dict[tuple, str] = {}
+        self.open_by_symbol: Dict[str, Set[str]] = {}
+        self.open_notional: Dict[str, float] = {}
+        self.position: Dict[str, float] = {}
+        self.total_open_notional = 0.0
+        self._closed: deque = deque()
+        self._session = uuid.uuid4().hex[:6]
+        self._ids = itertools.count(1)
+        self._tasks: Dict[Optional[str], asyncio.Task] = {}
+
+    def subscribe(self, callback: Callable[[str, TrackedOrder], Awaitable[None]]) -> None:
+        self.listeners.append(callback)
+
+    def unsubscribe(self, callback: Callable[[str, TrackedOrder], Awaitable[None]]) -> None:
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def new_client_id(self) -> str:
+        return f"{self.prefix}-{self._session}-{next(self._ids)}"
+
+    def track(self, client_id: str, symbol: str, side: str, amount: float, price: Optional[float] = None,
+              parent_id: Optional[str] = None, venue: Optional[str] = None) -> TrackedOrder:
+        orden = TrackedOrder(client_id, symbol, side, amount, price, parent_id, venue)
+        self.orders[client_id] = orden
+        self._add_open(orden)
+        return orden
+
+    def get(self, client_id: Optional[str] = None, exchange_id: Optional[str] = None,
+            venue: Optional[str] = None) -> Optional[TrackedOrder]:
+        orden = self.orders.get(client_id) if client_id is not None else None
+        if orden is None and exchange_id is not None:
+            orden = self.orders.get(self.by_exchange_id.get((venue, str(exchange_id))))
+        return orden
+
+    def _add_open(self, orden: TrackedOrder) -> None:
+        if not orden.is_open:
+            return
+        self.open_by_symbol.setdefault(orden.symbol, set()).add(orden.client_id)
+        nocional = orden.open_notional()
+        self.open_notional[orden.symbol] = self.open_notional.get(orden.symbol, 0.0) + nocional
+        self.total_open_notional += nocional
+
+    def _remove_open(self, orden: TrackedOrder) -> None:
+        if not orden.is_open:
+            return
+        abiertas = self.open_by_symbol.get(orden.symbol)
+        if abiertas is not None:
+            abiertas.discard(orden.client_id)
+            if not abiertas:
+                del self.open_by_symbol[orden.symbol]
+        nocional = orden.open_notional()
+        self.open_notional[orden.symbol] = self.open_notional.get(orden.symbol, 0.0) - nocional
+        self.total_open_notional -= nocional
+
+    async def apply(self, update: Dict[str, Any], client_id: Optional[str] = None,
+                    venue: Optional[str] = None) -> Optional[TrackedOrder]:
+        """Incorpora una orden en formato ccxt (respuesta, stream o consulta)."""
+        orden = self.get(client_id or update.get("clientOrderId"), update.get("id"), venue)
+        if orden is None:
+            return None
+        if update.get("id") is not None and orden.exchange_id is None:
+            orden.exchange_id = str(update["id"])
+            self.by_exchange_id[(orden.venue, orden.exchange_id)] = orden.client_id
+        estado = update.get("status") or orden.status
+        ejecutado = update.get("filled")
+        ejecutado = orden.filled if ejecutado is None else max(float(ejecutado), orden.filled)
+        delta = ejecutado - orden.filled
+        if delta <= EPSILON and estado == orden.status:
+            return orden
+        self._remove_open(orden)
+        orden.filled = ejecutado
+        orden.status = estado
+        orden.average = update.get("average") or orden.average
+        orden.price = update.get("price") or orden.price
+        orden.updated = reloj_actual().time()
+        if delta > EPSILON:
+            self.position[orden.symbol] = self.position.get(orden.symbol, 0.0) + (delta if orden.side == "buy" else -delta)
+        self._add_open(orden)
+        if estado == "closed":
+            await self._emit("fill", orden)
+        elif estado in ESTADOS_CANCELADOS:
+            await self._emit("cancel", orden)
+        elif delta > EPSILON:
+            await self._emit("partial", orden)
+        if not orden.is_open:
+            self._retire(orden)
+        return orden
+
+    def _retire(self, orden: TrackedOrder) -> None:
+        # Las órdenes terminadas se conservan acotadas para consultas recientes
+        self._closed.append(orden.client_id)
+        while len(self._closed) > self.history:
+            viejo = self.orders.pop(self._closed.popleft(), None)
+            if viejo is not None and viejo.exchange_id is not None:
+                self.by_exchange_id.pop((viejo.venue, viejo.exchange_id), None)
+
+    async def _emit(self, tipo: str, orden: TrackedOrder) -> None:
+        for callback in self.listeners:
+            try:
+                await callback(tipo, orden)
+            except Exception as e:
+                logger.error(f"[OrderTracker] Error notificando {tipo} de {orden.client_id}: {e}")
+
+    def open_orders(self, symbol: Optional[str] = None, venue: Optional[str] = None) -> List[TrackedOrder]:
+        simbolos = [symbol] if symbol is not None else list(self.open_by_symbol)
+        return [self.orders[c] for s in simbolos for c in self.open_by_symbol.get(s, ())
+                if venue is None or self.orders[c].venue == venue]
+
+    def exposure(self, symbol: str) -> Dict[str, float]:
+        return {"open_notional": self.open_notional.get(symbol, 0.0), "position": self.position.get(symbol, 0.0),
+                "open_orders": len(self.open_by_symbol.get(symbol, ()))}
+
+    def open_count(self) -> int:
+        return sum(len(abiertas) for abiertas in self.open_by_symbol.values())
+
+    def total_exposure(self) -> float:
+        """Nocional comprometido en órdenes abiertas de todos los símbolos."""
+        return self.total_open_notional
+
+    async def reconcile(self, client, venue: Optional[str] = None) -> int:
+        """Consulta por lotes el estado de las órdenes abiertas del venue; devuelve cuántas cambiaron."""
+        simbolos = sorted({o.symbol for o in self.open_orders(venue=venue)})
+        if not simbolos:
+            return 0
+        respuestas = await asyncio.gather(*(client.fetch_open_orders(s) for s in simbolos), return_exceptions=True)
+        cambios = 0
+        desaparecidas = []
+        for symbol, respuesta in zip(simbolos, respuestas):
+            if isinstance(respuesta, Exception):
+                logger.warning(f"[OrderTracker] No se pudieron reconciliar las órdenes de {symbol}: {respuesta}")
+                continue
+            vistas = set()
+            for update in respuesta:
+                orden = self.get(update.get("clientOrderId"), update.get("id"), venue)
+                if orden is None:
+                    continue
+                vistas.add(orden.client_id)
+                antes = (orden.filled, orden.status)
+                await self.apply(update, orden.client_id)
+                cambios += (orden.filled, orden.status) != antes
+            desaparecidas.extend(o for o in self.open_orders(symbol, venue)
+                                 if o.client_id not in vistas and o.exchange_id is not None)
+        # Las que ya no están abiertas en el exchange se consultan una a una para conocer su estado final
+        finales = await asyncio.gather(*(client.fetch_order(o.exchange_id, o.symbol) for o in desaparecidas),
+                                       return_exceptions=True)
+        for orden, update in zip(desaparecidas, finales):
+            if isinstance(update, Exception):
+                logger.warning(f"[OrderTracker] Estado de {orden.client_id} no disponible: {update}")
+                continue
+            await self.apply(update, orden.client_id)
+            cambios += 1
+        return cambios
+
+    async def _loop(self, client, venue: Optional[str]) -> None:
+        reloj = reloj_actual()
+        while True:
+            await reloj.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile(client, venue)
+            except Exception as e:
+                logger.error(f"[OrderTracker] Error en reconciliación de {venue}: {e}")
+
+    def start(self, client, venue: Optional[str] = None) -> None:
+        """Reconciliación periódica de las órdenes del venue con su cliente."""
+        tarea = self._tasks.get(venue)
+        if tarea is None or tarea.done():
+            lanzar = getattr(reloj_actual(), "lanzar", asyncio.create_task)
+            self._tasks[venue] = lanzar(self._loop(client, venue))
+
+    async def stop(self, venue: Optional[str] = None) -> None:
+        tarea = self._tasks.pop(venue, None)
+        if tarea is not None:
+            tarea.cancel()
+            await asyncio.gather(tarea, return_exceptions=True)
+
+
+_tracker: Optional[OrderTracker] = None
+
+
+def get_order_tracker() -> OrderTracker:
+    """Registro compartido: el ExchangeManager lo alimenta y el capital pool y el cierre lo consultan."""
+    global _tracker
+    if _tracker is None:
+        _tracker = OrderTracker()
+    return _tracker
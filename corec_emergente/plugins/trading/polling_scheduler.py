@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+polling_scheduler.py
+Planificador de sondeo REST adaptativo por símbolo, compartido por los watchers de un exchange.
+
+Cada símbolo tiene un peso que crece con su volatilidad reciente y se
+multiplica si algún TradingSymbioticBlock mantiene posición en él. El intervalo
+base (update_interval) se divide por ese peso y, si la suma de peticiones por
+minuto supera el presupuesto del exchange, todos los intervalos se estiran en
+la misma proporción. Los símbolos calientes se refrescan antes sin pasar de los
+límites de la API.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def posiciones_abiertas(bloques: Iterable[Any]) -> Set[str]:
+    """Símbolos con posición abierta (los bloques de la estrategia se llaman bloque_<símbolo>)."""
+    simbolos = set()
+    for bloque in bloques:
+        if getattr(bloque, "posicion", 0) > 0 and str(bloque.id).startswith("bloque_"):
+            simbolos.add(bloque.id[len("bloque_"):])
+    return simbolos
+
+
+class PollingScheduler:
+    def __init__(self, budget_per_minute: float = 600, base_interval: float = 60, min_interval: float = 5,
+                 max_interval: float = 300, volatility_ref: float = 0.02, position_boost: float = 4.0,
+                 max_weight: float = 8.0):
+        self.budget_per_minute = budget_per_minute
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.volatility_ref = volatility_ref
+        self.position_boost = position_boost
+        self.max_weight = max_weight
+        self.symbols: Dict[str, Dict[str, Any]] = {}
+        self.positions: Set[str] = set()
+        self._intervals: Optional[Dict[str, float]] = None
+
+    def register(self, symbols: Iterable[str], cost: int = 1) -> None:
+        """Alta de símbolos; cost es el número de peticiones REST de cada refresco."""
+        for symbol in symbols:
+            if symbol not in self.symbols:
+                self.symbols[symbol] = {"cost": cost, "volatilidad": self.volatility_ref, "next_due": 0.0, "polls": 0}
+        self._intervals = None
+
+    def unregister(self, symbols: Iterable[str]) -> None:
+        for symbol in symbols:
+            self.symbols.pop(symbol, None)
+        self._intervals = None
+
+    def update_volatility(self, symbol: str, volatilidad: Optional[float]) -> None:
+        if symbol in self.symbols and volatilidad is not None:
+            self.symbols[symbol]["volatilidad"] = volatilidad
+            self._intervals = None
+
+    def set_positions(self, symbols: Iterable[str]) -> None:
+        symbols = set(symbols)
+        if symbols != self.positions:
+            self.positions = symbols
+            self._intervals = None
+
+    def weight(self, symbol: str) -> float:
+        peso = self.symbols[symbol]["volatilidad"] / self.volatility_ref if self.volatility_ref else 1.0
+        peso = min(max(peso, 1 / self.max_weight), self.max_weight)
+        if symbol in self.positions:
+            peso *= self.position_boost
+        return peso
+
+    def intervals(self) -> Dict[str, float]:
+        """Intervalo de sondeo por símbolo ajustado al presupuesto global de peticiones."""
+        if self._intervals is not None:
+            return self._intervals
+        deseados = {s: self.base_interval / self.weight(s) for s in self.symbols}
+        peticiones = sum(60 / max(deseados[s], self.min_interval) * info["cost"] for s, info in self.symbols.items())
+        escala = max(peticiones / self.budget_per_minute, 1.0) if self.budget_per_minute else 1.0
+        self._intervals = {
+            s: min(max(intervalo * escala, self.min_interval), self.max_interval)
+            for s, intervalo in deseados.items()
+        }
+        if escala > 1:
+            logger.debug("[PollingScheduler] Presupuesto excedido x%.2f, intervalos estirados", escala)
+        return self._intervals
+
+    def requests_per_minute(self) -> float:
+        intervalos = self.intervals()
+        return sum(60 / intervalos[s] * info["cost"] for s, info in self.symbols.items())
+
+    def due(self, symbols: Optional[Iterable[str]] = None, now: Optional[float] = None) -> List[str]:
+        """Símbolos que toca refrescar, empezando por los más retrasados."""
+        ahora = reloj_actual().time() if now is None else now
+        candidatos = self.symbols if symbols is None else [s for s in symbols if s in self.symbols]
+        pendientes = [s for s in candidatos if self.symbols[s]["next_due"] <= ahora]
+        return sorted(pendientes, key=lambda s: self.symbols[s]["next_due"])
+
+    def mark_polled(self, symbol: str, now: Optional[float] = None) -> None:
+        if symbol not in self.symbols:
+            return
+        ahora = reloj_actual().time() if now is None else now
+        self.symbols[symbol]["next_due"] = ahora + self.intervals()[symbol]
+        self.symbols[symbol]["polls"] += 1
+
+    def next_wakeup(self, symbols: Optional[Iterable[str]] = None, now: Optional[float] = None) -> float:
+        """Segundos hasta el próximo símbolo pendiente (acotado por min_interval y max_interval)."""
+        ahora = reloj_actual().time() if now is None else now
+        candidatos = [s for s in (self.symbols if symbols is None else symbols) if s in self.symbols]
+        if not candidatos:
+            return self.max_interval
+        espera = min(self.symbols[s]["next_due"] for s in candidatos) - ahora
+        return min(max(espera, 0.0), self.max_interval)
+
+
+_schedulers: Dict[str, PollingScheduler] = {}
+
+
+def get_polling_scheduler(exchange: str, **config) -> PollingScheduler:
+    """Planificador compartido por todos los watchers de un exchange (lo configura el primero)."""
+    if exchange not in _schedulers:
+        _schedulers[exchange] = PollingScheduler(**config)
+    return _schedulers[exchange]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+portfolio_risk.py
+Riesgo conjunto de la cartera: covarianza EWMA entre símbolos y VaR vectorizado.
+
+Cada bloque simbiótico opera su símbolo por separado; este módulo mide la
+exposición combinada. Con cada tick se calculan los log-retornos de todos los
+símbolos seguidos y se actualiza la covarianza EWMA (estilo RiskMetrics, media
+cero) con un producto exterior: O(símbolos²) por tick y sin volver a leer el
+historial. Los últimos retornos se guardan en un buffer circular de tamaño fijo
+para el VaR histórico. Ambos VaR se calculan a la vez para una matriz de
+carteras (la actual y las candidatas de un control previo a la orden).
+"""
+
+import logging
+import math
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class PortfolioRisk:
+    def __init__(self, decay: float = 0.94, confidence: float = 0.99, window: int = 500, horizon: int = 1,
+                 min_observations: int = 20):
+        self.decay = decay
+        self.confidence = confidence
+        self.window = window
+        # Horizonte en ticks: el VaR de un tick se escala por su raíz cuadrada
+        self.horizon = horizon
+        self.min_observations = min_observations
+        self.z = NormalDist().inv_cdf(confidence)
+        self.symbols: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.last = np.zeros(0)
+        self.cov = np.zeros((0, 0))
+        self.history = np.zeros((window, 0))
+        self.observations = 0
+
+    def _add_symbol(self, symbol: str, price: float) -> None:
+        n = len(self.symbols)
+        self.index[symbol] = n
+        self.symbols.append(symbol)
+        self.last = np.append(self.last, price)
+        cov = np.zeros((n + 1, n + 1))
+        cov[:n, :n] = self.cov
+        self.cov = cov
+        # Antes de su primer precio el símbolo no se movió en los escenarios históricos
+        self.history = np.hstack([self.history, np.zeros((self.window, 1))])
+
+    def update(self, prices: Dict[str, float]) -> None:
+        """Incorpora un tick. Los símbolos ausentes conservan su último precio (retorno cero)."""
+        retornos = np.zeros(len(self.symbols))
+        movidos = False
+        for symbol, precio in prices.items():
+            if not precio or precio <= 0:
+                continue
+            i = self.index.get(symbol)
+            if i is None:
+                self._add_symbol(symbol, precio)
+                retornos = np.append(retornos, 0.0)
+                continue
+            retornos[i] = math.log(precio / self.last[i])
+            self.last[i] = precio
+            movidos = True
+        if not movidos:
+            return
+        self.cov *= self.decay
+        self.cov += (1 - self.decay) * np.outer(retornos, retornos)
+        self.history[self.observations % self.window] = retornos
+        self.observations += 1
+
+    def exposures(self, positions: Dict[str, float]) -> np.ndarray:
+        """Vector de exposición en moneda (cantidad × último precio) en el orden de self.symbols."""
+        w = np.zeros(len(self.symbols))
+        for symbol, cantidad in positions.items():
+            i = self.index.get(symbol)
+            if i is not None:
+                w[i] = cantidad * self.last[i]
+        return w
+
+    def ready(self) -> bool:
+        return self.observations >= self.min_observations
+
+    def parametric_var(self, w: np.ndarray) -> np.ndarray:
+        """VaR paramétrico de una o varias carteras (filas de w)."""
+        w = np.atleast_2d(w)
+        varianza = np.einsum("ki,ij,kj->k", w, self.cov, w)
+        return self.z * np.sqrt(np.maximum(varianza, 0.0)) * math.sqrt(self.horizon)
+
+    def historical_var(self, w: np.ndarray) -> np.ndarray:
+        """VaR histórico de una o varias carteras sobre los retornos del buffer."""
+        w = np.atleast_2d(w)
+        escenarios = self.history[:min(self.observations, self.window)]
+        if not len(escenarios):
+            return np.zeros(len(w))
+        # Revaloración completa de cada escenario: precio × (e^r - 1)
+        pnl = np.expm1(escenarios) @ w.T
+        perdida = -np.quantile(pnl, 1 - self.confidence, axis=0)
+        return np.maximum(perdida, 0.0) * math.sqrt(self.horizon)
+
+    def value_at_risk(self, positions: Dict[str, float]) -> Dict[str, Any]:
+        w = self.exposures(positions)
+        sigma_w = self.cov @ w
+        sigma = math.sqrt(max(float(w @ sigma_w), 0.0))
+        # Contribución de cada símbolo al VaR paramétrico (suman el total)
+        componentes = (self.z * math.sqrt(self.horizon) * w * sigma_w / sigma) if sigma > 0 else np.zeros_like(w)
+        return {
+            "parametric": float(self.parametric_var(w)[0]),
+            "historical": float(self.historical_var(w)[0]),
+            "components": {s: float(c) for s, c in zip(self.symbols, componentes) if abs(c) > 0},
+            "exposure": float(np.abs(w).sum()),
+            "observations": self.observations,
+            "ready": self.ready()
+        }
+
+    def incremental_var(self, positions: Dict[str, float], symbol: str, delta: float,
+                        method: str = "parametric") -> Optional[Dict[str, float]]:
+        """VaR antes y después de sumar delta unidades de symbol; None si el símbolo no tiene precios."""
+        i = self.index.get(symbol)
+        if i is None:
+            return None
+        w = self.exposures(positions)
+        candidata = w.copy()
+        candidata[i] += delta * self.last[i]
+        carteras = np.vstack([w, candidata])
+        var = self.historical_var(carteras) if method == "historical" else self.parametric_var(carteras)
+        return {"before": float(var[0]), "after": float(var[1])}
+
+    def volatilities(self) -> Dict[str, float]:
+        return {s: float(math.sqrt(v)) for s, v in zip(self.symbols, np.diag(self.cov))}
+
+    def correlation(self) -> Dict[str, Dict[str, float]]:
+        desv = np.sqrt(np.diag(self.cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.where(np.outer(desv, desv) > 0, self.cov / np.outer(desv, desv), 0.0)
+        return {s: {o: float(corr[i, j]) for j, o in enumerate(self.symbols)} for i, s in enumerate(self.symbols)}
+
+
+_portfolio: Optional[PortfolioRisk] = None
+
+
+def get_portfolio_risk(**config) -> PortfolioRisk:
+    """Estimador compartido por la estrategia, los managers y el cierre (lo configura el primero)."""
+    global _portfolio
+    if _portfolio is None:
+        _portfolio = PortfolioRisk(**config)
+    return _portfolio
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rate_governor.py
+Gobernador central de límites de peticiones para todo el tráfico ccxt del proceso.
+
+Cada (exchange, clase de endpoint) tiene un token bucket; la clase es el modo
+del cliente (spot o futures), porque los exchanges limitan por separado sus APIs
+de contado y de derivados. Las peticiones esperan en carriles de prioridad:
+las órdenes pasan antes que los datos de mercado y éstos antes que el
+historial, de modo que una ráfaga de backtests o de refrescos de altcoins no
+deja sin capacidad a la colocación de órdenes. Los tiempos de espera en cola
+se exponen por carril en metrics(); la duración de cada llamada, ya fuera de la
+cola, alimenta la salud del venue (venue_health). Recargas y esperas van con el
+reloj del proceso, así que con RelojVirtual los límites se cumplen en tiempo
+simulado.
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+from collections import deque
+from typing import Any, Awaitable, Dict, Optional, Tuple
+import numpy as np
+from clock import reloj_actual
+from .venue_health import get_venue_health
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Menor número = más prioridad
+LANES = {"orders": 0, "market_data": 1, "history": 2}
+
+# Peticiones por segundo y ráfaga por defecto (ccxt limita además cada cliente con enableRateLimit)
+DEFAULT_LIMITS = {
+    "binance": {"rate": 20.0, "burst": 40.0},
+    "kucoin": {"rate": 10.0, "burst": 20.0},
+    "bybit": {"rate": 10.0, "burst": 20.0}
+}
+FALLBACK_LIMIT = {"rate": 10.0, "burst": 20.0}
+
+# Peso aproximado de las llamadas que cuestan más que una petición simple
+METHOD_COSTS = {"fetch_tickers": 10.0, "fetch_order_book": 5.0, "load_markets": 10.0, "fetch_balance": 5.0}
+
+
+class TokenBucket:
+    """Token bucket con cola de espera ordenada por (prioridad, llegada)."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = reloj_actual().time()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._pump_task = None
+
+    def _refill(self) -> None:
+        ahora = reloj_actual().time()
+        # Si se cambió de reloj el tiempo puede retroceder: no se quitan tokens
+        self.tokens = min(self.burst, self.tokens + max(ahora - self.updated, 0.0) * self.rate)
+        self.updated = ahora
+
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w[3].done())
+
+    def _needed(self, cost: float) -> float:
+        # Una llamada más cara que la ráfaga sale con el bucket lleno y deja el saldo en negativo,
+        # así que espera su turno y cobra su coste completo sin bloquear la cola para siempre
+        return min(cost, self.burst)
+
+    async def acquire(self, priority: int, cost: float = 1.0) -> None:
+        self._refill()
+        if not self._waiters and self.tokens >= self._needed(cost):
+            self.tokens -= cost
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), cost, futuro))
+        if self._pump_task is None or self._pump_task.done():
+            lanzar = getattr(reloj_actual(), "lanzar", asyncio.create_task)
+            self._pump_task = lanzar(self._pump())
+        await futuro
+
+    async def _pump(self) -> None:
+        # Siempre se atiende la cabeza de la cola: una orden que llega durante la espera adelanta al resto
+        while self._waiters:
+            prioridad, _, cost, futuro = self._waiters[0]
+            if futuro.done():
+                heapq.heappop(self._waiters)
+                continue
+            self._refill()
+            if self.tokens >= self._needed(cost):
+                heapq.heappop(self._waiters)
+                self.tokens -= cost
+                futuro.set_result(None)
+                continue
+            await reloj_actual().sleep((self._needed(cost) - self.tokens) / self.rate)
+
+
+class RateGovernor:
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, metrics_window: int = 1000):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.metrics_window = metrics_window
+        self.buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._waits: Dict[Tuple[str, str], deque] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+
+    def configure(self, exchange: str, rate: float, burst: Optional[float] = None, endpoint: Optional[str] = None) -> None:
+        """Fija el límite de un exchange (o sólo de una clase de endpoint si se indica)."""
+        limite = {"rate": float(rate), "burst": float(burst if burst is not None else rate * 2)}
+        clave = f"{exchange}:{endpoint}" if endpoint else exchange
+        self.limits[clave] = limite
+        for (ex, ep), bucket in self.buckets.items():
+            if ex == exchange and (endpoint is None or ep == endpoint):
+                bucket.rate, bucket.burst = limite["rate"], limite["burst"]
+                bucket.tokens = min(bucket.tokens, bucket.burst)
+        logger.info(f"[RateGovernor] Límite {clave}: {limite['rate']}/s (ráfaga {limite['burst']})")
+
+    def _bucket(self, exchange: str, endpoint: str) -> TokenBucket:
+        clave = (exchange, endpoint)
+        if clave not in self.buckets:
+            limite = self.limits.get(f"{exchange}:{endpoint}") or self.limits.get(exchange) or FALLBACK_LIMIT
+            self.buckets[clave] = TokenBucket(limite["rate"], limite["burst"])
+        return self.buckets[clave]
+
+    async def acquire(self, exchange: str, lane: str = "market_data", cost: float = 1.0,
+                      endpoint: str = "spot") -> float:
+        """Espera capacidad en el carril indicado y devuelve los segundos esperados en cola."""
+        if lane not in LANES:
+            raise ValueError(f"[RateGovernor] Carril desconocido: {lane}")
+        reloj = reloj_actual()
+        inicio = reloj.time()
+        await self._bucket(exchange, endpoint).acquire(LANES[lane], cost)
+        espera = reloj.time() - inicio
+        clave = (exchange, lane)
+        self._waits.setdefault(clave, deque(maxlen=self.metrics_window)).append(espera)
+        self._counts[clave] = self._counts.get(clave, 0) + 1
+        return espera
+
+    async def run(self, exchange: str, lane: str, coro: Awaitable, cost: float = 1.0, endpoint: str = "spot") -> Any:
+        """Ejecuta una corrutina ccxt cuando hay capacidad."""
+        try:
+            await self.acquire(exchange, lane, cost, endpoint)
+        except BaseException:
+            if inspect.iscoroutine(coro):
+                coro.close()
+            raise
+        return await coro
+
+    def wrap(self, client, exchange: str, lane: str, endpoint: str = "spot") -> "GovernedClient":
+        return GovernedClient(self, client, exchange, lane, endpoint)
+
+    def metrics(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Esperas en cola por exchange y carril (segundos)."""
+        salida: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (exchange, lane), esperas in self._waits.items():
+            valores = np.fromiter(esperas, dtype=float)
+            salida.setdefault(exchange, {})[lane] = {
+                "requests": self._counts[(exchange, lane)],
+                "wait_avg": float(valores.mean()),
+                "wait_p50": float(np.percentile(valores, 50)),
+                "wait_p99": float(np.percentile(valores, 99)),
+                "wait_max": float(valores.max())
+            }
+        for (exchange, endpoint), bucket in self.buckets.items():
+            salida.setdefault(exchange, {}).setdefault("queued", {})[endpoint] = bucket.queued()
+        return salida
+
+
+class GovernedClient:
+    """Envoltorio de un cliente ccxt cuyas llamadas asíncronas pasan por el gobernador.
+
+    Los atributos y métodos síncronos se delegan sin cambios; las asignaciones
+    (p. ej. apiKey) llegan al cliente real.
+    """
+
+    def __init__(self, governor: RateGovernor, client, exchange: str, lane: str, endpoint: str = "spot"):
+        object.__setattr__(self, "_governor", governor)
+        object.__setattr__(self, "_client", client)
+        object.__setattr__(self, "_exchange", exchange)
+        object.__setattr__(self, "_lane", lane)
+        object.__setattr__(self, "_endpoint", endpoint)
+
+    @property
+    def client(self):
+        return self._client
+
+    def with_lane(self, lane: str) -> "GovernedClient":
+        return GovernedClient(self._governor, self._client, self._exchange, lane, self._endpoint)
+
+    def __getattr__(self, nombre: str):
+        atributo = getattr(self._client, nombre)
+        if nombre == "close" or not inspect.iscoroutinefunction(atributo):
+            return atributo
+
+        async def gobernado(*args, **kwargs):
+            await self._governor.acquire(self._exchange, self._lane, METHOD_COSTS.get(nombre, 1.0), self._endpoint)
+            reloj = reloj_actual()
+            inicio = reloj.time()
+            try:
+                resultado = await atributo(*args, **kwargs)
+            except Exception as e:
+                get_venue_health().observe(self._exchange, nombre, reloj.time() - inicio, e)
+                raise
+            get_venue_health().observe(self._exchange, nombre, reloj.time() - inicio)
+            return resultado
+        return gobernado
+
+    def __setattr__(self, nombre: str, valor: Any) -> None:
+        setattr(self._client, nombre, valor)
+
+
+_governor: Optional[RateGovernor] = None
+
+
+def get_rate_governor() -> RateGovernor:
+    global _governor
+    if _governor is None:
+        _governor = RateGovernor()
+    return _governor
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+risk_engine.py
+Controles de riesgo previos a cada orden con exposiciones agregadas en caché.
+
+El motor guarda por (venue, símbolo) la posición ejecutada y lo reservado por
+las órdenes padre aceptadas que aún no se han ejecutado, y mantiene al día los
+agregados brutos por símbolo, por venue y totales. Cada ejecución, reserva o
+liberación sólo toca su clave y propaga la diferencia a los agregados, así que
+comprobar una orden candidata (nocional máximo por orden, por símbolo, por
+venue, total y apalancamiento sobre el patrimonio) son unas pocas búsquedas en
+diccionarios y no un recorrido del estado de los bloques. Con max_var se exige
+además que el VaR conjunto de la cartera (portfolio_risk) con la orden no pase
+de esa fracción del patrimonio, salvo que la orden lo reduzca.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+from .portfolio_risk import get_portfolio_risk
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-12
+
+
+class RiskEngine:
+    def __init__(self, max_order_notional: Optional[float] = None, max_symbol_notional: Optional[float] = None,
+                 max_venue_notional: Optional[float] = None, max_total_notional: Optional[float] = None,
+                 max_leverage: Optional[float] = None, limits: Optional[Dict[str, float]] = None,
+                 max_var: Optional[float] = None, var_method: str = "parametric"):
+        self.max_order_notional = max_order_notional
+        self.max_symbol_notional = max_symbol_notional
+        self.max_venue_notional = max_venue_notional
+        self.max_total_notional = max_total_notional
+        self.max_leverage = max_leverage
+        # Límites de nocional por símbolo que sustituyen a max_symbol_notional
+        self.limits = limits or {}
+        # VaR máximo de la cartera como fracción del patrimonio
+        self.max_var = max_var
+        self.var_method = var_method
+        self.equity: Optional[float] = None
+        self.positions: Dict[Tuple[str, str], float] = {}
+        self.pending: Dict[Tuple[str, str], float] = {}
+        self.reservations: Dict[str, list] = {}
+        self.marks: Dict[str, float] = {}
+        self.gross: Dict[Tuple[str, str], float] = {}
+        self.symbol_gross: Dict[str, float] = {}
+        self.venue_gross: Dict[str, float] = {}
+        self.total_gross = 0.0
+        # Cantidad neta (ejecutada + reservada) por (venue, símbolo) y por símbolo, para el VaR
+        self.net: Dict[Tuple[str, str], float] = {}
+        self.symbol_net: Dict[str, float] = {}
+        self._keys: Dict[str, Set[Tuple[str, str]]] = {}
+        self.rejections: Dict[str, int] = {}
+
+    def _refresh(self, clave: Tuple[str, str]) -> None:
+        venue, symbol = clave
+        cantidad = self.positions.get(clave, 0.0) + self.pending.get(clave, 0.0)
+        self.symbol_net[symbol] = self.symbol_net.get(symbol, 0.0) + cantidad - self.net.get(clave, 0.0)
+        self.net[clave] = cantidad
+        nuevo = abs(cantidad) * self.marks.get(symbol, 0.0)
+        delta = nuevo - self.gross.get(clave, 0.0)
+        self.gross[clave] = nuevo
+        self.symbol_gross[symbol] = self.symbol_gross.get(symbol, 0.0) + delta
+        self.venue_gross[venue] = self.venue_gross.get(venue, 0.0) + delta
+        self.total_gross += delta
+        self._keys.setdefault(symbol, set()).add(clave)
+
+    def mark(self, symbol: str, price: float) -> None:
+        """Revalora las exposiciones del símbolo al último precio."""
+        if not price or self.marks.get(symbol) == price:
+            return
+        self.marks[symbol] = price
+        for clave in self._keys.get(symbol, ()):
+            self._refresh(clave)
+
+    def set_equity(self, equity: float) -> None:
+        self.equity = equity
+
+    def check(self, symbol: str, side: str, amount: float, price: float, venue: str) -> Optional[str]:
+        """None si la orden cabe en los límites; si no, el motivo del rechazo."""
+        motivo = self._check(symbol, side, amount, price, venue)
+        if motivo is not None:
+            self.rejections[motivo] = self.rejections.get(motivo, 0) + 1
+        return motivo
+
+    def _check(self, symbol: str, side: str, amount: float, price: float, venue: str) -> Optional[str]:
+        if self.max_order_notional is not None and amount * price > self.max_order_notional:
+            return "order_notional"
+        clave = (venue, symbol)
+        cantidad = self.positions.get(clave, 0.0) + self.pending.get(clave, 0.0)
+        signo = 1.0 if side == "buy" else -1.0
+        delta = (abs(cantidad + signo * amount) - abs(cantidad)) * price
+        if delta <= EPSILON:
+            # Las órdenes que reducen exposición siempre pasan
+            return None
+        limite = self.limits.get(symbol, self.max_symbol_notional)
+        if limite is not None and self.symbol_gross.get(symbol, 0.0) + delta > limite:
+            return "symbol_limit"
+        if self.max_venue_notional is not None and self.venue_gross.get(venue, 0.0) + delta > self.max_venue_notional:
+            return "venue_limit"
+        if self.max_total_notional is not None and self.total_gross + delta > self.max_total_notional:
+            return "total_limit"
+        if self.max_leverage is not None and self.equity and (self.total_gross + delta) / self.equity > self.max_leverage:
+            return "leverage"
+        if self.max_var is not None and self.equity:
+            portfolio = get_portfolio_risk()
+            if portfolio.ready():
+                var = portfolio.incremental_var(self.symbol_net, symbol, signo * amount, self.var_method)
+                if var and var["after"] > var["before"] and var["after"] > self.max_var * self.equity:
+                    return "var"
+        return None
+
+    def reserve(self, order_id: str, symbol: str, side: str, amount: float, venue: str,
+                price: Optional[float] = None) -> None:
+        """Aparta la exposición de una orden aceptada hasta que se ejecute o termine."""
+        if price:
+            self.mark(symbol, price)
+        cantidad = amount if side == "buy" else -amount
+        clave = (venue, symbol)
+        self.reservations[order_id] = [clave, cantidad]
+        self.pending[clave] = self.pending.get(clave, 0.0) + cantidad
+        self._refresh(clave)
+
+    def fill(self, order_id: str, amount: float, price: float, venue: Optional[str] = None) -> None:
+        """Pasa la cantidad ejecutada de la reserva a la posición (en el venue que ejecutó)."""
+        reserva = self.reservations.get(order_id)
+        if reserva is None:
+            logger.debug(f"[RiskEngine] Ejecución de {order_id} sin reserva")
+            return
+        clave, restante = reserva
+        symbol = clave[1]
+        cantidad = min(amount, abs(restante)) * (1.0 if restante >= 0 else -1.0)
+        reserva[1] = restante - cantidad
+        self.pending[clave] = self.pending.get(clave, 0.0) - cantidad
+        destino = (venue, symbol) if venue else clave
+        # La posición va con todo lo ejecutado aunque supere lo reservado
+        self.positions[destino] = self.positions.get(destino, 0.0) + amount * (1.0 if restante >= 0 else -1.0)
+        if price:
+            self.mark(symbol, price)
+        self._refresh(clave)
+        if destino != clave:
+            self._refresh(destino)
+
+    def release(self, order_id: str) -> None:
+        """Libera lo que quede reservado de una orden terminada."""
+        reserva = self.reservations.pop(order_id, None)
+        if reserva is None:
+            return
+        clave, restante = reserva
+        self.pending[clave] = self.pending.get(clave, 0.0) - restante
+        self._refresh(clave)
+
+    def exposure(self, symbol: Optional[str] = None, venue: Optional[str] = None) -> float:
+        if symbol is not None and venue is not None:
+            return self.gross.get((venue, symbol), 0.0)
+        if symbol is not None:
+            return self.symbol_gross.get(symbol, 0.0)
+        if venue is not None:
+            return self.venue_gross.get(venue, 0.0)
+        return self.total_gross
+
+    def usage(self) -> Dict[str, Any]:
+        return {
+            "symbols": {s: v for s, v in self.symbol_gross.items() if v > EPSILON},
+            "venues": {v: n for v, n in self.venue_gross.items() if n > EPSILON},
+            "total": self.total_gross,
+            "leverage": self.total_gross / self.equity if self.equity else None,
+            "reserved_orders": len(self.reservations),
+            "rejections": dict(self.rejections)
+        }
+
+
+_engine: Optional[RiskEngine] = None
+
+
+def get_risk_engine(**config) -> RiskEngine:
+    """Motor compartido por todos los ExchangeManager del proceso (lo configura el primero)."""
+    global _engine
+    if _engine is None:
+        _engine = RiskEngine(**config)
+    return _engine
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+slippage_model.py
+Modelo de deslizamiento a partir de la profundidad L2 reciente y de las ejecuciones reales.
+
+Para cada símbolo se guardan las últimas instantáneas del libro como arrays de
+cantidad y nocional acumulados por lado, de modo que el precio medio de una
+orden de cualquier tamaño sale de un searchsorted; estimate_batch lo hace a la
+vez para todas las órdenes candidatas de un símbolo. Las ejecuciones reales
+alimentan ventanas acotadas con el deslizamiento realizado y el error de la
+predicción; la media de ese error corrige las estimaciones siguientes. Sin libro
+se usa lo realizado en la ventana y, si tampoco hay ejecuciones, una fracción
+de la volatilidad.
+"""
+
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence
+import numpy as np
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class BookSnapshot:
+    """Lado comprador y vendedor de un libro como cantidades y nocionales acumulados."""
+
+    def __init__(self, book: Dict[str, Any], timestamp: float):
+        self.timestamp = timestamp
+        self.sides = {}
+        for lado in ("asks", "bids"):
+            niveles = np.array([n[:2] for n in book.get(lado) or []], dtype=float).reshape(-1, 2)
+            self.sides[lado] = (niveles[:, 0], np.cumsum(niveles[:, 1]), np.cumsum(niveles[:, 0] * niveles[:, 1]))
+        asks, bids = self.sides["asks"][0], self.sides["bids"][0]
+        self.mid = (asks[0] + bids[0]) / 2 if len(asks) and len(bids) else (
+            asks[0] if len(asks) else bids[0] if len(bids) else None)
+
+    def average_price(self, lado: str, amounts: np.ndarray, beyond_depth: float) -> np.ndarray:
+        """Precio medio de barrer el lado con cada cantidad; lo que excede la profundidad paga el peor nivel más beyond_depth."""
+        precios, cantidad, nocional = self.sides[lado]
+        if not len(precios):
+            return np.full(len(amounts), np.nan)
+        k = np.searchsorted(cantidad, amounts)
+        dentro = k < len(precios)
+        k = np.minimum(k, len(precios) - 1)
+        previa_q = np.where(k > 0, cantidad[k - 1], 0.0)
+        previa_n = np.where(k > 0, nocional[k - 1], 0.0)
+        peor = precios[-1] * (1 + beyond_depth if lado == "asks" else 1 - beyond_depth)
+        total = np.where(dentro, previa_n + (amounts - previa_q) * precios[k],
+                         nocional[-1] + (amounts - cantidad[-1]) * peor)
+        return total / np.maximum(amounts, 1e-18)
+
+
+class SlippageModel:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.window = config.get("window", 500)
+        self.snapshots = config.get("snapshots", 5)
+        self.book_ttl = config.get("book_ttl", 30.0)
+        self.beyond_depth = config.get("beyond_depth", 0.005)
+        self.volatility_factor = config.get("volatility_factor", 0.1)
+        self.books: Dict[str, Deque[BookSnapshot]] = {}
+        self.realized: Dict[str, Deque[float]] = {}
+        self.errors: Dict[str, Deque[float]] = {}
+
+    def update_book(self, symbol: str, book: Dict[str, Any], now: Optional[float] = None) -> None:
+        ahora = reloj_actual().time() if now is None else now
+        self.books.setdefault(symbol, deque(maxlen=self.snapshots)).append(BookSnapshot(book, ahora))
+
+    def book(self, symbol: str, now: Optional[float] = None) -> Optional[BookSnapshot]:
+        """Última instantánea si no ha caducado."""
+        instantaneas = self.books.get(symbol)
+        if not instantaneas:
+            return None
+        ahora = reloj_actual().time() if now is None else now
+        ultima = instantaneas[-1]
+        return ultima if ahora - ultima.timestamp <= self.book_ttl else None
+
+    def stale(self, symbol: str, now: Optional[float] = None) -> bool:
+        return self.book(symbol, now) is None
+
+    def record_fill(self, symbol: str, side: str, reference: float, fill_price: float,
+                    predicted: Optional[float] = None) -> float:
+        """Registra una ejecución; devuelve el deslizamiento realizado (positivo = en contra)."""
+        realizado = (fill_price - reference) / reference if side == "buy" else (reference - fill_price) / reference
+        self.realized.setdefault(symbol, deque(maxlen=self.window)).append(realizado)
+        if predicted is not None:
+            self.errors.setdefault(symbol, deque(maxlen=self.window)).append(realizado - predicted)
+        return realizado
+
+    def _fallback(self, symbol: str, volatilidad: Optional[float]) -> float:
+        realizados = self.realized.get(symbol)
+        if realizados:
+            return float(np.mean(realizados))
+        return (volatilidad if volatilidad is not None else 0.02) * self.volatility_factor
+
+    def estimate(self, symbol: str, side: str, amount: float, price: Optional[float] = None,
+                 volatilidad: Optional[float] = None) -> float:
+        return float(self.estimate_batch([symbol], [side], [amount], None if price is None else [price],
+                                         None if volatilidad is None else [volatilidad])[0])
+
+    def estimate_batch(self, symbols: Sequence[str], sides: Sequence[str], amounts: Sequence[float],
+                       prices: Optional[Sequence[float]] = None,
+                       volatilidades: Optional[Sequence[float]] = None) -> np.ndarray:
+        """Deslizamiento esperado (fracción, positivo = en contra) de cada orden candidata.
+
+        La referencia es prices (p. ej. el precio de la decisión) o, si no se da,
+        el precio medio del libro.
+        """
+        symbols = np.asarray(symbols, dtype=object)
+        compra = np.asarray(sides) == "buy"
+        amounts = np.asarray(amounts, dtype=float)
+        referencias = np.full(len(amounts), np.nan) if prices is None else np.asarray(prices, dtype=float)
+        salida = np.empty(len(amounts))
+        ahora = reloj_actual().time()
+        for symbol in set(symbols.tolist()):
+            filas = np.flatnonzero(symbols == symbol)
+            libro = self.book(symbol, ahora)
+            if libro is None or libro.mid is None:
+                for fila in filas:
+                    salida[fila] = self._fallback(symbol, None if volatilidades is None else volatilidades[fila])
+                continue
+            medios = np.where(compra[filas],
+                              libro.average_price("asks", amounts[filas], self.beyond_depth),
+                              libro.average_price("bids", amounts[filas], self.beyond_depth))
+            ref = np.where(np.isnan(referencias[filas]), libro.mid, referencias[filas])
+            impacto = np.where(compra[filas], medios - ref, ref - medios) / ref
+            # Un lado vacío no permite estimar: se usa lo realizado
+            impacto = np.where(np.isnan(impacto), self._fallback(symbol, None), impacto)
+            errores = self.errors.get(symbol)
+            salida[filas] = impacto + (float(np.mean(errores)) if errores else 0.0)
+        return salida
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        salida = {}
+        for symbol, realizados in self.realized.items():
+            valores = np.fromiter(realizados, dtype=float)
+            errores = self.errors.get(symbol)
+            salida[symbol] = {
+                "fills": len(valores),
+                "mean": float(valores.mean()),
+                "p50": float(np.percentile(valores, 50)),
+                "p95": float(np.percentile(valores, 95)),
+                "bias": float(np.mean(errores)) if errores else 0.0
+            }
+        return salida
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+venue_health.py
+Salud de cada venue (exchange) a partir de la latencia y los errores de sus peticiones.
+
+Todas las llamadas ccxt que pasan por el gobernador de peticiones se miden
+aquí: por venue y endpoint (método ccxt) se guarda un histograma de latencias
+con cubetas logarítmicas y olvido exponencial, del que salen p50 y p99, y una
+media móvil de errores de red. La puntuación de un venue (0 a 1) baja cuando su
+p99 supera la latencia objetivo o cuando falla, de modo que un exchange que
+responde bien pero despacio pierde peso frente a otro rápido. El router la usa
+para repartir órdenes, los watchers para elegir desde qué exchange sondear y el
+monitor la publica con el resto del estado.
+
+El circuit breaker de cada venue vive también aquí: además de los fallos cuenta
+las llamadas lentas y, al vencer la espera, pasa a semiabierto y deja salir
+sólo unas pocas peticiones de prueba antes de volver a cerrarse.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+import ccxt.async_support as ccxt
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Errores que dicen algo de la salud del venue (una orden inválida no la dice)
+VENUE_ERRORS = (ccxt.NetworkError, ccxt.ExchangeNotAvailable, asyncio.TimeoutError)
+
+
+class CircuitBreaker:
+    """Breaker de tres estados: closed, open y half_open.
+
+    Se abre tras max_failures fallos seguidos; una llamada más lenta que
+    slow_call segundos cuenta como fallo. Al vencer reset_timeout pasa a
+    half_open y allow() deja salir hasta `probes` peticiones de prueba: un
+    éxito lo cierra y un fallo lo reabre con el doble de espera (hasta
+    max_reset_timeout).
+    """
+
+    def __init__(self, max_failures: int = 3, reset_timeout: float = 900, max_reset_timeout: Optional[float] = None,
+                 probes: int = 1, slow_call: Optional[float] = None):
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout if max_reset_timeout is not None else reset_timeout * 8
+        self.probes = probes
+        self.slow_call = slow_call
+        self.state = "closed"
+        self.failures = 0
+        self.timeout = reset_timeout
+        self.reset_time: Optional[float] = None
+        self.in_flight = 0
+        self.probe_time: Optional[float] = None
+
+    @property
+    def tripped(self) -> bool:
+        return self.state != "closed"
+
+    def _now(self, now: Optional[float]) -> float:
+        return reloj_actual().time() if now is None else now
+
+    def ready(self, now: Optional[float] = None) -> bool:
+        """Como allow() pero sin consumir una petición de prueba."""
+        if self.state == "closed":
+            return True
+        ahora = self._now(now)
+        if self.state == "open":
+            return ahora >= self.reset_time
+        return self.in_flight < self.probes or ahora - self.probe_time >= self.timeout
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """True si el venue acepta la petición; en half_open cada True es una prueba."""
+        if self.state == "closed":
+            return True
+        ahora = self._now(now)
+        if self.state == "open":
+            if ahora < self.reset_time:
+                return False
+            self.state = "half_open"
+            self.failures = 0
+            self.in_flight = 0
+        elif self.in_flight >= self.probes and ahora - self.probe_time >= self.timeout:
+            # Una prueba que nunca informó no bloquea el breaker para siempre
+            self.in_flight = 0
+        if self.in_flight >= self.probes:
+            return False
+        self.in_flight += 1
+        self.probe_time = ahora
+        return True
+
+    def trip(self, now: Optional[float] = None) -> None:
+        self.state = "open"
+        self.in_flight = 0
+        self.reset_time = self._now(now) + self.timeout
+
+    def record_failure(self, now: Optional[float] = None) -> bool:
+        """Cuenta un fallo; devuelve True si este fallo abre el breaker."""
+        self.failures += 1
+        if self.state == "half_open":
+            # La prueba falló: se vuelve a abrir esperando el doble
+            self.timeout = min(self.timeout * 2, self.max_reset_timeout)
+            self.trip(now)
+            return True
+        if self.state == "open" or self.failures < self.max_failures:
+            return False
+        self.trip(now)
+        return True
+
+    def record_success(self, latency: Optional[float] = None, now: Optional[float] = None) -> bool:
+        """Cuenta un éxito; devuelve True si cierra un breaker semiabierto.
+
+        Con slow_call, una respuesta más lenta cuenta como fallo (consultar state).
+        """
+        if self.slow_call is not None and latency is not None and latency > self.slow_call:
+            self.record_failure(now)
+            return False
+        self.failures = 0
+        if self.state != "half_open":
+            return False
+        self.state = "closed"
+        self.timeout = self.reset_timeout
+        self.reset_time = None
+        self.in_flight = 0
+        return True
+
+
+class LatencyHistogram:
+    """Histograma de latencias con cubetas logarítmicas y olvido exponencial."""
+
+    def __init__(self, min_latency: float = 0.001, max_latency: float = 60.0, buckets: int = 64,
+                 decay: float = 0.995):
+        self.edges = np.geomspace(min_latency, max_latency, buckets)
+        # La última cubeta recoge lo que supera max_latency
+        self.counts = np.zeros(buckets + 1)
+        self.decay = decay
+        self.total = 0
+        self.last: Optional[float] = None
+
+    def record(self, latency: float) -> None:
+        self.counts *= self.decay
+        self.counts[np.searchsorted(self.edges, latency)] += 1.0
+        self.total += 1
+        self.last = latency
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Límite superior de la cubeta que contiene el percentil q (0-100)."""
+        peso = self.counts.sum()
+        if peso <= 0:
+            return None
+        i = int(np.searchsorted(np.cumsum(self.counts), peso * q / 100.0))
+        return float(self.edges[min(i, len(self.edges) - 1)])
+
+
+class VenueHealth:
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.latency_target = config.get("latency_target", 1.0)
+        self.error_decay = config.get("error_decay", 0.95)
+        self.min_samples = config.get("min_samples", 5)
+        self.switch_margin = config.get("switch_margin", 0.1)
+        self.histogram = config.get("histogram", {})
+        self.latencies: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.errors: Dict[str, float] = {}
+
+    def record(self, venue: str, endpoint: str, latency: float, ok: bool = True) -> None:
+        clave = (venue, endpoint)
+        if clave not in self.latencies:
+            self.latencies[clave] = LatencyHistogram(**self.histogram)
+        self.latencies[clave].record(latency)
+        self.errors[venue] = self.error_decay * self.errors.get(venue, 0.0) + (1 - self.error_decay) * (0.0 if ok else 1.0)
+
+    def observe(self, venue: str, endpoint: str, latency: float, error: Optional[BaseException] = None) -> None:
+        """Registra una llamada; sólo los errores de red o disponibilidad cuentan contra el venue."""
+        self.record(venue, endpoint, latency, ok=not isinstance(error, VENUE_ERRORS))
+
+    def endpoints(self, venue: str) -> Dict[str, Dict[str, Any]]:
+        return {
+            endpoint: {"count": h.total, "p50": h.percentile(50), "p99": h.percentile(99), "last": h.last}
+            for (nombre, endpoint), h in self.latencies.items() if nombre == venue
+        }
+
+    def score(self, venue: str, endpoint: Optional[str] = None) -> float:
+        """Puntuación entre 0 y 1; un venue sin datos suficientes puntúa 1."""
+        factores, pesos = [], []
+        for (nombre, ep), histograma in self.latencies.items():
+            if nombre != venue or (endpoint is not None and ep != endpoint) or histograma.total < self.min_samples:
+                continue
+            # Cada endpoint se compara con el objetivo y pesa según las muestras vivas
+            factores.append(min(1.0, self.latency_target / max(histograma.percentile(99), 1e-9)))
+            pesos.append(histograma.counts.sum())
+        latencia = float(np.average(factores, weights=pesos)) if factores else 1.0
+        return latencia * (1.0 - self.errors.get(venue, 0.0))
+
+    def best(self, venues: Iterable[str], current: Optional[str] = None, endpoint: Optional[str] = None) -> str:
+        """El venue con mejor puntuación; se mantiene el actual salvo mejora de switch_margin."""
+        venues = list(venues)
+        puntuaciones = {v: self.score(v, endpoint) for v in venues}
+        mejor = max(venues, key=lambda v: puntuaciones[v])
+        if current in puntuaciones and puntuaciones[mejor] - puntuaciones[current] < self.switch_margin:
+            return current
+        return mejor
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        venues = {nombre for nombre, _ in self.latencies}
+        return {
+            venue: {"score": self.score(venue), "error_rate": self.errors.get(venue, 0.0),
+                    "endpoints": self.endpoints(venue)}
+            for venue in sorted(venues)
+        }
+
+
+_health: Optional[VenueHealth] = None
+
+
+def get_venue_health() -> VenueHealth:
+    global _health
+    if _health is None:
+        _health = VenueHealth()
+    return _health
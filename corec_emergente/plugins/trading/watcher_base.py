@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+watcher_base.py
+Base común de los watchers de mercado: cliente REST según la salud del venue,
+velas desde el almacén OHLCV o el exchange, stream compartido, sondeo adaptativo
+y publicación por deltas. Cada watcher sólo define sus símbolos y cómo publica
+el sondeo REST.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, List
+from corec.entidad_base import EntidadBase
+from .exchange_pool import get_exchange_pool
+from .market_stream import get_market_stream, release_market_stream
+from .ohlcv_store import OHLCVStore, timeframe_ms
+from .rate_governor import get_rate_governor
+from .venue_health import get_venue_health
+from .delta_publisher import DeltaPublisher
+from .candle_aggregator import get_candle_aggregator
+from .polling_scheduler import get_polling_scheduler, posiciones_abiertas
+from indicators import MotorIndicadores
+from clock import reloj_actual
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class EntidadWatcherBase(EntidadBase):
+    def __init__(self, id: str, config: Dict[str, Any], symbols: List[str], canal: str, nombre: str):
+        super().__init__(id=id, config=config)
+        self.symbols = symbols
+        self.canal = canal
+        self.nombre = nombre
+        self.update_interval = config["update_interval"]
+        self.exchange_name = config.get("exchange", "binance")
+        self.exchange = None
+        # Con exchanges de respaldo el sondeo REST va al que mejor responde
+        self.exchanges = [self.exchange_name] + config.get("fallback_exchanges", [])
+        self.venue = self.exchange_name
+        self.clients: Dict[str, Any] = {}
+        self.streaming = config.get("streaming", {})
+        self.stream = None
+        self.indicadores = MotorIndicadores()
+        self.warmup_candles = config.get("warmup_candles", 100)
+        self.indicator_state_path = config.get("indicator_state_path")
+        self.store = OHLCVStore(config["ohlcv_store_path"]) if config.get("ohlcv_store_path") else None
+        # Cada refresco REST cuesta dos peticiones (ticker y velas)
+        self.scheduler = get_polling_scheduler(self.exchange_name, base_interval=self.update_interval,
+                                               **config.get("polling", {}))
+        self.scheduler.register(self.symbols, cost=2)
+        self.delta = DeltaPublisher(config.get("delta"))
+        self.candles = get_candle_aggregator()
+
+    async def _get_exchange(self):
+        if self.exchange is not None and not self.clients:
+            # Un cliente inyectado (p. ej. en pruebas) se usa tal cual, sin pasar por el pool
+            return self.exchange
+        venue = get_venue_health().best(self.exchanges, current=self.venue)
+        if venue not in self.clients:
+            cliente = await get_exchange_pool().acquire(venue, "spot")
+            self.clients[venue] = get_rate_governor().wrap(cliente, venue, "market_data")
+        if venue != self.venue:
+            logger.info(f"[{self.nombre}] Sondeo REST pasa de {self.venue} a {venue} por salud del venue")
+        self.venue = venue
+        self.exchange = self.clients[venue]
+        return self.exchange
+
+    def _build_data(self, symbol: str, last: float) -> Dict[str, Any]:
+        return {"symbol": symbol, "price": last, **self.indicadores.snapshot(symbol, last)}
+
+    async def _sync_candles(self, exchange, symbol: str) -> None:
+        # Sólo se piden las velas posteriores a la última incorporada al motor
+        ultimo = self.indicadores.estado(symbol).ultimo_timestamp
+        if self.store:
+            # Con almacén local las velas cerradas se comparten con otras entidades y procesos
+            ahora = int(reloj_actual().time() * 1000)
+            desde = ahora - self.warmup_candles * timeframe_ms('1h')
+            await self.store.top_up(exchange, self.venue, symbol, '1h', since=desde, now_ms=ahora)
+            velas = self.store.rows(self.venue, symbol, '1h', since=ultimo + 1 if ultimo else desde)
+            self.indicadores.actualizar_ohlcv(symbol, velas, incluye_abierta=False)
+            return
+        ohlcv = await exchange.fetch_ohlcv(symbol, timeframe='1h', since=ultimo + 1 if ultimo else None,
+                                           limit=self.warmup_candles + 1)
+        self.indicadores.actualizar_ohlcv(symbol, ohlcv)
+
+    async def _on_stream_update(self, symbol: str, estado: Dict[str, Any]) -> None:
+        kline = estado.get("kline")
+        # El stream es compartido: manda el intervalo con el que lo abrió el primer watcher
+        klines_1m = self.stream.kline_interval == "1m"
+        if estado["tipo"] == "kline" and kline["closed"]:
+            if klines_1m:
+                # Las klines de 1m alimentan al agregador, que cierra las velas de 1h del motor
+                self.candles.add_bar(symbol, kline["open_time"], kline["open"], kline["high"], kline["low"],
+                                     kline["close"], kline["volume"])
+            else:
+                self.indicadores.actualizar(symbol, kline["close"], kline["high"], kline["low"], kline["open_time"])
+        elif estado["tipo"] == "trade" and not klines_1m:
+            self.candles.add_trade(symbol, estado["price"], estado.get("last_qty", 0.0), estado["timestamp"])
+        datos = self._build_data(symbol, estado["price"])
+        datos["source"] = "stream"
+        datos = self.delta.prepare(symbol, datos)
+        if datos is None:
+            return
+        await self.controller.publicar_evento(
+            canal=self.canal,
+            datos=datos,
+            destino="trading"
+        )
+
+    def _refresh_positions(self) -> None:
+        nucleus = getattr(self.controller, "nucleus", None)
+        if nucleus is not None:
+            self.scheduler.set_positions(posiciones_abiertas(nucleus.bloques))
+
+    async def _poll(self, due: List[str]) -> None:
+        """Refresca por REST los símbolos que toca sondear."""
+        raise NotImplementedError
+
+    async def monitorear(self):
+        reloj = reloj_actual()
+        while not self._shutdown:
+            self._refresh_positions()
+            due = self.scheduler.due(self.symbols)
+            if due:
+                # REST sólo como respaldo cuando el stream no está vivo
+                if not (self.stream and self.stream.is_live(self.update_interval, due)):
+                    await self._poll(due)
+                for symbol in due:
+                    self.scheduler.mark_polled(symbol)
+            await reloj.sleep(self.scheduler.next_wakeup(self.symbols))
+
+    def _on_candle_close(self, symbol: str, timeframe: str, vela) -> None:
+        if timeframe == "1h" and symbol in self.symbols and self.stream and self.stream.kline_interval == "1m":
+            self.indicadores.actualizar(symbol, vela[4], vela[2], vela[3], int(vela[0]))
+
+    async def init(self) -> None:
+        await super().init()
+        self.candles.subscribe(self._on_candle_close)
+        if self.indicator_state_path:
+            self.indicadores.cargar(self.indicator_state_path)
+        if self.streaming.get("enabled"):
+            # Una sola conexión por exchange compartida por todos los watchers
+            self.stream = get_market_stream(
+                self.exchange_name, self.streaming.get("url", "wss://stream.binance.com:9443/ws"),
+                self.streaming.get("kline_interval", "1h")
+            )
+            self.stream.subscribe(self.symbols, self._on_stream_update)
+            await self.stream.start()
+        asyncio.create_task(self.monitorear())
+
+    async def shutdown(self) -> None:
+        self.candles.unsubscribe(self._on_candle_close)
+        if self.stream:
+            await release_market_stream(self.exchange_name, self.symbols, self._on_stream_update)
+            self.stream = None
+        if self.indicator_state_path:
+            self.indicadores.guardar(self.indicator_state_path)
+        for venue in self.clients:
+            await get_exchange_pool().release(venue, "spot")
+        self.clients = {}
+        self.exchange = None
+        logger.info(f"[{self.nombre}] Apagado")
+        await super().shutdown()
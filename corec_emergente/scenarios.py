@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+scenarios.py
+Generador vectorizado de escenarios de mercado (estable, alcista, caída, volátil, estrés).
+
+Un escenario se compone de tramos de regímenes (o de una cadena de Markov de
+regímenes). Cada régimen fija los rangos de retorno horario, RSI, volatilidad y
+variables macro. Todas las series de todos los símbolos se generan en una sola
+llamada como arrays (S, T) con un generador con semilla, de modo que el mismo
+escenario se puede reproducir en Nucleus, en el BacktestManager y en las
+simulaciones de pruebas.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from indicators import serie_indicadores
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+REGIMENES = {
+    "estable": {"retorno": (0.98, 1.02), "rsi": (40, 60), "volatilidad": (0.01, 0.01),
+                "dxy": (-0.1, 0.1), "sp500": (-0.005, 0.005), "recorte_fed": 0.0, "fallo_api": 0.0},
+    "alcista": {"retorno": (1.02, 1.05), "rsi": (60, 80), "volatilidad": (0.05, 0.05),
+                "dxy": (-0.1, -0.05), "sp500": (0.01, 0.02), "recorte_fed": 0.1, "fallo_api": 0.0},
+    "caida": {"retorno": (0.85, 0.95), "rsi": (20, 40), "volatilidad": (0.1, 0.1),
+              "dxy": (0.1, 0.2), "sp500": (-0.05, -0.02), "recorte_fed": 0.0, "fallo_api": 0.0},
+    "post_caida": {"retorno": (0.98, 1.02), "rsi": (20, 40), "volatilidad": (0.02, 0.02),
+                   "dxy": (0.1, 0.2), "sp500": (-0.05, -0.02), "recorte_fed": 0.0, "fallo_api": 0.0},
+    "pre_halving": {"retorno": (1.01, 1.03), "rsi": (60, 75), "volatilidad": (0.04, 0.04),
+                    "dxy": (-0.05, -0.02), "sp500": (0.005, 0.01), "recorte_fed": 0.0, "fallo_api": 0.0},
+    "correccion": {"retorno": (0.90, 0.95), "rsi": (25, 40), "volatilidad": (0.06, 0.06),
+                   "dxy": (0.05, 0.1), "sp500": (-0.02, -0.01), "recorte_fed": 0.0, "fallo_api": 0.0},
+    "recuperacion": {"retorno": (1.00, 1.02), "rsi": (45, 55), "volatilidad": (0.02, 0.02),
+                     "dxy": (-0.03, -0.01), "sp500": (0.0, 0.005), "recorte_fed": 0.0, "fallo_api": 0.0},
+    "estres": {"retorno": (0.95, 1.05), "rsi": (30, 70), "volatilidad": (0.02, 0.08),
+               "dxy": (-0.2, 0.2), "sp500": (-0.02, 0.02), "recorte_fed": 0.0, "fallo_api": 0.2}
+}
+
+# Tramos (régimen, horas); None ocupa el resto del escenario. "fed" fija subidas de tipos en horas concretas.
+ESCENARIOS = {
+    "stable": {"tramos": [("estable", None)]},
+    "bullish": {"tramos": [("alcista", None)]},
+    "crash": {"tramos": [("caida", 12), ("post_caida", None)], "fed": {0: 0.25}},
+    "volatile": {"tramos": [("pre_halving", 240), ("correccion", 120), ("recuperacion", None)], "fed": {240: 0.25}},
+    "stress": {"tramos": [("estres", None)]},
+    "markov": {
+        "markov": {
+            "estable": {"estable": 0.97, "alcista": 0.015, "correccion": 0.01, "estres": 0.005},
+            "alcista": {"alcista": 0.95, "estable": 0.03, "correccion": 0.02},
+            "correccion": {"correccion": 0.9, "recuperacion": 0.08, "estres": 0.02},
+            "recuperacion": {"recuperacion": 0.93, "estable": 0.05, "alcista": 0.02},
+            "estres": {"estres": 0.9, "correccion": 0.05, "estable": 0.05}
+        },
+        "inicial": "estable"
+    }
+}
+
+PRECIOS_INICIALES = {"BTC": 50000.0, "ETH": 3000.0}
+PRECIO_INICIAL_ALTCOIN = 50.0
+
+
+def precio_inicial(simbolo: str) -> float:
+    for base, precio in PRECIOS_INICIALES.items():
+        if base in simbolo:
+            return precio
+    return PRECIO_INICIAL_ALTCOIN
+
+
+def regimenes_markov(horas: int, transiciones: Dict[str, Dict[str, float]], inicial: str,
+                     rng: np.random.Generator) -> List[str]:
+    """Secuencia de regímenes hora a hora según una cadena de Markov."""
+    nombres = list(transiciones)
+    indice = {n: i for i, n in enumerate(nombres)}
+    matriz = np.zeros((len(nombres), len(nombres)))
+    for origen, destinos in transiciones.items():
+        for destino, p in destinos.items():
+            matriz[indice[origen], indice[destino]] = p
+    acumulada = np.cumsum(matriz / matriz.sum(axis=1, keepdims=True), axis=1)
+    sorteos = rng.random(horas)
+    estado = indice[inicial]
+    secuencia = []
+    for u in sorteos:
+        secuencia.append(nombres[estado])
+        estado = min(int(np.searchsorted(acumulada[estado], u, side="right")), len(nombres) - 1)
+    return secuencia
+
+
+def _regimenes_por_hora(definicion: Dict[str, Any], horas: int, rng: np.random.Generator) -> List[str]:
+    if "markov" in definicion:
+        return regimenes_markov(horas, definicion["markov"], definicion["inicial"], rng)
+    secuencia = []
+    for regimen, duracion in definicion["tramos"]:
+        restantes = horas - len(secuencia)
+        secuencia.extend([regimen] * (restantes if duracion is None else min(duracion, restantes)))
+    # Si los tramos no cubren el escenario se prolonga el último régimen
+    secuencia.extend([secuencia[-1]] * (horas - len(secuencia)))
+    return secuencia
+
+
+class Escenario:
+    def __init__(self, nombre: str, simbolos: List[str], regimenes: List[str], historial: np.ndarray,
+                 rsi: np.ndarray, volatilidad: np.ndarray, volumen: np.ndarray, macro: Dict[str, np.ndarray],
+                 fallo_api: np.ndarray, ventana: int):
+        self.nombre = nombre
+        self.simbolos = simbolos
+        self.regimenes = regimenes
+        self.historial = historial
+        self.ventana = ventana
+        self.precios = historial[:, ventana:]
+        self.rsi = rsi
+        self.volatilidad = volatilidad
+        self.volumen = volumen
+        self.macro = macro
+        self.fallo_api = fallo_api
+        medias = np.lib.stride_tricks.sliding_window_view(historial, ventana, axis=1)[:, 1:].mean(axis=2)
+        self.sma_signal = np.sign(self.precios - medias).astype(int)
+
+    @property
+    def horas(self) -> int:
+        return self.precios.shape[1]
+
+    def snapshot(self, hora: int) -> Dict[str, Any]:
+        """Datos de mercado y macro de una hora con el formato de los eventos de trading."""
+        mercado = {
+            s: {
+                "price": float(self.precios[i, hora]),
+                "rsi": float(self.rsi[i, hora]),
+                "sma_signal": int(self.sma_signal[i, hora]),
+                "volatilidad": float(self.volatilidad[i, hora]),
+                "volume": float(self.volumen[i, hora]),
+                "prices": self.historial[i, hora + 1:hora + 1 + self.ventana].tolist()
+            }
+            for i, s in enumerate(self.simbolos)
+        }
+        macro = {clave: float(serie[hora]) for clave, serie in self.macro.items()}
+        return {"mercado": mercado, "macro": macro, "fallo_api": bool(self.fallo_api[hora])}
+
+    def datos_nucleus(self, simbolo: Optional[str] = None) -> Dict[str, List[float]]:
+        """Serie de un símbolo en el formato de Nucleus.cargar_datos_mercado."""
+        i = self.simbolos.index(simbolo) if simbolo else 0
+        sma = serie_indicadores(self.precios[i])["sma"]
+        return {
+            "precios": self.precios[i].tolist(),
+            "rsi": self.rsi[i].tolist(),
+            "sma": sma.tolist(),
+            "dxy": self.macro["DXY"].tolist()
+        }
+
+    def dataframe(self, simbolo: str, inicio: str = "2024-01-01", freq: str = "1h") -> pd.DataFrame:
+        """Velas OHLCV de un símbolo; la apertura es el cierre anterior y la mecha depende de la volatilidad."""
+        i = self.simbolos.index(simbolo)
+        cierre = self.precios[i]
+        apertura = self.historial[i, self.ventana - 1:-1]
+        mecha = 1 + self.volatilidad[i] / 2
+        return pd.DataFrame({
+            "timestamp": pd.date_range(start=inicio, periods=self.horas, freq=freq),
+            "open": apertura,
+            "high": np.maximum(apertura, cierre) * mecha,
+            "low": np.minimum(apertura, cierre) / mecha,
+            "close": cierre,
+            "volume": self.volumen[i]
+        })
+
+
+def generar_escenario(nombre: str, horas: int = 720, simbolos: Sequence[str] = ("BTC/USDT",),
+                      semilla: Optional[int] = None, caidas: Sequence[Tuple[int, float]] = (),
+                      prob_fallo_api: Optional[float] = None, ventana: int = 50) -> Escenario:
+    """Genera todas las series de un escenario de una vez.
+
+    caidas: pares (hora, magnitud) que aplican una caída adicional a todos los
+    símbolos en esa hora. prob_fallo_api sustituye la probabilidad de fallo de
+    API de los regímenes.
+    """
+    if nombre not in ESCENARIOS:
+        raise ValueError(f"[Scenarios] Escenario desconocido: {nombre}")
+    rng = np.random.default_rng(semilla)
+    simbolos = list(simbolos)
+    definicion = ESCENARIOS[nombre]
+    regimenes = _regimenes_por_hora(definicion, horas, rng)
+
+    def parametro(clave: str) -> np.ndarray:
+        return np.array([REGIMENES[r][clave] for r in regimenes], dtype=float)
+
+    forma = (len(simbolos), horas)
+    retorno = parametro("retorno")
+    retornos = rng.uniform(retorno[:, 0], retorno[:, 1], size=forma)
+    for hora, magnitud in caidas:
+        if 0 <= hora < horas:
+            retornos[:, hora] *= 1 - magnitud
+    iniciales = np.array([precio_inicial(s) for s in simbolos])
+    historial = np.empty((len(simbolos), ventana + horas))
+    historial[:, :ventana] = iniciales[:, None]
+    historial[:, ventana:] = iniciales[:, None] * np.cumprod(retornos, axis=1)
+
+    rango_rsi = parametro("rsi")
+    rango_vol = parametro("volatilidad")
+    rsi = rng.uniform(rango_rsi[:, 0], rango_rsi[:, 1], size=forma)
+    volatilidad = rng.uniform(rango_vol[:, 0], rango_vol[:, 1], size=forma)
+    for hora, magnitud in caidas:
+        if 0 <= hora < horas:
+            volatilidad[:, hora] = np.maximum(volatilidad[:, hora], magnitud)
+            rsi[:, hora] = np.minimum(rsi[:, hora], 30)
+
+    rango_dxy = parametro("dxy")
+    rango_sp = parametro("sp500")
+    fed = np.where(rng.random(horas) < parametro("recorte_fed"), -0.25, 0.0)
+    for hora, cambio in definicion.get("fed", {}).items():
+        if hora < horas:
+            fed[hora] = cambio
+    macro = {
+        "DXY": 100.0 + np.cumsum(rng.uniform(rango_dxy[:, 0], rango_dxy[:, 1])),
+        "SP500": rng.uniform(rango_sp[:, 0], rango_sp[:, 1]),
+        "Nasdaq": np.zeros(horas),
+        "Gold": np.zeros(horas),
+        "Oil": np.zeros(horas),
+        "altcoins_volume": np.full(horas, 1000000.0),
+        "fed_rate_change": fed
+    }
+    prob_fallo = np.full(horas, prob_fallo_api) if prob_fallo_api is not None else parametro("fallo_api")
+    fallo_api = rng.random(horas) < prob_fallo
+
+    logger.debug("[Scenarios] Escenario %s generado: %d símbolos x %d horas", nombre, len(simbolos), horas)
+    return Escenario(nombre, simbolos, regimenes, historial, rsi, volatilidad,
+                     np.full(forma, 1000000.0), macro, fallo_api, ventana)
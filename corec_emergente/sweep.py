@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+sweep.py
+Barrido paralelo de parámetros sobre configuraciones del Nucleus.
+
+Cada configuración se simula en un proceso independiente con el transporte en
+proceso (CanalLocal). Las trayectorias de mercado se generan una sola vez por
+semilla y se comparten entre todas las configuraciones, de modo que las
+diferencias de resultado se deben a los parámetros y no al azar del mercado.
+Los resultados se escriben línea a línea en un fichero JSONL que actúa a la vez
+de tabla de resultados y de caché: al relanzar un barrido interrumpido se
+omiten las configuraciones ya simuladas.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Sequence
+from nucleus import Nucleus, generar_serie_mercado
+from entities.nano import NanoEntidad
+from blocks.symbiotic import BloqueSimbiotico
+from plugins.viviente.main import PluginViviente
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PARAMETROS_DEFECTO = {
+    "memoria_max": 50,
+    "fitness_threshold": 0.01,
+    "entidades_por_bloque": 10,
+    "num_bloques": 3,
+    "fraccion_posicion": 0.1,
+    "memoria_max_global": 200
+}
+
+
+def generar_grid(espacio: Dict[str, Sequence[Any]]) -> List[Dict[str, Any]]:
+    """Producto cartesiano de los valores de cada parámetro."""
+    nombres = sorted(espacio)
+    return [dict(zip(nombres, valores)) for valores in itertools.product(*(espacio[n] for n in nombres))]
+
+
+def generar_aleatorio(espacio: Dict[str, Any], n: int, semilla: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Búsqueda aleatoria: las listas se muestrean por elección y las tuplas (min, max) de forma uniforme."""
+    rng = random.Random(semilla)
+    configs = []
+    for _ in range(n):
+        params = {}
+        for nombre in sorted(espacio):
+            valores = espacio[nombre]
+            if isinstance(valores, tuple) and len(valores) == 2:
+                bajo, alto = valores
+                if isinstance(bajo, int) and isinstance(alto, int):
+                    params[nombre] = rng.randint(bajo, alto)
+                else:
+                    params[nombre] = rng.uniform(bajo, alto)
+            else:
+                params[nombre] = rng.choice(list(valores))
+        configs.append(params)
+    return configs
+
+
+def clave_config(params: Dict[str, Any], semilla: int, ciclos: int) -> str:
+    contenido = json.dumps({"params": params, "semilla": semilla, "ciclos": ciclos}, sort_keys=True)
+    return hashlib.sha1(contenido.encode()).hexdigest()
+
+
+async def _simular_config(params: Dict[str, Any], semilla: int, ciclos: int, datos_mercado: Dict[str, List[float]]) -> Dict[str, Any]:
+    random.seed(semilla)
+    p = {**PARAMETROS_DEFECTO, **params}
+    nucleus = Nucleus({
+        "transporte": "local",
+        "memoria_max_global": p["memoria_max_global"],
+        "fitness_threshold": p["fitness_threshold"],
+        "log_level": "WARNING"
+    })
+    await nucleus.registrar_plugin("viviente", PluginViviente(nucleus))
+    for b in range(p["num_bloques"]):
+        entidades = [NanoEntidad(id=f"ent_{b}_{i}", canal=nucleus.canal) for i in range(p["entidades_por_bloque"])]
+        for entidad in entidades:
+            await nucleus.registrar_entidad(entidad)
+        bloque = BloqueSimbiotico(
+            id=f"bloque_{b}",
+            entidades=entidades,
+            canal=nucleus.canal,
+            config={"capital": 10000, "memoria_max": p["memoria_max"], "fraccion_posicion": p["fraccion_posicion"]}
+        )
+        await nucleus.registrar_bloque(bloque)
+    try:
+        return await nucleus.simular(ciclos, datos_mercado=datos_mercado)
+    finally:
+        await nucleus.shutdown()
+
+
+def _ejecutar_config(params: Dict[str, Any], semilla: int, ciclos: int, datos_mercado: Dict[str, List[float]]) -> Dict[str, Any]:
+    logging.disable(logging.INFO)
+    return asyncio.run(_simular_config(params, semilla, ciclos, datos_mercado))
+
+
+class BarridoParametros:
+    def __init__(self, configs: List[Dict[str, Any]], semillas: Sequence[int] = (0,), ciclos: int = 720,
+                 resultados_path: str = "sweep_resultados.jsonl", max_workers: Optional[int] = None):
+        self.configs = configs
+        self.semillas = list(semillas)
+        self.ciclos = ciclos
+        self.resultados_path = resultados_path
+        self.max_workers = max_workers
+        self.resultados = {}
+
+    def _cargar_resultados(self) -> Dict[str, Dict[str, Any]]:
+        resultados = {}
+        if not os.path.exists(self.resultados_path):
+            return resultados
+        with open(self.resultados_path, "r") as f:
+            for linea in f:
+                linea = linea.strip()
+                if not linea:
+                    continue
+                try:
+                    fila = json.loads(linea)
+                    resultados[fila["clave"]] = fila
+                except (json.JSONDecodeError, KeyError):
+                    # Línea truncada por una interrupción: se vuelve a simular
+                    logger.warning("[BarridoParametros] Línea de resultados inválida ignorada")
+        return resultados
+
+    def pendientes(self) -> List[Dict[str, Any]]:
+        self.resultados = self._cargar_resultados()
+        trabajos = []
+        for params in self.configs:
+            for semilla in self.semillas:
+                clave = clave_config(params, semilla, self.ciclos)
+                if clave not in self.resultados:
+                    trabajos.append({"clave": clave, "params": params, "semilla": semilla})
+        return trabajos
+
+    def ejecutar(self) -> List[Dict[str, Any]]:
+        trabajos = self.pendientes()
+        logger.info("[BarridoParametros] %d simulaciones en caché, %d pendientes", len(self.resultados), len(trabajos))
+        if not trabajos:
+            return self.tabla()
+
+        datos = {s: generar_serie_mercado(self.ciclos, s) for s in {t["semilla"] for t in trabajos}}
+        if os.path.exists(self.resultados_path) and os.path.getsize(self.resultados_path) > 0:
+            with open(self.resultados_path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    with open(self.resultados_path, "a") as salida:
+                        salida.write("\n")
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool, open(self.resultados_path, "a") as salida:
+            futuros = {
+                pool.submit(_ejecutar_config, t["params"], t["semilla"], self.ciclos, datos[t["semilla"]]): t
+                for t in trabajos
+            }
+            for futuro in as_completed(futuros):
+                trabajo = futuros[futuro]
+                try:
+                    metricas = futuro.result()
+                except Exception as e:
+                    logger.error(f"[BarridoParametros] Error simulando {trabajo['params']} (semilla {trabajo['semilla']}): {e}")
+                    continue
+                fila = {**trabajo, "ciclos": self.ciclos, "metricas": metricas}
+                salida.write(json.dumps(fila) + "\n")
+                salida.flush()
+                self.resultados[trabajo["clave"]] = fila
+                logger.info("[BarridoParametros] %s semilla=%s ROI=%.2f%%", trabajo["params"], trabajo["semilla"], metricas["roi"] * 100)
+        return self.tabla()
+
+    def tabla(self, orden: str = "roi") -> List[Dict[str, Any]]:
+        """Filas planas (parámetros + métricas) de las configuraciones del barrido, ordenadas por una métrica."""
+        claves = {clave_config(p, s, self.ciclos) for p in self.configs for s in self.semillas}
+        filas = [
+            {**fila["params"], "semilla": fila["semilla"], **fila["metricas"]}
+            for clave, fila in self.resultados.items() if clave in claves
+        ]
+        return sorted(filas, key=lambda f: f.get(orden, 0), reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de parámetros sobre Nucleus.simular")
+    parser.add_argument("espacio", help="JSON con el espacio de parámetros")
+    parser.add_argument("--modo", choices=["grid", "aleatorio"], default="grid")
+    parser.add_argument("--n", type=int, default=20, help="Configuraciones en modo aleatorio")
+    parser.add_argument("--semillas", type=int, nargs="+", default=[0])
+    parser.add_argument("--ciclos", type=int, default=720)
+    parser.add_argument("--salida", default="sweep_resultados.jsonl")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.espacio, "r") as f:
+        espacio = json.load(f)
+    if args.modo == "grid":
+        configs = generar_grid(espacio)
+    else:
+        # En JSON los rangos continuos se expresan como {"min": x, "max": y}
+        espacio = {k: (v["min"], v["max"]) if isinstance(v, dict) else v for k, v in espacio.items()}
+        configs = generar_aleatorio(espacio, args.n, semilla=args.semillas[0])
+    barrido = BarridoParametros(configs, args.semillas, args.ciclos, args.salida, args.workers)
+    for fila in barrido.ejecutar():
+        print(json.dumps(fila))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+conftest.py
+Fixtures compartidas por las pruebas del plugin de trading: controlador falso,
+reloj virtual y pool de exchanges limpio con los singletons get_* reiniciados.
+"""
+
+import pytest
+from types import SimpleNamespace
+from clock import RelojVirtual, usar_reloj, RelojSistema
+from corec.plugins.trading.exchange_pool import ExchangeClientPool
+import corec.plugins.trading.candle_aggregator as candle_aggregator
+import corec.plugins.trading.exchange_pool as exchange_pool
+import corec.plugins.trading.market_stream as market_stream
+import corec.plugins.trading.order_tracker as order_tracker
+import corec.plugins.trading.polling_scheduler as polling_scheduler
+import corec.plugins.trading.portfolio_risk as portfolio_risk
+import corec.plugins.trading.rate_governor as rate_governor
+import corec.plugins.trading.risk_engine as risk_engine
+import corec.plugins.trading.venue_health as venue_health
+
+class FakeController:
+    """Guarda los eventos publicados y expone un núcleo con bloques de BTC y ETH."""
+
+    def __init__(self):
+        self.eventos = []
+        self.nucleus = SimpleNamespace(market_data={}, bloques=[SimpleNamespace(id="bloque_BTC/USDT", capital=1000.0),
+                                                                SimpleNamespace(id="bloque_ETH/USDT", capital=1000.0)])
+
+    async def publicar_evento(self, canal, datos, destino):
+        self.eventos.append(datos)
+
+@pytest.fixture
+def fake_controller():
+    return FakeController()
+
+@pytest.fixture
+def virtual_clock():
+    reloj = RelojVirtual()
+    usar_reloj(reloj)
+    yield reloj
+    usar_reloj(RelojSistema())
+
+@pytest.fixture
+def sim_pool(monkeypatch):
+    """Pool de exchanges nuevo; el resto de singletons se recrea al primer get_*."""
+    for modulo, nombre in ((order_tracker, "_tracker"), (venue_health, "_health"), (risk_engine, "_engine"),
+                           (portfolio_risk, "_portfolio"), (rate_governor, "_governor"),
+                           (candle_aggregator, "_aggregator")):
+        monkeypatch.setattr(modulo, nombre, None)
+    monkeypatch.setattr(polling_scheduler, "_schedulers", {})
+    monkeypatch.setattr(market_stream, "_market_streams", {})
+    pool = ExchangeClientPool()
+    monkeypatch.setattr(exchange_pool, "_pool", pool)
+    return pool
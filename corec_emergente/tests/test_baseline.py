@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_baseline.py
+Pruebas unitarias para la versión vectorizada del sistema de trading tradicional.
+"""
+
+import numpy as np
+from nucleus import SistemaTradingTradicional, generar_serie_mercado
+from baseline import indicadores_tradicionales, simular_tradicional, simular_variantes
+
+def test_indicadores_coinciden_con_nucleus():
+    # Nucleus usa el motor incremental (RSI de Wilder); la SMA completa y la semilla del RSI coinciden
+    datos = generar_serie_mercado(500, semilla=3)
+    rsi, sma = indicadores_tradicionales(datos["precios"])
+    assert np.allclose(sma[50:], datos["sma"][50:])
+    assert np.isclose(rsi[14], datos["rsi"][14])
+
+def test_curva_coincide_con_sistema_tradicional():
+    rng = np.random.default_rng(1)
+    precios = np.array(generar_serie_mercado(2000, semilla=1)["precios"])
+    rsi = rng.uniform(0, 100, len(precios))
+    sma_signal = rng.choice([-1, 1], len(precios))
+
+    sistema = SistemaTradingTradicional(10000)
+    esperado = []
+    for t, precio in enumerate(precios):
+        sistema.procesar({"precio": precio, "rsi": rsi[t], "sma_signal": sma_signal[t]})
+        esperado.append(sistema.capital + sistema.posicion * precio)
+
+    curva = simular_tradicional(precios, rsi, sma_signal, 10000)
+    assert np.allclose(curva, esperado, rtol=1e-9)
+
+def test_variantes_sobre_varias_trayectorias():
+    precios = np.vstack([generar_serie_mercado(300, semilla=s)["precios"] for s in range(4)])
+    variantes = [{}, {"rsi_compra": 40, "rsi_venta": 60}, {"fraccion": 0.25, "periodo_sma": 20}]
+    curvas = simular_variantes(precios, variantes)
+    assert curvas.shape == (3, 4, 300)
+
+    rsi, sma = indicadores_tradicionales(precios[2])
+    individual = simular_tradicional(precios[2], rsi, np.where(precios[2] > sma, 1, -1), 10000, rsi_compra=40, rsi_venta=60)
+    assert np.allclose(curvas[1, 2], individual)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_benchmarks.py
+Pruebas unitarias para la suite de benchmarks de escalado del enjambre.
+"""
+
+import pytest
+from benchmarks.swarm import ejecutar_suite, comparar
+
+@pytest.mark.asyncio
+async def test_suite_minima_produce_metricas():
+    casos = {"nano": [10], "viviente": [10], "bloque": [10], "nucleus": [(10, 2)]}
+    resultados = await ejecutar_suite(casos, ciclos=5, ciclos_nucleus=2, tiempo_max=5)
+    assert set(resultados) == {"nano/10", "viviente/10", "bloque/10", "nucleus/10x2"}
+    for resultado in resultados.values():
+        assert resultado["ciclos"] > 0
+        assert resultado["ciclos_por_segundo"] > 0
+        assert resultado["latencia_p50_ms"] <= resultado["latencia_p99_ms"]
+    assert resultados["nano/10"]["memoria_por_entidad_bytes"] > 0
+    assert resultados["nucleus/10x2"]["ciclos"] == 2
+
+def test_comparar_detecta_regresiones():
+    baseline = {"nano/10": {"ciclos_por_segundo": 100.0, "latencia_p99_ms": 10.0, "memoria_por_entidad_bytes": 1000}}
+    actual = {"nano/10": {"ciclos_por_segundo": 80.0, "latencia_p99_ms": 10.5, "memoria_por_entidad_bytes": 900}}
+    filas = {f["metrica"]: f for f in comparar(actual, baseline, tolerancia=0.1)}
+    assert filas["ciclos_por_segundo"]["regresion"]
+    assert not filas["latencia_p99_ms"]["regresion"]
+    assert not filas["memoria_por_entidad_bytes"]["regresion"]
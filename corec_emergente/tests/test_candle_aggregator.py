@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_candle_aggregator.py
+Pruebas unitarias para el agregador de velas multi-timeframe.
+"""
+
+import numpy as np
+import pandas as pd
+from corec.plugins.trading.candle_aggregator import CandleAggregator, RingBuffer, aggregate_array
+
+MINUTO = 60000
+
+def velas_1m(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    cierres = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    aperturas = np.r_[100, cierres[:-1]]
+    return np.column_stack((np.arange(n) * MINUTO, aperturas, np.maximum(aperturas, cierres) + 0.2,
+                            np.minimum(aperturas, cierres) - 0.2, cierres, rng.uniform(1, 5, n)))
+
+def test_klines_1m_coinciden_con_resample_de_pandas():
+    velas = velas_1m(600)
+    agregador = CandleAggregator(timeframes=("1m", "5m", "1h"))
+    cerradas = []
+    agregador.subscribe(lambda s, tf, v: cerradas.append((tf, v[0])))
+    for v in velas:
+        agregador.add_bar("BTC/USDT", *v)
+    frame = pd.DataFrame(velas, columns=["ts", "open", "high", "low", "close", "volume"])
+    frame.index = pd.to_datetime(frame["ts"], unit="ms")
+    horas = frame.resample("1h").agg({"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"})
+    obtenidas = agregador.candles("BTC/USDT", "1h", include_open=True)
+    assert np.allclose(obtenidas[:, 1:], horas.to_numpy())
+    assert len(agregador.candles("BTC/USDT", "5m")) == 119
+    assert ("1h", 0) in cerradas and ("1h", 9 * 60 * MINUTO) not in cerradas
+    agregador.flush(600 * MINUTO)
+    assert len(agregador.candles("BTC/USDT", "1h")) == 10
+    assert np.allclose(aggregate_array(velas, "1h"), agregador.candles("BTC/USDT", "1h"))
+
+def test_trades_y_datos_atrasados():
+    agregador = CandleAggregator(timeframes=("1m",))
+    agregador.add_trade("ETH/USDT", 10, 1, 1000)
+    agregador.add_trade("ETH/USDT", 12, 2, 20000)
+    agregador.add_trade("ETH/USDT", 9, 1, 59000)
+    agregador.add_trade("ETH/USDT", 11, 1, 61000)
+    agregador.add_trade("ETH/USDT", 50, 1, 30000)
+    assert agregador.candles("ETH/USDT", "1m").tolist() == [[0, 10, 12, 9, 9, 4]]
+    assert agregador.last("ETH/USDT", "1m") == [60000, 11, 11, 11, 11, 1]
+    assert agregador.late == 1
+
+def test_ring_buffer_circular():
+    buffer = RingBuffer(3)
+    for i in range(5):
+        buffer.append([i] * 6)
+    assert len(buffer) == 3
+    assert buffer.array()[:, 0].tolist() == [2, 3, 4]
+    assert buffer.array(2)[:, 0].tolist() == [3, 4]
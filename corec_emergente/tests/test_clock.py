@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_clock.py
+Pruebas unitarias para el reloj virtual de eventos discretos.
+"""
+
+import pytest
+import time
+from datetime import datetime, timedelta
+from clock import RelojVirtual, PlanificadorVirtual, RelojSistema, reloj_actual, usar_reloj, crear_scheduler
+
+@pytest.mark.asyncio
+async def test_trabajo_intervalo_en_un_dia_virtual():
+    reloj = RelojVirtual(inicio=datetime(2024, 1, 1))
+    planificador = PlanificadorVirtual(reloj)
+    ejecuciones = []
+
+    async def trabajo():
+        ejecuciones.append(reloj.utcnow())
+
+    planificador.add_job(trabajo, "interval", id="trabajo", minutes=15)
+    planificador.start()
+    await reloj.avanzar(24 * 3600)
+    assert len(ejecuciones) == 96
+    assert ejecuciones[0] == datetime(2024, 1, 1, 0, 15)
+    assert reloj.utcnow() == datetime(2024, 1, 2)
+
+@pytest.mark.asyncio
+async def test_cron_liquidacion_una_vez_por_dia():
+    reloj = RelojVirtual(inicio=datetime(2024, 1, 1, 12))
+    planificador = PlanificadorVirtual(reloj)
+    ejecuciones = []
+    planificador.add_job(lambda: ejecuciones.append(reloj.utcnow()), "cron", id="settlement", hour=23, minute=59)
+    planificador.start()
+    await reloj.avanzar(3 * 24 * 3600)
+    assert ejecuciones == [datetime(2024, 1, d, 23, 59) for d in (1, 2, 3)]
+
+@pytest.mark.asyncio
+async def test_sleep_virtual_dentro_de_trabajo():
+    reloj = RelojVirtual(inicio=datetime(2024, 1, 1))
+    planificador = PlanificadorVirtual(reloj)
+    fases = []
+
+    async def trabajo():
+        fases.append(("inicio", reloj.utcnow()))
+        await reloj.sleep(600)
+        fases.append(("fin", reloj.utcnow()))
+
+    planificador.add_job(trabajo, "interval", id="trabajo", hours=1)
+    planificador.start()
+    await reloj.avanzar(3600)
+    assert fases == [("inicio", datetime(2024, 1, 1, 1))]
+    await reloj.avanzar(600)
+    assert fases[-1] == ("fin", datetime(2024, 1, 1, 1, 10))
+
+@pytest.mark.asyncio
+async def test_replay_de_un_anio_es_rapido():
+    reloj = RelojVirtual(inicio=datetime(2024, 1, 1))
+    usar_reloj(reloj)
+    try:
+        planificador = crear_scheduler()
+        assert isinstance(planificador, PlanificadorVirtual)
+        contador = {"ciclos": 0}
+
+        async def ciclo():
+            contador["ciclos"] += 1
+
+        planificador.add_job(ciclo, "interval", id="ciclo", hours=1)
+        planificador.start()
+        inicio = time.perf_counter()
+        for _ in range(365 * 24):
+            await reloj_actual().avanzar(3600)
+        assert contador["ciclos"] == 365 * 24
+        assert reloj.utcnow() - datetime(2024, 1, 1) == timedelta(days=365)
+        assert time.perf_counter() - inicio < 30
+    finally:
+        usar_reloj(RelojSistema())
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_conflation.py
+Pruebas unitarias para el buffer de conflación de datos de mercado.
+"""
+
+from corec.plugins.trading.conflation import ConflatingBuffer
+
+def test_solo_el_ultimo_snapshot_por_simbolo():
+    buffer = ConflatingBuffer()
+    for i in range(100):
+        buffer.put("BTC/USDT", {"price": 50000 + i})
+    buffer["ETH/USDT"] = {"price": 3000}
+    assert buffer.pending() == 2
+    cambios = buffer.drain()
+    assert cambios == {"BTC/USDT": {"price": 50099}, "ETH/USDT": {"price": 3000}}
+    assert buffer.stats()["conflated"] == 99
+    assert buffer.drain() == {}
+    assert buffer.get("BTC/USDT")["price"] == 50099
+
+def test_marcas_de_sucio():
+    buffer = ConflatingBuffer()
+    buffer.update({"BTC/USDT": {"price": 1}, "ETH/USDT": {"price": 2}})
+    buffer.drain()
+    buffer.put("ETH/USDT", {"price": 3})
+    assert list(buffer.drain()) == ["ETH/USDT"]
+    buffer.mark_dirty()
+    assert set(buffer.drain()) == {"BTC/USDT", "ETH/USDT"}
+    buffer.mark_dirty(["SOL/USDT"])
+    assert buffer.pending() == 0
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_delta_publisher.py
+Pruebas unitarias para la publicación por umbrales y la detección de huecos.
+"""
+
+from corec.plugins.trading.delta_publisher import DeltaPublisher, SequenceTracker
+
+def datos(price, rsi=50.0, volatilidad=0.02):
+    return {"symbol": "BTC/USDT", "price": price, "rsi": rsi, "volatilidad": volatilidad}
+
+def test_umbrales_y_heartbeat():
+    delta = DeltaPublisher({"enabled": True, "price_threshold": 0.01, "rsi_threshold": 5, "heartbeat": 60})
+    assert delta.prepare("BTC/USDT", datos(100), now=0)["seq"] == 1
+    assert delta.prepare("BTC/USDT", datos(100.5), now=10) is None
+    assert delta.prepare("BTC/USDT", datos(100.5, rsi=56), now=11)["seq"] == 2
+    assert delta.prepare("BTC/USDT", datos(100.5, rsi=56, volatilidad=0.03), now=12)["seq"] == 3
+    assert delta.prepare("BTC/USDT", datos(101.6, rsi=56, volatilidad=0.03), now=13)["seq"] == 4
+    assert delta.prepare("BTC/USDT", datos(101.6, rsi=56, volatilidad=0.03), now=72) is None
+    assert delta.prepare("BTC/USDT", datos(101.6, rsi=56, volatilidad=0.03), now=73)["seq"] == 5
+    assert delta.suppressed == 2
+
+def test_sin_modo_delta_publica_todo_con_secuencia():
+    delta = DeltaPublisher()
+    secuencias = [delta.prepare("ETH/USDT", datos(100), now=i)["seq"] for i in range(3)]
+    assert secuencias == [1, 2, 3]
+
+def test_tracker_detecta_huecos_y_atrasados():
+    delta = DeltaPublisher()
+    tracker = SequenceTracker()
+    mensajes = [delta.prepare("BTC/USDT", datos(100 + i), now=i) for i in range(5)]
+    assert tracker.accept("BTC/USDT", mensajes[0])
+    assert tracker.accept("BTC/USDT", mensajes[3])
+    assert tracker.gaps["BTC/USDT"] == 2
+    assert not tracker.accept("BTC/USDT", mensajes[2])
+    assert tracker.stale == 1
+    # Un publicador reiniciado empieza otra sesión y no se toma como atrasado
+    nuevo = DeltaPublisher().prepare("BTC/USDT", datos(200), now=0)
+    assert tracker.accept("BTC/USDT", nuevo)
+    assert tracker.accept("BTC/USDT", {"symbol": "BTC/USDT", "price": 1})
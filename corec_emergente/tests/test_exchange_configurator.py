@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_exchange_configurator.py
+Pruebas unitarias para el precalentado de exchanges y la recarga en caliente de multi_exchange_config.yaml.
+"""
+
+import pytest
+import yaml
+from corec.plugins.trading.exchange_pool import ExchangeClientPool
+import corec.plugins.trading.exchange_pool as exchange_pool
+from corec.plugins.trading.entidad_exchange_configurator import EntidadExchangeConfigurator
+
+def plantilla(tmp_path, venues):
+    ruta = tmp_path / "multi_exchange_config.yaml"
+    ruta.write_text(yaml.safe_dump(venues))
+    return ruta
+
+def venue(fee=0.001, latency=0.5):
+    return {"spot": {"enabled": True, "api_key": "k", "api_secret": "s", "fee": fee,
+                     "simulator": {"symbols": ["BTC/USDT", "ETH/USDT"], "latency": latency}}}
+
+def configurator(ruta, tmp_path, controller):
+    entidad = EntidadExchangeConfigurator({"canales": ["config_exchange"], "plantilla_path": str(ruta),
+                                           "markets_cache_dir": str(tmp_path / "cache"), "reload_interval": 5})
+    entidad.controller = controller
+    return entidad
+
+@pytest.mark.asyncio
+async def test_precalentado_en_paralelo_y_cache_en_disco(virtual_clock, sim_pool, fake_controller, tmp_path):
+    ruta = plantilla(tmp_path, {"sim_a": venue(), "sim_b": venue(), "sim_c": {"spot": {"enabled": False}}})
+    entidad = configurator(ruta, tmp_path, fake_controller)
+    tarea = virtual_clock.lanzar(entidad.init())
+    await virtual_clock.avanzar(0.5)
+    await tarea
+    # Los dos venues cargan sus mercados a la vez: una sola ronda de latencia
+    alerta = next(e for e in entidad.controller.eventos if e["tipo"] == "config_cargada")
+    assert sorted(alerta["exchanges"]) == ["sim_a_spot", "sim_b_spot"]
+    assert all(r["status"] == "ready" and r["markets"] == 2 and r["seconds"] == pytest.approx(0.5)
+               for r in alerta["prewarm"])
+    assert all(r["credentials"] == "unverified" for r in alerta["prewarm"])
+    pool = sim_pool
+    assert pool.refs("sim_a", "spot", "k") == pool.refs("sim_b", "spot", "k") == 1
+    registros = [e["exchange"] for e in entidad.controller.eventos if e["tipo"] == "registro_exchange"]
+    assert sorted(registros) == ["sim_a", "sim_b"]
+    await entidad.shutdown()
+    assert pool.refs("sim_a", "spot", "k") == 0
+    # Otro arranque lee los mercados de disco sin pedirlos al exchange
+    exchange_pool._pool = ExchangeClientPool()
+    segunda = configurator(ruta, tmp_path, fake_controller)
+    await segunda.init()
+    cliente = exchange_pool.get_exchange_pool().client("sim_a", "spot", "k")
+    assert cliente.stats["requests"] == 0
+    await segunda.shutdown()
+
+@pytest.mark.asyncio
+async def test_recarga_solo_los_venues_cambiados(virtual_clock, sim_pool, fake_controller, tmp_path):
+    ruta = plantilla(tmp_path, {"sim_a": venue(latency=0.0), "sim_b": venue(latency=0.0)})
+    entidad = configurator(ruta, tmp_path, fake_controller)
+    await entidad.init()
+    assert not await entidad.recargar_si_cambia()
+    entidad.controller.eventos.clear()
+    plantilla(tmp_path, {"sim_a": venue(fee=0.002, latency=0.0), "sim_c": venue(latency=0.0)})
+    await virtual_clock.avanzar(5)
+    eventos = entidad.controller.eventos
+    assert sorted(e["exchange"] for e in eventos if e["tipo"] == "registro_exchange") == ["sim_a", "sim_c"]
+    assert [e["exchange"] for e in eventos if e["tipo"] == "baja_exchange"] == ["sim_b"]
+    alerta = next(e for e in eventos if e["tipo"] == "config_cargada")
+    assert alerta["retirados"] == ["sim_b_spot"] and sorted(alerta["reinicializados"]) == ["sim_a_spot", "sim_c_spot"]
+    pool = sim_pool
+    assert pool.refs("sim_a", "spot", "k") == pool.refs("sim_c", "spot", "k") == 1 and pool.refs("sim_b", "spot", "k") == 0
+    await entidad.shutdown()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_exchange_pool.py
+Pruebas unitarias para el registro compartido de clientes de exchange.
+"""
+
+import pytest
+from corec.plugins.trading.exchange_pool import ExchangeClientPool
+
+class ClienteFalso:
+    creados = 0
+
+    def __init__(self, opciones):
+        ClienteFalso.creados += 1
+        self.opciones = opciones
+        self.apiKey = opciones.get("apiKey")
+        self.secret = opciones.get("secret")
+        self.markets = None
+        self.cargas = 0
+        self.cerrado = False
+
+    async def load_markets(self, reload=False):
+        self.cargas += 1
+        self.markets = {"BTC/USDT": {"symbol": "BTC/USDT"}}
+        return self.markets
+
+    def set_markets(self, mercados):
+        self.markets = mercados
+
+    async def close(self):
+        self.cerrado = True
+
+@pytest.fixture
+def pool():
+    ClienteFalso.creados = 0
+    pool = ExchangeClientPool()
+    pool.register_factory("falso", ClienteFalso)
+    return pool
+
+@pytest.mark.asyncio
+async def test_cliente_compartido_y_cerrado_al_liberar(pool):
+    a = await pool.acquire("falso", "spot")
+    b = await pool.acquire("falso", "spot")
+    assert a is b
+    assert ClienteFalso.creados == 1
+    assert pool.refs("falso", "spot") == 2
+    await pool.release("falso", "spot")
+    assert not a.cerrado
+    await pool.release("falso", "spot")
+    assert a.cerrado
+    assert pool.refs("falso", "spot") == 0
+
+@pytest.mark.asyncio
+async def test_modos_separados_y_futures(pool):
+    spot = await pool.acquire("falso", "spot")
+    futures = await pool.acquire("falso", "futures", api_key="k", api_secret="s")
+    assert spot is not futures
+    assert futures.opciones["options"]["defaultType"] == "future"
+    assert futures.apiKey == "k"
+    # Cada cuenta tiene su cliente; el público nunca recibe credenciales ajenas
+    cuenta = await pool.acquire("falso", "spot", api_key="k2", api_secret="s2")
+    assert cuenta is not spot and cuenta.apiKey == "k2" and spot.apiKey is None
+    assert await pool.acquire("falso", "spot", api_key="k2", api_secret="s2") is cuenta
+    assert pool.refs("falso", "spot", "k2") == 2 and pool.refs("falso", "spot") == 1
+    with pytest.raises(ValueError):
+        await pool.acquire("falso", "spot", api_key="k2", api_secret="otro")
+    await pool.release("falso", "spot", "k2")
+    await pool.release("falso", "spot", "k2")
+    assert cuenta.cerrado and not spot.cerrado
+    await pool.close_all()
+    assert spot.cerrado and futures.cerrado
+
+@pytest.mark.asyncio
+async def test_load_markets_cacheado(pool):
+    cliente = await pool.acquire("falso", "spot")
+    mercados = await pool.load_markets("falso", "spot")
+    await pool.load_markets("falso", "spot")
+    assert cliente.cargas == 1
+    await pool.release("falso", "spot")
+    nuevo = await pool.acquire("falso", "spot")
+    assert nuevo is not cliente
+    assert nuevo.markets == mercados
+    assert nuevo.cargas == 0
+
+@pytest.mark.asyncio
+async def test_load_markets_llega_a_los_clientes_con_credenciales(pool):
+    cuenta = await pool.acquire("falso", "spot", api_key="K", api_secret="S")
+    otra = await pool.acquire("falso", "spot", api_key="K2", api_secret="S2")
+    mercados = await pool.load_markets("falso", "spot", api_key="K")
+    # Se carga con el cliente que va a operar, sin abrir y cerrar uno público
+    assert cuenta.cargas == 1 and cuenta.markets == mercados
+    assert otra.cargas == 0 and otra.markets == mercados
+    assert ClienteFalso.creados == 2 and pool.refs("falso", "spot") == 0
+
+@pytest.mark.asyncio
+async def test_load_markets_desde_disco(pool, tmp_path):
+    pool.configure(cache_dir=str(tmp_path))
+    await pool.load_markets("falso", "spot")
+    assert (tmp_path / "falso_spot_markets.json").exists() and not list(tmp_path.glob("*.tmp"))
+    # Un proceso nuevo arranca con la caché en disco sin pedir los mercados al exchange
+    otro = ExchangeClientPool(cache_dir=str(tmp_path))
+    otro.register_factory("falso", ClienteFalso)
+    cliente = await otro.acquire("falso", "spot")
+    assert await otro.load_markets("falso", "spot") == {"BTC/USDT": {"symbol": "BTC/USDT"}}
+    assert cliente.cargas == 0 and cliente.markets == {"BTC/USDT": {"symbol": "BTC/USDT"}}
+    # Una caché caducada se ignora
+    caducado = ExchangeClientPool(markets_ttl=0, cache_dir=str(tmp_path))
+    caducado.register_factory("falso", ClienteFalso)
+    cliente = await caducado.acquire("falso", "spot")
+    await caducado.load_markets("falso", "spot")
+    assert cliente.cargas == 1
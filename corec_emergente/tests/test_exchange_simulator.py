@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_exchange_simulator.py
+Pruebas unitarias para el exchange simulado con motor de casado.
+"""
+
+import pytest
+import ccxt.async_support as ccxt
+from corec.plugins.trading.exchange_simulator import ExchangeSimulator, OrderBook
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+
+def sim(**config):
+    return ExchangeSimulator({"symbols": ["BTC/USDT"], "prices": {"BTC/USDT": 100.0},
+                              "liquidity": {"levels": 3, "step": 0.01, "size": 1.0}, **config})
+
+def test_prioridad_precio_tiempo():
+    libro = OrderBook("BTC/USDT")
+    primera = {"id": "1", "side": "sell", "price": 101.0, "remaining": 1.0, "filled": 0.0}
+    segunda = {"id": "2", "side": "sell", "price": 101.0, "remaining": 1.0, "filled": 0.0}
+    mejor = {"id": "3", "side": "sell", "price": 100.5, "remaining": 0.5, "filled": 0.0}
+    for orden in (primera, segunda, mejor):
+        libro.add(orden)
+    casados = libro.match("buy", 1.0, limit=101.0)
+    assert [(m["id"], p, q) for m, p, q in casados] == [("3", 100.5, 0.5), ("1", 101.0, 0.5)]
+    assert libro.depth("sell") == [[101.0, 1.5]]
+    assert libro.remove(segunda) and libro.depth("sell") == [[101.0, 0.5]]
+
+@pytest.mark.asyncio
+async def test_orden_de_mercado_barre_el_libro():
+    exchange = sim()
+    libro = await exchange.fetch_order_book("BTC/USDT")
+    assert libro["asks"] == [[101.0, 1.0], [102.0, 1.0], [103.0, 1.0]]
+    assert [p for p, _ in libro["bids"]] == [99.0, 98.0, 97.0]
+    orden = await exchange.create_market_order("BTC/USDT", "buy", 2.5)
+    assert orden["status"] == "closed" and orden["filled"] == pytest.approx(2.5)
+    assert orden["average"] == pytest.approx((101.0 + 102.0 + 103.0 * 0.5) / 2.5)
+    ticker = await exchange.fetch_ticker("BTC/USDT")
+    assert ticker["last"] == 103.0 and ticker["baseVolume"] == pytest.approx(2.5)
+    # Sin liquidez suficiente el resto de una orden de mercado expira
+    grande = await exchange.create_market_order("BTC/USDT", "sell", 50.0)
+    assert grande["status"] == "expired" and 0 < grande["filled"] < 50.0
+
+@pytest.mark.asyncio
+async def test_limitada_parcial_queda_en_el_libro():
+    exchange = sim()
+    orden = await exchange.create_limit_order("BTC/USDT", "buy", 1.5, 101.0)
+    assert orden["status"] == "open" and orden["filled"] == pytest.approx(1.0)
+    assert (await exchange.fetch_order_book("BTC/USDT", limit=1))["bids"] == [[101.0, 0.5]]
+    # Una venta posterior casa primero contra el resto de la limitada
+    venta = await exchange.create_market_order("BTC/USDT", "sell", 0.5)
+    assert venta["average"] == 101.0
+    cerrada = await exchange.fetch_order(orden["id"])
+    assert cerrada["status"] == "closed" and cerrada["filled"] == pytest.approx(1.5)
+    abierta = await exchange.create_limit_order("BTC/USDT", "sell", 1.0, 150.0)
+    assert [o["id"] for o in await exchange.fetch_open_orders("BTC/USDT")] == [abierta["id"]]
+    assert (await exchange.cancel_order(abierta["id"]))["status"] == "canceled"
+    with pytest.raises(ccxt.OrderNotFound):
+        await exchange.cancel_order(abierta["id"])
+    with pytest.raises(ccxt.InvalidOrder):
+        await exchange.create_market_order("BTC/USDT", "buy", 0)
+
+@pytest.mark.asyncio
+async def test_latencia_con_reloj_virtual(virtual_clock):
+    exchange = sim(latency=0.5)
+    tarea = virtual_clock.lanzar(exchange.create_market_order("BTC/USDT", "buy", 0.1))
+    await virtual_clock.avanzar(0.4)
+    assert not tarea.done()
+    await virtual_clock.avanzar(0.1)
+    assert tarea.result()["status"] == "closed"
+
+@pytest.mark.asyncio
+async def test_fallos_inyectados_activan_el_circuit_breaker(sim_pool, fake_controller):
+    manager = EntidadExchangeManager({"exchange": "simulator", "circuit_breaker": {"max_failures": 2, "reset_timeout": 60},
+                                      "slippage_tolerance": 0.01, "simulator": {"symbols": ["BTC/USDT"]}})
+    manager.controller = fake_controller
+    await manager.init()
+    simulador = manager.exchange.client
+    assert (await manager._place_child("BTC/USDT", "buy", 0.1))["status"] == "closed"
+    simulador.fail_next(2)
+    for _ in range(2):
+        with pytest.raises(ccxt.NetworkError):
+            await manager._place_child("BTC/USDT", "buy", 0.1)
+    assert manager.breaker_tripped
+    assert {"tipo": "circuit_breaker_tripped", "exchange": "simulator", "modo": "spot"} in manager.controller.eventos
+    with pytest.raises(RuntimeError):
+        await manager._place_child("BTC/USDT", "buy", 0.1)
+    assert simulador.stats["orders"] == 1
+    await manager.shutdown()
+
+@pytest.mark.asyncio
+async def test_miles_de_ordenes_con_fallos_de_red():
+    exchange = sim(liquidity={"levels": 20, "step": 0.001, "size": 5.0}, failure_rate=0.01, seed=1)
+    fallos = 0
+    for i in range(3000):
+        try:
+            await exchange.create_market_order("BTC/USDT", "buy" if i % 2 else "sell", 0.5)
+        except ccxt.NetworkError:
+            fallos += 1
+    assert 0 < fallos < 100 and exchange.stats["orders"] == 3000 - fallos
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_execution_algos.py
+Pruebas unitarias para los algoritmos de ejecución TWAP/VWAP/participación.
+"""
+
+import pytest
+import asyncio
+from corec.plugins.trading.execution_algos import ExecutionEngine
+
+class Mercado:
+    def __init__(self, fallos=0):
+        self.ordenes = []
+        self.fallos = fallos
+
+    async def place(self, symbol, side, amount):
+        if self.fallos:
+            self.fallos -= 1
+            raise RuntimeError("rechazada")
+        self.ordenes.append((symbol, amount))
+        return {"id": str(len(self.ordenes)), "filled": amount, "average": 100.0}
+
+@pytest.mark.asyncio
+async def test_ordenes_padre_concurrentes(virtual_clock):
+    mercado = Mercado()
+    estados = []
+
+    async def on_update(order, child):
+        if child is None:
+            estados.append((order.symbol, order.state))
+
+    engine = ExecutionEngine(mercado.place, on_update=on_update, config={"duration": 60, "slices": 4})
+    btc = engine.submit("BTC/USDT", "buy", 2.0)
+    eth = engine.submit("ETH/USDT", "sell", 8.0, algo="vwap")
+    await virtual_clock.avanzar(0)
+    # Las primeras hijas de ambas órdenes salen sin esperar a que termine la otra
+    assert [s for s, _ in mercado.ordenes] == ["BTC/USDT", "ETH/USDT"]
+    await virtual_clock.avanzar(30)
+    assert btc.state == "working" and len(btc.children) == 3
+    await virtual_clock.avanzar(30)
+    assert btc.state == eth.state == "completed"
+    assert btc.filled == pytest.approx(2.0) and eth.average_price == 100.0
+    assert [c["amount"] for c in btc.children] == pytest.approx([0.5] * 4)
+    assert ("BTC/USDT", "completed") in estados
+
+@pytest.mark.asyncio
+async def test_vwap_y_participacion_siguen_el_volumen(virtual_clock):
+    mercado = Mercado()
+    perfil = [10.0, 30.0, 40.0, 20.0]
+    engine = ExecutionEngine(mercado.place, volume_profile=lambda s, n, i: perfil,
+                             config={"duration": 40, "slices": 4, "max_participation": 0.5})
+    vwap = engine.submit("BTC/USDT", "buy", 10.0, algo="vwap")
+    pov = engine.submit("ETH/USDT", "buy", 100.0, algo="participation", participation=0.1)
+    await virtual_clock.avanzar(40)
+    assert [c["amount"] for c in vwap.children] == pytest.approx([1.0, 3.0, 4.0, 2.0])
+    assert [c["amount"] for c in pov.children] == pytest.approx([1.0, 3.0, 4.0, 2.0])
+    assert pov.state == "expired" and pov.remaining == pytest.approx(90.0)
+
+@pytest.mark.asyncio
+async def test_cancelacion_y_fallos(virtual_clock):
+    engine = ExecutionEngine(Mercado().place, config={"duration": 100, "slices": 10})
+    orden = engine.submit("BTC/USDT", "buy", 1.0)
+    await virtual_clock.avanzar(25)
+    await engine.cancel(orden.id)
+    assert orden.state == "cancelled" and len(orden.children) == 3
+    fallida = ExecutionEngine(Mercado(fallos=5).place, config={"duration": 10, "slices": 5, "max_failures": 2})
+    orden = fallida.submit("ETH/USDT", "sell", 1.0)
+    await virtual_clock.avanzar(10)
+    assert orden.state == "failed" and orden.error == "rechazada"
+    with pytest.raises(ValueError):
+        fallida.submit("ETH/USDT", "sell", 1.0, algo="iceberg")
+
+@pytest.mark.asyncio
+async def test_hija_sin_ejecucion_no_completa_la_padre(virtual_clock):
+    async def caducada(symbol, side, amount):
+        return {"id": "1", "filled": 0.0, "status": "expired"}
+
+    engine = ExecutionEngine(caducada, config={"duration": 0, "slices": 1})
+    orden = engine.submit("BTC/USDT", "buy", 1.0)
+    await virtual_clock.avanzar(0)
+    assert orden.state == "expired" and orden.filled == 0.0 and orden.children == []
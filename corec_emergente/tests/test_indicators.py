@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_indicators.py
+Pruebas unitarias para el motor de indicadores incrementales.
+"""
+
+import numpy as np
+import pandas as pd
+from indicators import EstadoIndicadores, MotorIndicadores, serie_indicadores, calcular_macd
+
+def _precios(n=300, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+
+def test_rsi_wilder_y_sma_coinciden_con_pandas():
+    precios = _precios()
+    serie = serie_indicadores(precios)
+    delta = pd.Series(precios).diff().dropna()
+    ganancia = delta.clip(lower=0).iloc[:14].mean()
+    perdida = (-delta.clip(upper=0)).iloc[:14].mean()
+    for d in delta.iloc[14:]:
+        ganancia = (ganancia * 13 + max(d, 0)) / 14
+        perdida = (perdida * 13 + max(-d, 0)) / 14
+    assert np.isclose(serie["rsi"][-1], 100 - 100 / (1 + ganancia / perdida))
+    sma = pd.Series(precios).rolling(50).mean().to_numpy()
+    assert np.allclose(serie["sma"][49:], sma[49:])
+    assert np.all(serie["rsi"][:14] == 50.0)
+
+def test_macd_y_volatilidad_por_rango():
+    precios = _precios(200, 1)
+    serie = serie_indicadores(precios)
+    ema = lambda x, n: pd.Series(x).ewm(span=n, adjust=False).mean().to_numpy()
+    # Con semilla SMA la EMA converge a la de pandas tras el calentamiento
+    macd_pandas = ema(precios, 12) - ema(precios, 26)
+    assert abs(serie["macd"][-1] - macd_pandas[-1]) < 1e-3
+    ventana = precios[-14:]
+    assert np.isclose(serie["volatilidad"][-1], (ventana.max() - ventana.min()) / precios[-1])
+    assert calcular_macd(list(precios)) == serie["macd"][-1]
+
+def test_atr_usa_maximos_y_minimos():
+    estado = EstadoIndicadores(periodo_atr=3)
+    for cierre in (10, 11, 12, 13):
+        estado.actualizar(cierre, cierre + 1, cierre - 1)
+    # Rangos verdaderos: 2, 2, 2 (semilla) y luego 2
+    assert np.isclose(estado.atr, 2.0)
+
+def test_estado_serializable_para_arranque_en_caliente(tmp_path):
+    precios = _precios(120, 2)
+    motor = MotorIndicadores()
+    for i, p in enumerate(precios[:80]):
+        motor.actualizar("BTC/USDT", p, timestamp=i)
+    path = str(tmp_path / "estado.json")
+    motor.guardar(path)
+
+    restaurado = MotorIndicadores()
+    assert restaurado.cargar(path)
+    for i, p in enumerate(precios[80:], start=80):
+        motor.actualizar("BTC/USDT", p, timestamp=i)
+        restaurado.actualizar("BTC/USDT", p, timestamp=i)
+    assert restaurado.snapshot("BTC/USDT") == motor.snapshot("BTC/USDT")
+    # Las velas repetidas (mismo timestamp) se ignoran
+    assert not restaurado.actualizar("BTC/USDT", 1.0, timestamp=119)
+
+def test_actualizar_ohlcv_omite_vela_abierta():
+    motor = MotorIndicadores()
+    ohlcv = [[i * 3600000, 10, 11, 9, 10 + i, 100] for i in range(5)]
+    assert motor.actualizar_ohlcv("ETH/USDT", ohlcv) == 4
+    assert motor.estado("ETH/USDT").ultimo_cierre == 13
+    assert motor.actualizar_ohlcv("ETH/USDT", ohlcv[3:] + [[5 * 3600000, 0, 0, 0, 0, 0]]) == 1
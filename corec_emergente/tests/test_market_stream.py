@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_market_stream.py
+Pruebas unitarias para la ingesta de mercado por WebSocket y el feed local.
+"""
+
+import pytest
+import asyncio
+import time
+from corec.controlador.aetherion_controller import AetherionController
+from corec.plugins.trading.market_stream import MarketStream, LocalFeedServer, get_market_stream, release_market_stream
+from corec.plugins.trading.entidad_btc_watcher import EntidadBTCWatcher
+
+async def esperar(condicion, timeout=5.0):
+    limite = time.time() + timeout
+    while not condicion():
+        assert time.time() < limite, "Tiempo de espera agotado"
+        await asyncio.sleep(0.01)
+
+@pytest.mark.asyncio
+async def test_stream_trades_y_klines():
+    servidor = LocalFeedServer()
+    url = await servidor.start()
+    recibidos = []
+
+    async def on_update(symbol, estado):
+        recibidos.append((symbol, dict(estado)))
+
+    stream = MarketStream(url, ["BTC/USDT", "ETH/USDT"], on_update)
+    await stream.start()
+    try:
+        await servidor.wait_for_subscribers("btcusdt@trade")
+        await servidor.publish_trade("BTC/USDT", 50000.5, 0.2)
+        await servidor.publish_kline("ETH/USDT", 3000, 3010, 2990, 3005, volume=12, closed=True)
+        await servidor.publish_trade("SOL/USDT", 20, 1)  # no suscrito
+        await esperar(lambda: len(recibidos) >= 2)
+        assert recibidos[0][0] == "BTC/USDT"
+        assert recibidos[0][1]["price"] == 50000.5
+        assert recibidos[1][1]["kline"]["close"] == 3005
+        assert recibidos[1][1]["kline"]["closed"]
+        assert stream.is_live(5)
+        assert max(stream.latencias) < 0.5
+    finally:
+        await stream.stop()
+        await servidor.stop()
+
+@pytest.mark.asyncio
+async def test_stream_reconecta():
+    servidor = LocalFeedServer()
+    url = await servidor.start()
+    precios = []
+
+    async def on_update(symbol, estado):
+        precios.append(estado["price"])
+
+    stream = MarketStream(url, ["BTC/USDT"], on_update, reconnect_base=0.05)
+    await stream.start()
+    try:
+        await servidor.wait_for_subscribers("btcusdt@trade")
+        await servidor.drop_clients()
+        await esperar(lambda: stream.reconexiones >= 1)
+        await servidor.wait_for_subscribers("btcusdt@trade")
+        await servidor.publish_trade("BTC/USDT", 51000)
+        await esperar(lambda: precios == [51000])
+    finally:
+        await stream.stop()
+        await servidor.stop()
+    assert not stream.connected
+
+@pytest.mark.asyncio
+async def test_btc_watcher_publica_desde_stream():
+    servidor = LocalFeedServer()
+    url = await servidor.start()
+    controller = AetherionController({"id": "test-controller"})
+    watcher = EntidadBTCWatcher({
+        "canales": ["trading_btc", "alertas"],
+        "log_level": "INFO",
+        "destino_default": "trading",
+        "auto_register_channels": True,
+        "update_interval": 60
+    })
+    watcher.controller = controller
+    for i in range(14):
+        watcher.indicadores.actualizar("BTC/USDT", 50000 + i, timestamp=i)
+    stream = MarketStream(url, kline_interval="1h")
+    stream.subscribe(["BTC/USDT"], watcher._on_stream_update)
+    watcher.stream = stream
+    await stream.start()
+    try:
+        await servidor.wait_for_subscribers("btcusdt@kline_1h")
+        await servidor.publish_kline("BTC/USDT", 50013, 50100, 50000, 50080, closed=True, interval="1h")
+        await esperar(lambda: len(controller.eventos_publicados) > 0)
+        evento = controller.eventos_publicados[-1]
+        assert evento["canal"] == "trading_btc"
+        assert evento["datos"]["price"] == 50080
+        assert evento["datos"]["source"] == "stream"
+        assert watcher.indicadores.estado("BTC/USDT").ultimo_cierre == 50080
+    finally:
+        await stream.stop()
+        await servidor.stop()
+
+@pytest.mark.asyncio
+async def test_stream_compartido_y_resuscripcion_en_vivo():
+    servidor = LocalFeedServer()
+    url = await servidor.start()
+    btc, alts = [], []
+
+    async def on_btc(symbol, estado):
+        btc.append(symbol)
+
+    async def on_alts(symbol, estado):
+        alts.append(symbol)
+
+    stream = get_market_stream("feed_local", url)
+    assert get_market_stream("feed_local", url) is stream
+    stream.subscribe(["BTC/USDT"], on_btc)
+    stream.subscribe(["SOL/USDT"], on_alts)
+    await stream.start()
+    await stream.start()
+    try:
+        await servidor.wait_for_subscribers("solusdt@trade")
+        assert len(servidor.clientes) == 1
+        await servidor.publish_trade("BTC/USDT", 50000)
+        await servidor.publish_trade("SOL/USDT", 20)
+        await esperar(lambda: btc == ["BTC/USDT"] and alts == ["SOL/USDT"])
+        # Cambios con el socket abierto: SUBSCRIBE/UNSUBSCRIBE sin reconectar
+        stream.subscribe(["ADA/USDT"], on_alts)
+        await servidor.wait_for_subscribers("adausdt@trade")
+        stream.unsubscribe(["SOL/USDT"], on_alts)
+        await esperar(lambda: not any("solusdt@trade" in s for s in servidor.clientes.values()))
+        await servidor.publish_trade("ADA/USDT", 0.5)
+        await esperar(lambda: alts == ["SOL/USDT", "ADA/USDT"])
+        assert stream.reconexiones == 0 and stream.is_live(5, ["ADA/USDT"]) and not stream.is_live(5, ["ETH/USDT"])
+        await release_market_stream("feed_local", ["BTC/USDT"], on_btc)
+        assert stream.connected
+        await release_market_stream("feed_local", ["ADA/USDT"], on_alts)
+        assert not stream.connected and get_market_stream("feed_local", url) is not stream
+    finally:
+        await release_market_stream("feed_local", [], on_alts)
+        await stream.stop()
+        await servidor.stop()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_ohlcv_store.py
+Pruebas unitarias para el almacén local de velas OHLCV.
+"""
+
+import pytest
+import numpy as np
+from corec.plugins.trading.ohlcv_store import OHLCVStore, timeframe_ms
+from corec.plugins.trading.entidad_btc_watcher import EntidadBTCWatcher
+
+HORA = timeframe_ms("1h")
+
+class ExchangeVelas:
+    """Exchange falso con velas horarias desde 0 hasta `ahora` (la última sigue abierta)."""
+
+    def __init__(self, ahora):
+        self.ahora = ahora
+        self.llamadas = []
+
+    async def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=1000):
+        self.llamadas.append(since)
+        ultima = (self.ahora // HORA) * HORA
+        inicio = ((since + HORA - 1) // HORA) * HORA if since is not None else ultima - (limit - 1) * HORA
+        return [[ts, 1.0, 2.0, 0.5, ts / HORA, 10.0]
+                for ts in range(max(inicio, 0), min(ultima, inicio + (limit - 1) * HORA) + 1, HORA)]
+
+def test_append_solo_velas_cerradas_y_nuevas(tmp_path):
+    store = OHLCVStore(str(tmp_path))
+    velas = [[i * HORA, 1, 2, 0.5, i, 10] for i in range(5)]
+    assert store.append("binance", "BTC/USDT", "1h", velas, now_ms=4 * HORA + 10) == 4
+    assert store.append("binance", "BTC/USDT", "1h", velas, now_ms=5 * HORA) == 1
+    columnas = store.read("binance", "BTC/USDT", "1h", since=2 * HORA)
+    assert isinstance(columnas["close"], np.memmap)
+    assert columnas["close"].tolist() == [2, 3, 4]
+    assert store.rows("binance", "BTC/USDT", "1h", until=HORA) == [[0, 1, 2, 0.5, 0, 10], [HORA, 1, 2, 0.5, 1, 10]]
+
+@pytest.mark.asyncio
+async def test_top_up_descarga_solo_la_cola(tmp_path):
+    store = OHLCVStore(str(tmp_path), page_limit=100)
+    exchange = ExchangeVelas(ahora=250 * HORA + 5)
+    assert await store.top_up(exchange, "binance", "ETH/USDT", "1h", since=0, now_ms=exchange.ahora) == 250
+    assert len(exchange.llamadas) == 3
+    # Sin velas nuevas cerradas no se consulta el exchange
+    assert await store.top_up(exchange, "binance", "ETH/USDT", "1h", since=0, now_ms=exchange.ahora) == 0
+    assert len(exchange.llamadas) == 3
+    exchange.ahora += 3 * HORA
+    assert await store.top_up(exchange, "binance", "ETH/USDT", "1h", since=0, now_ms=exchange.ahora) == 3
+    assert exchange.llamadas[-1] == 249 * HORA + 1
+    datos = store.dataframe("binance", "ETH/USDT", "1h")
+    assert datos["close"].tolist() == list(range(253))
+
+@pytest.mark.asyncio
+async def test_top_up_con_until_y_reconstruccion(tmp_path):
+    store = OHLCVStore(str(tmp_path), page_limit=50)
+    exchange = ExchangeVelas(ahora=400 * HORA)
+    await store.top_up(exchange, "binance", "BTC/USDT", "1h", since=100 * HORA, until=150 * HORA,
+                       now_ms=exchange.ahora)
+    assert store.last_timestamp("binance", "BTC/USDT", "1h") >= 150 * HORA
+    # Un inicio anterior al guardado reconstruye el almacén desde ese punto
+    await store.top_up(exchange, "binance", "BTC/USDT", "1h", since=50 * HORA, until=150 * HORA,
+                       now_ms=exchange.ahora)
+    assert store.first_timestamp("binance", "BTC/USDT", "1h") == 50 * HORA
+    timestamps = store.read("binance", "BTC/USDT", "1h")["timestamp"]
+    assert np.all(np.diff(timestamps) == HORA)
+
+@pytest.mark.asyncio
+async def test_watcher_rellena_el_almacen_segun_el_reloj_actual(tmp_path, sim_pool, virtual_clock):
+    watcher = EntidadBTCWatcher({"update_interval": 60, "warmup_candles": 5, "ohlcv_store_path": str(tmp_path)})
+    ahora = int(virtual_clock.time() * 1000)
+    exchange = ExchangeVelas(ahora=ahora)
+    await watcher._sync_candles(exchange, "BTC/USDT")
+    # La ventana de calentamiento se cuenta desde el reloj virtual, no desde la hora del sistema
+    assert exchange.llamadas[0] == ahora - 5 * HORA
+    assert watcher.indicadores.estado("BTC/USDT").ultimo_timestamp == (ahora // HORA) * HORA - HORA
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_order_batcher.py
+Pruebas unitarias para el envío de órdenes por lotes y la ejecución por lotes del ExchangeManager.
+"""
+
+import pytest
+import asyncio
+from corec.plugins.trading.order_batcher import OrderBatcher
+from corec.plugins.trading.exchange_simulator import ExchangeSimulator
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+from corec.entidad_base import Event
+
+def simulador(**config):
+    return ExchangeSimulator({"symbols": ["BTC/USDT", "ETH/USDT"], "latency": 0.5, **config})
+
+@pytest.mark.asyncio
+async def test_ordenes_del_mismo_ciclo_salen_en_un_lote(virtual_clock):
+    exchange = simulador()
+    batcher = OrderBatcher(exchange, max_batch=3)
+    tareas = [virtual_clock.lanzar(batcher.create_market_order("BTC/USDT", "buy", 0.1)) for _ in range(4)]
+    tareas.append(virtual_clock.lanzar(batcher.create_market_order("DOGE/USDT", "buy", 0.1)))
+    await virtual_clock.avanzar(0.5)
+    assert all(t.done() for t in tareas)
+    # Cinco órdenes en dos lotes (tope de 3) enviados en paralelo: una sola ronda de latencia
+    assert batcher.batches == 2 and exchange.stats["requests"] == 2
+    assert [t.result()["status"] for t in tareas[:4]] == ["closed"] * 4
+    with pytest.raises(RuntimeError):
+        tareas[4].result()
+
+@pytest.mark.asyncio
+async def test_sin_endpoint_por_lotes_se_envian_en_paralelo(virtual_clock):
+    exchange = simulador()
+    exchange.has["createOrders"] = False
+    batcher = OrderBatcher(exchange)
+    tareas = [virtual_clock.lanzar(batcher.create_market_order("ETH/USDT", "sell", 0.1)) for _ in range(3)]
+    await virtual_clock.avanzar(0.5)
+    assert all(t.result()["status"] == "closed" for t in tareas)
+    assert exchange.stats["requests"] == 3
+
+@pytest.mark.asyncio
+async def test_lote_de_veinte_senales_en_una_ronda(virtual_clock, sim_pool, fake_controller):
+    manager = EntidadExchangeManager({"exchange": "simulator", "circuit_breaker": {"max_failures": 3, "reset_timeout": 60},
+                                      "slippage_tolerance": 0.01, "execution": {"slices": 1},
+                                      "slippage_model": {"beyond_depth": 0.05},
+                                      "simulator": {"symbols": ["BTC/USDT", "ETH/USDT"], "latency": 0.5}})
+    manager.controller = fake_controller
+    tarea = virtual_clock.lanzar(manager.init())
+    await virtual_clock.avanzar(0)
+    await tarea
+    simulado = manager.exchange.client
+    decisiones = [{"symbol": "BTC/USDT" if i % 2 else "ETH/USDT", "type": "buy" if i % 3 else "sell",
+                   "price": 50000.0 if i % 2 else 3000.0, "risk_per_trade": 0.01, "trade_multiplier": 1}
+                  for i in range(20)]
+    decisiones.append({"symbol": "BTC/USDT", "type": "buy", "price": 50000.0, "risk_per_trade": 0.01,
+                       "trade_multiplier": 100000})
+    decisiones.append({"symbol": "BTC/USDT", "type": "buy"})
+    peticiones = simulado.stats["requests"]
+    tarea = virtual_clock.lanzar(manager.manejar_evento(Event(canal="trading_exchange", datos={
+        "tipo": "trade_execution_batch", "decisions": decisiones})))
+    # Libros de los dos símbolos en paralelo (0,5 s) y las 20 hijas en un solo create_orders (0,5 s)
+    await virtual_clock.avanzar(1.0)
+    assert tarea.done()
+    await asyncio.gather(*(o.task for o in manager.execution.orders.values()))
+    assert simulado.stats["requests"] - peticiones == 3 and simulado.stats["orders"] == 20
+    lote = next(e for e in manager.controller.eventos if e["tipo"] == "resultado_lote")
+    assert [r["status"] for r in lote["resultados"]] == ["submitted"] * 20 + ["rejected"] * 2
+    assert [r["reason"] for r in lote["resultados"][20:]] == ["slippage", "error: 'risk_per_trade'"]
+    assert all(o.state == "completed" for o in manager.execution.orders.values())
+    assert manager.tracker.open_count() == 0 and len(manager.tracker.orders) == 20
+    await manager.shutdown()
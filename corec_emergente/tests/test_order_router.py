@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_order_router.py
+Pruebas unitarias para el enrutado de órdenes entre exchanges.
+"""
+
+import pytest
+from corec.plugins.trading.order_router import OrderRouter, CircuitBreaker
+from corec.plugins.trading.exchange_simulator import ExchangeSimulator
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+from corec.entidad_base import Event
+
+def venue(precio, **config):
+    return ExchangeSimulator({"symbols": ["BTC/USDT"], "prices": {"BTC/USDT": precio}, "fee": 0.0,
+                              "liquidity": {"levels": 5, "step": 0.01, "size": 1.0}, **config})
+
+def test_plan_reparte_por_coste_esperado():
+    router = OrderRouter()
+    router.add_venue("a", None, fee=0.0)
+    router.add_venue("b", None, fee=0.0)
+    router.update_book("a", "BTC/USDT", {"asks": [[100.0, 1.0], [103.0, 5.0]], "bids": [[99.0, 1.0]]})
+    router.update_book("b", "BTC/USDT", {"asks": [[101.0, 1.0, 3], [102.0, 1.0, 1]], "bids": [[98.0, 1.0]]})
+    plan = router.plan("BTC/USDT", "buy", 3.5)
+    assert plan["a"]["amount"] == pytest.approx(1.5) and plan["b"]["amount"] == pytest.approx(2.0)
+    assert plan["a"]["expected_price"] == pytest.approx((100.0 + 0.5 * 103.0) / 1.5)
+    assert list(router.plan("BTC/USDT", "sell", 0.5)) == ["a"]
+    # Con comisión alta el mejor precio nominal deja de ser el más barato
+    router.venues["a"].fee = 0.05
+    assert list(router.plan("BTC/USDT", "buy", 1.0)) == ["b"]
+    assert router.quotes("BTC/USDT")["b"] == {"bid": 98.0, "ask": 101.0, "bid_depth": 1.0, "ask_depth": 2.0}
+
+def test_circuit_breaker_por_venue():
+    breaker = CircuitBreaker(max_failures=2, reset_timeout=10)
+    assert not breaker.record_failure(now=0) and breaker.record_failure(now=0)
+    assert not breaker.allow(now=5) and breaker.allow(now=10) and breaker.failures == 0
+
+@pytest.mark.asyncio
+async def test_hijas_en_paralelo_entre_venues(virtual_clock):
+    router = OrderRouter()
+    a, b = venue(100.0, latency=0.5), venue(100.5, latency=0.5)
+    router.add_venue("a", a, fee=0.0)
+    router.add_venue("b", b, fee=0.0)
+    tarea = virtual_clock.lanzar(router.execute("BTC/USDT", "buy", 3.0))
+    # Un segundo: libros en paralelo y órdenes en paralelo, no cuatro peticiones seguidas
+    await virtual_clock.avanzar(1.0)
+    orden = tarea.result()
+    assert orden["status"] == "closed" and orden["filled"] == pytest.approx(3.0)
+    assert set(orden["venues"]) == {"a", "b"}
+    assert a.stats["orders"] == b.stats["orders"] == 1
+
+@pytest.mark.asyncio
+async def test_fallos_se_reenrutan_y_activan_el_breaker_del_venue():
+    eventos = []
+
+    async def on_event(tipo, v):
+        eventos.append((tipo, v.name))
+
+    router = OrderRouter(on_event)
+    caido, sano = venue(99.0), venue(100.0)
+    router.add_venue("caido", caido, fee=0.0, breaker={"max_failures": 1, "reset_timeout": 60})
+    router.add_venue("sano", sano, fee=0.0)
+    await router.refresh("BTC/USDT")
+    caido.fail_next(1)
+    orden = await router.execute("BTC/USDT", "buy", 1.0)
+    assert orden["venues"] == {"sano": pytest.approx(1.0)}
+    assert ("circuit_breaker_tripped", "caido") in eventos
+    assert [v.name for v in await router._available()] == ["sano"]
+
+@pytest.mark.asyncio
+async def test_exchange_manager_enruta_entre_exchanges_registrados(sim_pool, fake_controller):
+    simulador = {"symbols": ["BTC/USDT"], "fee": 0.0, "liquidity": {"levels": 5, "step": 0.01, "size": 1.0}}
+    manager = EntidadExchangeManager({"exchange": "sim_a", "circuit_breaker": {"max_failures": 3, "reset_timeout": 60},
+                                      "slippage_tolerance": 0.01, "routing": {"enabled": True},
+                                      "simulator": {**simulador, "prices": {"BTC/USDT": 100.0}}})
+    manager.controller = fake_controller
+    await manager.init()
+    await manager.manejar_evento(Event(canal="trading_exchange", datos={
+        "tipo": "registro_exchange", "exchange": "sim_b", "modo": "spot",
+        "config": {"simulator": {**simulador, "prices": {"BTC/USDT": 100.0}}}}))
+    await manager.manejar_evento(Event(canal="trading_exchange", datos={
+        "tipo": "registro_exchange", "exchange": "sim_c", "modo": "futures", "config": {}}))
+    assert set(manager.router.venues) == {"sim_a", "sim_b"}
+    orden = await manager._place_child("BTC/USDT", "buy", 2.0)
+    assert orden["venues"] == {"sim_a": pytest.approx(1.0), "sim_b": pytest.approx(1.0)}
+    # Una recarga con otra configuración sustituye el venue; una baja lo retira del enrutado
+    await manager.manejar_evento(Event(canal="trading_exchange", datos={
+        "tipo": "registro_exchange", "exchange": "sim_b", "modo": "spot",
+        "config": {"fee": 0.002, "simulator": {**simulador, "prices": {"BTC/USDT": 100.0}}}}))
+    assert manager.router.venues["sim_b"].fee == 0.002 and sim_pool.refs("sim_b") == 1
+    await manager.manejar_evento(Event(canal="trading_exchange", datos={
+        "tipo": "baja_exchange", "exchange": "sim_b", "modo": "spot"}))
+    assert set(manager.router.venues) == {"sim_a"} and sim_pool.refs("sim_b") == 0
+    await manager.shutdown()
+    assert sim_pool.refs("sim_b") == 0
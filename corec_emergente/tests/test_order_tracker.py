@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_order_tracker.py
+Pruebas unitarias para el registro de órdenes y su reconciliación por lotes.
+"""
+
+import pytest
+from corec.plugins.trading.order_tracker import OrderTracker
+from corec.plugins.trading.exchange_simulator import ExchangeSimulator
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+
+def registro():
+    tracker = OrderTracker({"history": 2})
+    eventos = []
+
+    async def on_event(tipo, orden):
+        eventos.append((tipo, orden.client_id))
+
+    tracker.subscribe(on_event)
+    return tracker, eventos
+
+@pytest.mark.asyncio
+async def test_eventos_indices_y_exposicion():
+    tracker, eventos = registro()
+    tracker.track("a", "BTC/USDT", "buy", 2.0, 100.0, venue="sim")
+    tracker.track("b", "ETH/USDT", "sell", 1.0, 10.0, venue="sim")
+    assert tracker.total_exposure() == pytest.approx(210.0)
+    await tracker.apply({"id": "7", "status": "open", "filled": 0.5}, "a")
+    assert tracker.get(exchange_id="7", venue="sim").client_id == "a"
+    assert tracker.exposure("BTC/USDT") == {"open_notional": pytest.approx(150.0), "position": 0.5, "open_orders": 1}
+    # Un mensaje repetido no cambia nada ni vuelve a notificar
+    await tracker.apply({"id": "7", "status": "open", "filled": 0.5}, "a")
+    await tracker.apply({"id": "7", "status": "closed", "filled": 2.0, "average": 101.0}, venue="sim")
+    await tracker.apply({"clientOrderId": "b", "status": "canceled", "filled": 0.0})
+    assert eventos == [("partial", "a"), ("fill", "a"), ("cancel", "b")]
+    assert tracker.open_count() == 0 and tracker.total_exposure() == pytest.approx(0.0)
+    assert tracker.exposure("BTC/USDT")["position"] == 2.0 and tracker.exposure("ETH/USDT")["position"] == 0.0
+    # Las órdenes terminadas se conservan acotadas
+    tracker.track("c", "BTC/USDT", "buy", 1.0, venue="sim")
+    await tracker.apply({"id": "9", "status": "expired"}, "c")
+    assert "a" not in tracker.orders and tracker.get(exchange_id="7", venue="sim") is None
+
+class Contador:
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.llamadas = []
+
+    async def fetch_open_orders(self, symbol):
+        self.llamadas.append(("open", symbol))
+        return await self.cliente.fetch_open_orders(symbol)
+
+    async def fetch_order(self, id, symbol):
+        self.llamadas.append(("order", id))
+        return await self.cliente.fetch_order(id, symbol)
+
+@pytest.mark.asyncio
+async def test_reconciliacion_por_lotes():
+    tracker, eventos = registro()
+    exchange = ExchangeSimulator({"symbols": ["BTC/USDT", "ETH/USDT"], "liquidity": {"levels": 0}})
+    for cid, symbol, side, precio in [("a", "BTC/USDT", "buy", 49000.0), ("b", "BTC/USDT", "buy", 48000.0),
+                                      ("c", "ETH/USDT", "sell", 3100.0)]:
+        tracker.track(cid, symbol, side, 1.0, precio, venue="sim")
+        await tracker.apply(await exchange.create_limit_order(symbol, side, 1.0, precio, {"clientOrderId": cid}), cid)
+    await exchange.create_market_order("BTC/USDT", "sell", 1.5)
+    await exchange.cancel_order(tracker.get("c").exchange_id)
+    contador = Contador(exchange)
+    assert await tracker.reconcile(contador, "sim") == 3
+    # Una consulta de abiertas por símbolo y fetch_order sólo para las que desaparecieron
+    assert sorted(contador.llamadas) == [("open", "BTC/USDT"), ("open", "ETH/USDT"), ("order", "1"), ("order", "3")]
+    assert eventos == [("partial", "b"), ("fill", "a"), ("cancel", "c")]
+    assert tracker.exposure("BTC/USDT") == {"open_notional": pytest.approx(24000.0), "position": 1.5, "open_orders": 1}
+
+@pytest.mark.asyncio
+async def test_exchange_manager_registra_sus_ordenes(sim_pool, fake_controller):
+    manager = EntidadExchangeManager({"exchange": "simulator", "circuit_breaker": {"max_failures": 3, "reset_timeout": 60},
+                                      "slippage_tolerance": 0.01, "simulator": {"symbols": ["BTC/USDT"]}})
+    manager.controller = fake_controller
+    await manager.init()
+    resultado = await manager._place_child("BTC/USDT", "buy", 0.5)
+    orden = manager.tracker.get(resultado["clientOrderId"])
+    assert orden.status == "closed" and orden.exchange_id == resultado["id"]
+    assert manager.tracker.exposure("BTC/USDT")["position"] == 0.5
+    estado = [e for e in manager.controller.eventos if e["tipo"] == "orden_estado"]
+    assert estado[0]["evento"] == "fill" and estado[0]["orden"]["venue"] == "simulator"
+    await manager.shutdown()
+    assert not manager.tracker.listeners
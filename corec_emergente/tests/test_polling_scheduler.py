@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_polling_scheduler.py
+Pruebas unitarias para el planificador de sondeo adaptativo de los watchers.
+"""
+
+from types import SimpleNamespace
+from corec.plugins.trading.polling_scheduler import PollingScheduler, posiciones_abiertas
+
+def test_volatilidad_y_posiciones_acortan_el_intervalo():
+    scheduler = PollingScheduler(budget_per_minute=1000, base_interval=60)
+    scheduler.register(["BTC/USDT", "ETH/USDT", "SOL/USDT"])
+    scheduler.update_volatility("BTC/USDT", 0.08)
+    scheduler.update_volatility("ETH/USDT", 0.005)
+    intervalos = scheduler.intervals()
+    assert intervalos["BTC/USDT"] == 15
+    assert intervalos["ETH/USDT"] == 240
+    assert intervalos["SOL/USDT"] == 60
+    scheduler.set_positions({"SOL/USDT"})
+    assert scheduler.intervals()["SOL/USDT"] == 15
+
+def test_presupuesto_global_estira_intervalos():
+    scheduler = PollingScheduler(budget_per_minute=14, base_interval=60, max_interval=1000)
+    scheduler.register([f"ALT{i}/USDT" for i in range(10)], cost=2)
+    scheduler.update_volatility("ALT0/USDT", 0.1)
+    intervalos = scheduler.intervals()
+    assert abs(scheduler.requests_per_minute() - 14) < 1e-6
+    # La proporción entre símbolos calientes y fríos se mantiene
+    assert intervalos["ALT0/USDT"] == 24
+    assert intervalos["ALT0/USDT"] * 5 == intervalos["ALT1/USDT"]
+
+def test_due_y_mark_polled():
+    scheduler = PollingScheduler(base_interval=60)
+    scheduler.register(["BTC/USDT", "ETH/USDT"])
+    assert scheduler.due(now=0) == ["BTC/USDT", "ETH/USDT"]
+    scheduler.mark_polled("BTC/USDT", now=0)
+    scheduler.update_volatility("ETH/USDT", 0.04)
+    scheduler.mark_polled("ETH/USDT", now=0)
+    assert scheduler.due(now=31) == ["ETH/USDT"]
+    assert scheduler.next_wakeup(["BTC/USDT"], now=31) == 29
+
+def test_posiciones_abiertas_desde_bloques():
+    bloques = [SimpleNamespace(id="bloque_BTC/USDT", posicion=0.5), SimpleNamespace(id="bloque_ETH/USDT", posicion=0),
+               SimpleNamespace(id="otro", posicion=1)]
+    assert posiciones_abiertas(bloques) == {"BTC/USDT"}
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_portfolio_risk.py
+Pruebas unitarias para la covarianza EWMA entre símbolos, el VaR de la cartera y su uso en los controles previos.
+"""
+
+import math
+import numpy as np
+import pytest
+from corec.plugins.trading.portfolio_risk import PortfolioRisk
+from corec.plugins.trading.risk_engine import RiskEngine
+import corec.plugins.trading.portfolio_risk as portfolio_risk
+
+def alimentar(riesgo, n=400, rho=0.8, vol=0.01, seed=7):
+    rng = np.random.default_rng(seed)
+    cov = vol ** 2 * np.array([[1.0, rho, 0.0], [rho, 1.0, 0.0], [0.0, 0.0, 1.0]])
+    retornos = rng.multivariate_normal(np.zeros(3), cov, n)
+    precios = np.array([100.0, 50.0, 10.0]) * np.exp(np.cumsum(retornos, axis=0))
+    riesgo.update({"BTC/USDT": 100.0, "ETH/USDT": 50.0, "SOL/USDT": 10.0})
+    for fila in precios:
+        riesgo.update({"BTC/USDT": fila[0], "ETH/USDT": fila[1], "SOL/USDT": fila[2]})
+    return retornos, precios
+
+def test_covarianza_ewma_incremental():
+    riesgo = PortfolioRisk(decay=0.97)
+    retornos, _ = alimentar(riesgo)
+    esperado = np.zeros((3, 3))
+    for r in retornos:
+        esperado = 0.97 * esperado + 0.03 * np.outer(r, r)
+    assert np.allclose(riesgo.cov, esperado)
+    corr = riesgo.correlation()
+    assert corr["BTC/USDT"]["ETH/USDT"] == pytest.approx(0.8, abs=0.2)
+    assert abs(corr["BTC/USDT"]["SOL/USDT"]) < 0.4
+    assert riesgo.volatilities()["SOL/USDT"] == pytest.approx(0.01, rel=0.4)
+    # Un tick parcial: los símbolos ausentes no se mueven; uno nuevo entra sin retorno
+    riesgo.update({"BTC/USDT": riesgo.last[0] * 1.01, "ADA/USDT": 0.5})
+    assert riesgo.symbols[-1] == "ADA/USDT" and riesgo.cov.shape == (4, 4)
+    assert riesgo.history[(riesgo.observations - 1) % riesgo.window][1] == 0.0
+
+def test_var_parametrico_e_historico():
+    riesgo = PortfolioRisk(decay=0.97, confidence=0.99, window=300)
+    _, precios = alimentar(riesgo)
+    largo = riesgo.value_at_risk({"BTC/USDT": 10.0})
+    nocional = 10.0 * precios[-1, 0]
+    sigma = math.sqrt(riesgo.cov[0, 0])
+    assert largo["parametric"] == pytest.approx(2.326 * sigma * nocional, rel=0.01)
+    assert largo["historical"] == pytest.approx(largo["parametric"], rel=0.35)
+    # Cubrir con el símbolo correlacionado reduce el VaR; sumarlo en el mismo sentido lo aumenta
+    cobertura = nocional / precios[-1, 1]
+    cubierto = riesgo.value_at_risk({"BTC/USDT": 10.0, "ETH/USDT": -cobertura})
+    doble = riesgo.value_at_risk({"BTC/USDT": 10.0, "ETH/USDT": cobertura})
+    assert cubierto["parametric"] < largo["parametric"] < doble["parametric"]
+    assert cubierto["historical"] < largo["historical"] < doble["historical"]
+    assert sum(doble["components"].values()) == pytest.approx(doble["parametric"])
+    # Varias carteras en una sola llamada
+    w = np.vstack([riesgo.exposures({"BTC/USDT": 10.0}), riesgo.exposures({"SOL/USDT": 10.0})])
+    assert riesgo.parametric_var(w)[0] == pytest.approx(largo["parametric"])
+    assert riesgo.historical_var(w).shape == (2,)
+
+def test_control_previo_por_var(monkeypatch):
+    riesgo = PortfolioRisk(decay=0.97)
+    _, precios = alimentar(riesgo)
+    monkeypatch.setattr(portfolio_risk, "_portfolio", riesgo)
+    motor = RiskEngine(max_var=0.02)
+    motor.set_equity(10000.0)
+    motor.reserve("o1", "BTC/USDT", "buy", 40.0, "sim", precios[-1, 0])
+    eth = 40.0 * precios[-1, 0] / precios[-1, 1]
+    # Más exposición en el mismo sentido de un símbolo correlacionado supera el VaR permitido
+    assert motor.check("ETH/USDT", "buy", eth, precios[-1, 1], "sim") == "var"
+    # La misma cantidad en sentido contrario cubre la posición y pasa
+    assert motor.check("ETH/USDT", "sell", eth, precios[-1, 1], "sim") is None
+    assert motor.symbol_net == {"BTC/USDT": 40.0}
+    motor.fill("o1", 40.0, precios[-1, 0], venue="otro")
+    motor.release("o1")
+    assert motor.symbol_net["BTC/USDT"] == pytest.approx(40.0) and motor.usage()["rejections"] == {"var": 1}
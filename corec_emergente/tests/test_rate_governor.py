@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_rate_governor.py
+Pruebas unitarias para el gobernador de límites de peticiones a exchanges.
+"""
+
+import pytest
+import asyncio
+from corec.plugins.trading.rate_governor import RateGovernor
+
+class ClienteFalso:
+    def __init__(self):
+        self.apiKey = None
+        self.llamadas = []
+        self.has = {"fetchTickers": True}
+
+    async def fetch_ticker(self, symbol):
+        self.llamadas.append(("ticker", symbol))
+        return {"symbol": symbol, "last": 1.0}
+
+    async def create_market_order(self, symbol, side, amount):
+        self.llamadas.append(("orden", symbol))
+        return {"id": "1", "symbol": symbol}
+
+@pytest.mark.asyncio
+async def test_rafaga_y_ritmo():
+    governor = RateGovernor({"falso": {"rate": 100.0, "burst": 5.0}})
+    esperas = [await governor.acquire("falso") for _ in range(5)]
+    assert max(esperas) < 0.005
+    inicio = asyncio.get_running_loop().time()
+    await asyncio.gather(*(governor.acquire("falso") for _ in range(10)))
+    assert asyncio.get_running_loop().time() - inicio >= 0.08
+
+@pytest.mark.asyncio
+async def test_ordenes_adelantan_a_historial_y_mercado():
+    governor = RateGovernor({"falso": {"rate": 50.0, "burst": 1.0}})
+    await governor.acquire("falso", "history")
+    orden = []
+
+    async def pedir(lane, etiqueta):
+        await governor.acquire("falso", lane)
+        orden.append(etiqueta)
+
+    tareas = [asyncio.create_task(pedir("history", f"h{i}")) for i in range(5)]
+    tareas += [asyncio.create_task(pedir("market_data", "m"))]
+    await asyncio.sleep(0)
+    tareas.append(asyncio.create_task(pedir("orders", "o")))
+    await asyncio.gather(*tareas)
+    assert orden[0] == "o"
+    assert orden[1] == "m"
+    metricas = governor.metrics()["falso"]
+    assert metricas["history"]["requests"] == 6
+    assert metricas["orders"]["wait_max"] < metricas["history"]["wait_max"]
+    assert metricas["queued"]["spot"] == 0
+
+@pytest.mark.asyncio
+async def test_cliente_gobernado_delega():
+    governor = RateGovernor()
+    cliente = ClienteFalso()
+    gobernado = governor.wrap(cliente, "falso", "orders", endpoint="futures")
+    assert gobernado.has["fetchTickers"]
+    gobernado.apiKey = "k"
+    assert cliente.apiKey == "k"
+    await gobernado.create_market_order("BTC/USDT", "buy", 1)
+    await gobernado.with_lane("market_data").fetch_ticker("BTC/USDT")
+    assert cliente.llamadas == [("orden", "BTC/USDT"), ("ticker", "BTC/USDT")]
+    assert set(governor.metrics()["falso"]) == {"orders", "market_data", "queued"}
+    assert ("falso", "futures") in governor.buckets
+
+@pytest.mark.asyncio
+async def test_carril_desconocido():
+    with pytest.raises(ValueError):
+        await RateGovernor().acquire("falso", "urgente")
+
+@pytest.mark.asyncio
+async def test_esperas_en_tiempo_virtual(virtual_clock):
+    governor = RateGovernor({"falso": {"rate": 1.0, "burst": 1.0}})
+    await governor.acquire("falso", "orders")
+    tareas = [virtual_clock.lanzar(governor.acquire("falso", "orders")) for _ in range(2)]
+    await virtual_clock.avanzar(1)
+    assert tareas[0].done() and not tareas[1].done()
+    await virtual_clock.avanzar(1)
+    assert [t.result() for t in tareas] == pytest.approx([1.0, 2.0])
+    assert governor.metrics()["falso"]["orders"]["wait_max"] == pytest.approx(2.0)
+
+@pytest.mark.asyncio
+async def test_coste_mayor_que_la_rafaga_no_bloquea_la_cola(virtual_clock):
+    governor = RateGovernor({"x": {"rate": 2.0, "burst": 4.0}})
+    # fetch_tickers cuesta 10: sale con el bucket lleno y deja el saldo en -6
+    assert await governor.acquire("x", "market_data", cost=10) == 0.0
+    segunda = virtual_clock.lanzar(governor.acquire("x", "market_data", cost=10))
+    historia = virtual_clock.lanzar(governor.acquire("x", "history"))
+    await virtual_clock.avanzar(5)
+    assert segunda.done() and not historia.done()
+    await virtual_clock.avanzar(3.5)
+    assert [segunda.result(), historia.result()] == pytest.approx([5.0, 8.5])
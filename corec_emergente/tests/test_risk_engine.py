@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_risk_engine.py
+Pruebas unitarias para los controles de riesgo previos a cada orden y sus exposiciones en caché.
+"""
+
+import pytest
+import time
+import asyncio
+from corec.plugins.trading.risk_engine import RiskEngine
+import corec.plugins.trading.risk_engine as risk_engine
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+
+def test_exposiciones_incrementales():
+    riesgo = RiskEngine()
+    riesgo.reserve("p1", "BTC/USDT", "buy", 2.0, "binance", price=100.0)
+    riesgo.reserve("p2", "ETH/USDT", "sell", 10.0, "kucoin", price=10.0)
+    assert riesgo.exposure("BTC/USDT") == pytest.approx(200.0) and riesgo.exposure(venue="kucoin") == pytest.approx(100.0)
+    # Lo ejecutado pasa de la reserva a la posición; con enrutado, al venue que ejecutó
+    riesgo.fill("p1", 1.0, 110.0)
+    riesgo.fill("p1", 0.5, 110.0, venue="kucoin")
+    assert riesgo.positions[("binance", "BTC/USDT")] == 1.0 and riesgo.positions[("kucoin", "BTC/USDT")] == 0.5
+    assert riesgo.exposure("BTC/USDT") == pytest.approx(220.0)
+    riesgo.release("p1")
+    assert riesgo.exposure("BTC/USDT", "binance") == pytest.approx(110.0) and "p1" not in riesgo.reservations
+    riesgo.mark("BTC/USDT", 120.0)
+    assert riesgo.exposure() == pytest.approx(1.5 * 120.0 + 100.0)
+    riesgo.set_equity(1000.0)
+    uso = riesgo.usage()
+    assert uso["venues"] == {"binance": pytest.approx(120.0), "kucoin": pytest.approx(160.0)}
+    assert uso["leverage"] == pytest.approx(0.28) and uso["reserved_orders"] == 1
+
+def test_motivos_de_rechazo():
+    riesgo = RiskEngine(max_order_notional=500.0, max_symbol_notional=400.0, max_venue_notional=600.0,
+                        max_total_notional=800.0, max_leverage=0.7, limits={"ETH/USDT": 1000.0})
+    riesgo.set_equity(1000.0)
+    assert riesgo.check("BTC/USDT", "buy", 6.0, 100.0, "a") == "order_notional"
+    riesgo.reserve("p1", "BTC/USDT", "buy", 3.0, "a", 100.0)
+    assert riesgo.check("BTC/USDT", "buy", 2.0, 100.0, "b") == "symbol_limit"
+    # Reducir la posición siempre pasa
+    assert riesgo.check("BTC/USDT", "sell", 5.0, 100.0, "a") is None
+    riesgo.reserve("p2", "ETH/USDT", "buy", 25.0, "a", 10.0)
+    assert riesgo.check("ETH/USDT", "buy", 6.0, 10.0, "a") == "venue_limit"
+    riesgo.reserve("p3", "ETH/USDT", "buy", 15.0, "b", 10.0)
+    assert riesgo.check("SOL/USDT", "buy", 1.0, 100.0, "b") == "leverage"
+    riesgo.max_leverage = None
+    assert riesgo.check("SOL/USDT", "buy", 1.5, 100.0, "b") == "total_limit"
+    assert riesgo.check("SOL/USDT", "buy", 0.5, 100.0, "b") is None
+    assert riesgo.usage()["rejections"] == {"order_notional": 1, "symbol_limit": 1, "venue_limit": 1,
+                                           "leverage": 1, "total_limit": 1}
+
+def test_comprobacion_en_microsegundos():
+    riesgo = RiskEngine(max_symbol_notional=1e6, max_venue_notional=1e6, max_total_notional=1e7, max_leverage=5.0)
+    riesgo.set_equity(1e6)
+    for i in range(200):
+        riesgo.reserve(f"p{i}", f"S{i % 50}/USDT", "buy", 1.0, f"v{i % 3}", 100.0)
+    inicio = time.perf_counter()
+    for i in range(20000):
+        riesgo.check(f"S{i % 50}/USDT", "buy", 1.0, 100.0, f"v{i % 3}")
+    assert (time.perf_counter() - inicio) / 20000 < 50e-6
+
+@pytest.mark.asyncio
+async def test_exchange_manager_dimensiona_por_bloque_y_comprueba_riesgo(virtual_clock, sim_pool, fake_controller,
+                                                                       monkeypatch):
+    monkeypatch.setattr(risk_engine, "_engine", RiskEngine(limits={"BTC/USDT": 150.0}))
+    fake_controller.nucleus.bloques[1].capital = 5000.0
+    manager = EntidadExchangeManager({"exchange": "simulator", "circuit_breaker": {"max_failures": 3, "reset_timeout": 60},
+                                      "slippage_tolerance": 0.01, "execution": {"slices": 1},
+                                      "simulator": {"symbols": ["BTC/USDT", "ETH/USDT"]}})
+    manager.controller = fake_controller
+    tarea = virtual_clock.lanzar(manager.init())
+    await virtual_clock.avanzar(0)
+    await tarea
+    decision = {"type": "buy", "risk_per_trade": 0.1, "trade_multiplier": 1}
+    decisiones = [{**decision, "symbol": "BTC/USDT", "price": 50000.0},
+                  {**decision, "symbol": "ETH/USDT", "price": 3000.0},
+                  {**decision, "symbol": "BTC/USDT", "price": 50000.0},
+                  {**decision, "symbol": "SOL/USDT", "price": 100.0}]
+    tarea = virtual_clock.lanzar(manager.execute_batch(decisiones))
+    await virtual_clock.avanzar(0)
+    resultados = await tarea
+    # BTC con el capital de su bloque (100 USDT); ETH con el suyo (500 USDT); la segunda BTC supera el límite
+    assert [r["reason"] for r in resultados] == [None, None, "risk: symbol_limit", "no_block"]
+    assert resultados[0]["order"].amount == pytest.approx(100.0 / 50000.0)
+    assert resultados[1]["order"].amount == pytest.approx(500.0 / 3000.0)
+    await asyncio.gather(*(r["order"].task for r in resultados[:2]))
+    riesgo = manager.risk
+    assert not riesgo.reservations and riesgo.positions[("simulator", "ETH/USDT")] == pytest.approx(500.0 / 3000.0)
+    assert riesgo.exposure("BTC/USDT") == pytest.approx(100.0, rel=0.01)
+    assert any(e["tipo"] == "riesgo_rechazo" and e["motivo"] == "symbol_limit" for e in manager.controller.eventos)
+    # Las decisiones mal formadas se rechazan sin abrir el circuit breaker del exchange
+    malas = [{**decision, "symbol": "ETH/USDT", "price": 0.0}] * 3 + [{"symbol": "ETH/USDT", "type": "buy"}] * 3
+    resultados = await manager.execute_batch(malas)
+    assert all(r["reason"].startswith("error:") for r in resultados)
+    assert not manager.breaker_tripped and manager.breaker.failures == 0
+    await manager.shutdown()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_scenarios.py
+Pruebas unitarias para el generador vectorizado de escenarios de mercado.
+"""
+
+import numpy as np
+import pytest
+from scenarios import generar_escenario, ESCENARIOS
+
+SIMBOLOS = ["BTC/USDT", "ETH/USDT", "SOL/USDT"]
+
+def test_escenario_reproducible_con_semilla():
+    a = generar_escenario("stress", horas=500, simbolos=SIMBOLOS, semilla=7)
+    b = generar_escenario("stress", horas=500, simbolos=SIMBOLOS, semilla=7)
+    assert a.precios.shape == (3, 500)
+    assert np.array_equal(a.precios, b.precios)
+    assert np.array_equal(a.fallo_api, b.fallo_api)
+    assert a.fallo_api.any()
+
+@pytest.mark.parametrize("nombre", sorted(ESCENARIOS))
+def test_series_en_rangos_del_regimen(nombre):
+    escenario = generar_escenario(nombre, horas=720, simbolos=SIMBOLOS, semilla=1)
+    assert np.all(escenario.precios > 0)
+    assert np.all((escenario.rsi >= 0) & (escenario.rsi <= 100))
+    assert len(escenario.regimenes) == 720
+    assert escenario.macro["DXY"].shape == (720,)
+
+def test_tramos_crash_y_caida_inyectada():
+    escenario = generar_escenario("crash", horas=48, simbolos=SIMBOLOS, semilla=2, caidas=[(30, 0.2)])
+    assert escenario.regimenes[:12] == ["caida"] * 12
+    assert escenario.regimenes[12] == "post_caida"
+    assert escenario.macro["fed_rate_change"][0] == 0.25
+    retornos = escenario.precios[:, 1:] / escenario.precios[:, :-1]
+    assert np.all(retornos[:, :11] <= 0.95)
+    assert np.all(retornos[:, 29] <= 1.02 * 0.8)
+    assert np.all(escenario.volatilidad[:, 30] >= 0.2)
+
+def test_snapshot_formato_eventos():
+    escenario = generar_escenario("stable", horas=100, simbolos=SIMBOLOS, semilla=3)
+    datos = escenario.snapshot(10)
+    btc = datos["mercado"]["BTC/USDT"]
+    assert btc["price"] == escenario.precios[0, 10]
+    assert len(btc["prices"]) == 50
+    assert btc["prices"][-1] == btc["price"]
+    assert set(datos["macro"]) >= {"DXY", "SP500", "fed_rate_change"}
+
+def test_helpers_nucleus_y_dataframe():
+    escenario = generar_escenario("volatile", horas=400, simbolos=SIMBOLOS, semilla=4)
+    datos = escenario.datos_nucleus("ETH/USDT")
+    assert len(datos["precios"]) == len(datos["rsi"]) == len(datos["sma"]) == len(datos["dxy"]) == 400
+    df = escenario.dataframe("SOL/USDT")
+    assert len(df) == 400
+    assert (df["high"] >= df[["open", "close"]].max(axis=1)).all()
+    assert (df["low"] <= df[["open", "close"]].min(axis=1)).all()
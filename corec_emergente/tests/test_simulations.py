@@ -20,101 +20,30 @@ from corec.plugins.trading.entidad_gestor_capital import EntidadGestorCapitalPoo
 from corec.plugins.trading.entidad_cierre_trading import EntidadCierreTrading
 from corec.plugins.trading.entidad_reloj_trading import EntidadRelojTrading
 from corec.plugins.trading.entidad_alpha_vantage_sync import EntidadAlphaVantageSync
+from clock import reloj_actual
+from scenarios import generar_escenario
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 @pytest.mark.asyncio
-async def simulate_market(controller, scenario, hours=720):
-    """Simula un escenario de mercado durante un número de horas."""
+async def simulate_market(controller, scenario, hours=720, semilla=0):
+    """Simula un escenario de mercado durante un número de horas (reproducible con la semilla)."""
     symbols = ["BTC/USDT", "ETH/USDT", "SOL/USDT", "ADA/USDT", "XRP/USDT"]
-    macro_data = {
-        "DXY": 100.0,
-        "SP500": 0.0,
-        "Nasdaq": 0.0,
-        "Gold": 0.0,
-        "Oil": 0.0,
-        "altcoins_volume": 1000000,
-        "fed_rate_change": 0.0
-    }
-    market_data = {s: {"price": 50000 if "BTC" in s else 3000 if "ETH" in s else 50, "rsi": 50, "sma_signal": 0, "volatilidad": 0.01, "volume": 1000000, "prices": [50000 if "BTC" in s else 3000 if "ETH" in s else 50] * 50} for s in symbols}
+    escenario = generar_escenario(scenario, horas=hours, simbolos=symbols, semilla=semilla)
     trades = []
     api_failures = 0
+    reloj = reloj_actual()
 
     for hour in range(hours):
-        # Ajustar datos según escenario
-        if scenario == "stable":
-            for s in symbols:
-                market_data[s]["price"] *= random.uniform(0.98, 1.02)
-                market_data[s]["rsi"] = random.uniform(40, 60)
-                market_data[s]["volatilidad"] = 0.01
-                market_data[s]["prices"].append(market_data[s]["price"])
-                market_data[s]["prices"] = market_data[s]["prices"][-50:]
-            macro_data["DXY"] += random.uniform(-0.1, 0.1)
-            macro_data["SP500"] = random.uniform(-0.005, 0.005)
-        elif scenario == "bullish":
-            for s in symbols:
-                market_data[s]["price"] *= random.uniform(1.02, 1.05)
-                market_data[s]["rsi"] = random.uniform(60, 80)
-                market_data[s]["volatilidad"] = 0.05
-                market_data[s]["prices"].append(market_data[s]["price"])
-                market_data[s]["prices"] = market_data[s]["prices"][-50:]
-            macro_data["DXY"] -= random.uniform(0.05, 0.1)
-            macro_data["SP500"] = random.uniform(0.01, 0.02)
-            macro_data["fed_rate_change"] = -0.25 if random.random() < 0.1 else 0.0
-        elif scenario == "crash":
-            for s in symbols:
-                market_data[s]["price"] *= random.uniform(0.85, 0.95) if hour < 12 else random.uniform(0.98, 1.02)
-                market_data[s]["rsi"] = random.uniform(20, 40)
-                market_data[s]["volatilidad"] = 0.1 if hour < 12 else 0.02
-                market_data[s]["prices"].append(market_data[s]["price"])
-                market_data[s]["prices"] = market_data[s]["prices"][-50:]
-            macro_data["DXY"] += random.uniform(0.1, 0.2)
-            macro_data["SP500"] = random.uniform(-0.05, -0.02)
-            macro_data["fed_rate_change"] = 0.25 if hour == 0 else 0.0
-        elif scenario == "volatile":
-            # Simular período volátil (inspirado en halving)
-            if hour < 240:  # Pre-halving (10 días): Subida
-                for s in symbols:
-                    market_data[s]["price"] *= random.uniform(1.01, 1.03)
-                    market_data[s]["rsi"] = random.uniform(60, 75)
-                    market_data[s]["volatilidad"] = 0.04
-                    market_data[s]["prices"].append(market_data[s]["price"])
-                    market_data[s]["prices"] = market_data[s]["prices"][-50:]
-                macro_data["DXY"] -= random.uniform(0.02, 0.05)
-                macro_data["SP500"] = random.uniform(0.005, 0.01)
-            elif hour < 360:  # Post-halving (5 días): Corrección
-                for s in symbols:
-                    market_data[s]["price"] *= random.uniform(0.90, 0.95)
-                    market_data[s]["rsi"] = random.uniform(25, 40)
-                    market_data[s]["volatilidad"] = 0.06
-                    market_data[s]["prices"].append(market_data[s]["price"])
-                    market_data[s]["prices"] = market_data[s]["prices"][-50:]
-                macro_data["DXY"] += random.uniform(0.05, 0.1)
-                macro_data["SP500"] = random.uniform(-0.02, -0.01)
-                macro_data["fed_rate_change"] = 0.25 if hour == 240 else 0.0
-            else:  # Recuperación (15 días)
-                for s in symbols:
-                    market_data[s]["price"] *= random.uniform(1.00, 1.02)
-                    market_data[s]["rsi"] = random.uniform(45, 55)
-                    market_data[s]["volatilidad"] = 0.02
-                    market_data[s]["prices"].append(market_data[s]["price"])
-                    market_data[s]["prices"] = market_data[s]["prices"][-50:]
-                macro_data["DXY"] -= random.uniform(0.01, 0.03)
-                macro_data["SP500"] = random.uniform(0.0, 0.005)
-        elif scenario == "stress":
-            for s in symbols:
-                market_data[s]["price"] *= random.uniform(0.95, 1.05)
-                market_data[s]["rsi"] = random.uniform(30, 70)
-                market_data[s]["volatilidad"] = random.uniform(0.02, 0.08)
-                market_data[s]["prices"].append(market_data[s]["price"])
-                market_data[s]["prices"] = market_data[s]["prices"][-50:]
-            macro_data["DXY"] += random.uniform(-0.2, 0.2)
-            macro_data["SP500"] = random.uniform(-0.02, 0.02)
+        datos = escenario.snapshot(hour)
+        market_data = datos["mercado"]
+        macro_data = datos["macro"]
+        if datos["fallo_api"]:
             # Simular fallos de API
-            if random.random() < 0.2:
-                api_failures += 1
-                continue
+            api_failures += 1
+            await reloj.avanzar(3600)
+            continue
 
         # Publicar datos de mercado
         for s in symbols:
@@ -136,21 +65,14 @@ async def simulate_market(controller, scenario, hours=720):
             destino="trading"
         )
 
-        # Simular micro-ciclo cada 6 horas
-        if hour % 6 == 0:
-            await controller.publicar_evento(
-                canal="trading_clock",
-                datos={"texto": "micro_cycle"},
-                destino="trading"
-            )
-
         # Recolectar trades
         for bloque in controller.nucleus.bloques:
             for trade in bloque.memoria_colectiva:
                 if trade["decision"] in ["comprar", "vender", "cerrar"]:
                     trades.append(trade)
 
-        await asyncio.sleep(0.1)  # Simular 1 hora
+        # Avanzar 1 hora virtual: dispara micro-ciclos, chequeos de caída y datos macro programados
+        await reloj.avanzar(3600)
 
     # Calcular métricas
     metrics = {
@@ -185,7 +107,7 @@ def calculate_max_drawdown(trades):
     return max(drawdown) if drawdown else 0.0
 
 @pytest.mark.asyncio
-async def test_simulation_stable():
+async def test_simulation_stable(virtual_clock):
     controller = AetherionController({"id": "test-controller"})
     await setup_controller(controller)
     metrics = await simulate_market(controller, "stable")
@@ -194,7 +116,7 @@ async def test_simulation_stable():
     assert metrics["win_rate"] >= 0.5, "Win rate debe ser al menos 50%"
 
 @pytest.mark.asyncio
-async def test_simulation_bullish():
+async def test_simulation_bullish(virtual_clock):
     controller = AetherionController({"id": "test-controller"})
     await setup_controller(controller)
     metrics = await simulate_market(controller, "bullish")
@@ -203,7 +125,7 @@ async def test_simulation_bullish():
     assert metrics["win_rate"] >= 0.7, "Win rate debe ser alto"
 
 @pytest.mark.asyncio
-async def test_simulation_crash():
+async def test_simulation_crash(virtual_clock):
     controller = AetherionController({"id": "test-controller"})
     await setup_controller(controller)
     metrics = await simulate_market(controller, "crash", hours=24)
@@ -212,7 +134,7 @@ async def test_simulation_crash():
     assert metrics["total_trades"] < 50, "Menos trades durante caída"
 
 @pytest.mark.asyncio
-async def test_simulation_volatile():
+async def test_simulation_volatile(virtual_clock):
     controller = AetherionController({"id": "test-controller"})
     await setup_controller(controller)
     metrics = await simulate_market(controller, "volatile")
@@ -222,7 +144,7 @@ async def test_simulation_volatile():
     assert metrics["max_drawdown"] < 0.3, "Drawdown debe ser controlado"
 
 @pytest.mark.asyncio
-async def test_simulation_stress():
+async def test_simulation_stress(virtual_clock):
     controller = AetherionController({"id": "test-controller"})
     await setup_controller(controller)
     metrics = await simulate_market(controller, "stress", hours=2000)
@@ -232,6 +154,7 @@ async def test_simulation_stress():
     assert metrics["mutaciones"] < 10000, "Mutaciones deben ser limitadas"
 
 async def setup_controller(controller):
+    # El reloj virtual (fixture virtual_clock) ya está instalado al crear las entidades y sus planificadores
     config = {
         "canales": ["trading_comandos", "trading_respuestas", "trading_backtest", "trading_strategy",
                     "trading_btc", "trading_eth", "trading_altcoin", "trading_exchange",
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_slippage_model.py
+Pruebas unitarias para el modelo de deslizamiento por profundidad L2 y ejecuciones.
+"""
+
+import pytest
+from corec.plugins.trading.slippage_model import SlippageModel
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+
+LIBRO = {"bids": [[99.0, 1.0], [98.0, 2.0]], "asks": [[101.0, 1.0], [102.0, 2.0, 4]]}
+
+def test_estimacion_recorre_el_libro():
+    modelo = SlippageModel({"beyond_depth": 0.01})
+    modelo.update_book("BTC/USDT", LIBRO)
+    assert modelo.estimate("BTC/USDT", "buy", 0.5) == pytest.approx(0.01)
+    assert modelo.estimate("BTC/USDT", "buy", 2.0) == pytest.approx((101.0 + 102.0) / 2 / 100 - 1)
+    assert modelo.estimate("BTC/USDT", "sell", 3.0, price=99.0) == pytest.approx(1 - (99.0 + 2 * 98.0) / 3 / 99.0)
+    # Más allá de la profundidad conocida se paga el peor nivel penalizado
+    assert modelo.estimate("BTC/USDT", "buy", 4.0) == pytest.approx((101.0 + 204.0 + 102.0 * 1.01) / 4 / 100 - 1)
+
+def test_lote_vectorizado_coincide_con_estimaciones_sueltas():
+    modelo = SlippageModel()
+    modelo.update_book("BTC/USDT", LIBRO)
+    modelo.update_book("ETH/USDT", {"bids": [[9.9, 10.0]], "asks": [[10.1, 10.0]]})
+    ordenes = [("BTC/USDT", "buy", 0.5), ("ETH/USDT", "sell", 5.0), ("BTC/USDT", "sell", 2.0), ("SOL/USDT", "buy", 1.0)]
+    lote = modelo.estimate_batch(*zip(*ordenes), volatilidades=[0.02, 0.02, 0.02, 0.05])
+    sueltas = [modelo.estimate(s, l, q, volatilidad=0.05) for s, l, q in ordenes]
+    assert lote.tolist() == pytest.approx(sueltas)
+    # Sin libro ni ejecuciones: fracción de la volatilidad
+    assert lote[3] == pytest.approx(0.005)
+
+def test_ejecuciones_corrigen_y_ventanas_acotadas():
+    modelo = SlippageModel({"window": 10, "snapshots": 2})
+    for _ in range(3):
+        modelo.update_book("BTC/USDT", LIBRO)
+    assert len(modelo.books["BTC/USDT"]) == 2
+    for _ in range(25):
+        modelo.record_fill("BTC/USDT", "buy", 100.0, 101.5, predicted=0.01)
+    assert len(modelo.realized["BTC/USDT"]) == 10
+    assert modelo.stats()["BTC/USDT"]["bias"] == pytest.approx(0.005)
+    assert modelo.estimate("BTC/USDT", "buy", 0.5) == pytest.approx(0.015)
+    # Sin libro vigente se usa lo realizado (y sin ejecuciones, la volatilidad por defecto)
+    assert modelo.estimate("ETH/USDT", "sell", 1.0) == pytest.approx(0.002)
+    modelo.record_fill("ETH/USDT", "sell", 100.0, 99.0)
+    assert modelo.estimate("ETH/USDT", "sell", 1.0) == pytest.approx(0.01)
+
+@pytest.mark.asyncio
+async def test_exchange_manager_rechaza_por_profundidad(sim_pool, fake_controller):
+    manager = EntidadExchangeManager({"exchange": "simulator", "circuit_breaker": {"max_failures": 3, "reset_timeout": 60},
+                                      "slippage_tolerance": 0.01, "execution": {"slices": 1},
+                                      "simulator": {"symbols": ["BTC/USDT"], "prices": {"BTC/USDT": 100.0},
+                                                    "liquidity": {"levels": 5, "step": 0.002, "size": 1.0}}})
+    manager.controller = fake_controller
+    await manager.init()
+    decision = {"symbol": "BTC/USDT", "type": "buy", "price": 100.0, "risk_per_trade": 0.1, "trade_multiplier": 1}
+    orden = await manager.execute_trade(decision)
+    await manager.execution.wait(orden.id)
+    assert orden.state == "completed"
+    assert manager.slippage.stats()["BTC/USDT"]["fills"] == 1
+    # Diez veces más cantidad atraviesa los cinco niveles del libro
+    assert await manager.execute_trade({**decision, "trade_multiplier": 10}) is None
+    assert manager.controller.eventos[-1]["tipo"] == "slippage_exceed"
+    await manager.shutdown()
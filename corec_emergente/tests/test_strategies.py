@@ -8,6 +8,7 @@ Pruebas unitarias para las estrategias de trading basadas en el enjambre.
 import pytest
 import asyncio
 from corec.controlador.aetherion_controller import AetherionController
+from corec.entidad_base import Event
 from corec.plugins.trading.entidad_sync_strategy import EntidadSyncStrategy
 from corec.plugins.trading.blocks.trading_symbiotic import TradingSymbioticBlock
 from entities.nano import NanoEntidad
@@ -41,7 +42,8 @@ async def test_sync_strategy():
     ))
     assert len(controller.eventos_publicados) > 0
     assert controller.eventos_publicados[-1]["canal"] == "trading_exchange"
-    assert controller.eventos_publicados[-1]["datos"]["tipo"] == "trade_execution"
+    assert controller.eventos_publicados[-1]["datos"]["tipo"] == "trade_execution_batch"
+    assert controller.eventos_publicados[-1]["datos"]["decisions"][0]["symbol"] == "BTC/USDT"
 
     # Test ajuste de salud simbólica
     await strategy.manejar_evento(Event(
@@ -55,3 +57,17 @@ async def test_sync_strategy():
             assert entidad.estado_emocional == "curiosidad"
 
     await strategy.shutdown()
+
+@pytest.mark.asyncio
+async def test_sync_strategy_alimenta_la_covarianza_en_cada_tick(sim_pool):
+    strategy = EntidadSyncStrategy()
+    for precio in (50000, 50500, 50200):
+        await strategy.manejar_evento(Event(canal="trading_btc", datos={"symbol": "BTC/USDT", "price": precio},
+                                            destino="trading"))
+    await strategy.manejar_evento(Event(canal="trading_altcoin", datos={"tipo": "snapshot", "symbols": {
+        "BTC/USDT": {"symbol": "BTC/USDT", "price": 50300}, "SOL/USDT": {"symbol": "SOL/USDT", "price": 20}
+    }}, destino="trading"))
+    # Cada evento es un tick aunque el búfer conflacionado sólo conserve el último precio
+    assert strategy.portfolio.observations == 3
+    assert strategy.portfolio.symbols == ["BTC/USDT", "SOL/USDT"]
+    assert strategy.market_data["BTC/USDT"]["price"] == 50300
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_sweep.py
+Pruebas unitarias para el barrido de parámetros del Nucleus.
+"""
+
+import json
+import pytest
+from sweep import BarridoParametros, generar_grid, generar_aleatorio, clave_config
+from channels import CanalLocal
+from entities.nano import NanoEntidad
+from blocks.symbiotic import BloqueSimbiotico
+
+def test_generar_grid():
+    configs = generar_grid({"memoria_max": [20, 50], "fraccion_posicion": [0.05, 0.1, 0.2]})
+    assert len(configs) == 6
+    assert {"memoria_max": 20, "fraccion_posicion": 0.2} in configs
+
+def test_generar_aleatorio_reproducible():
+    espacio = {"fitness_threshold": (0.0, 0.05), "entidades_por_bloque": (5, 20), "num_bloques": [1, 3]}
+    a = generar_aleatorio(espacio, 10, semilla=7)
+    b = generar_aleatorio(espacio, 10, semilla=7)
+    assert a == b
+    for params in a:
+        assert 0.0 <= params["fitness_threshold"] <= 0.05
+        assert 5 <= params["entidades_por_bloque"] <= 20
+        assert isinstance(params["entidades_por_bloque"], int)
+        assert params["num_bloques"] in [1, 3]
+
+def test_barrido_reanuda_desde_resultados(tmp_path):
+    path = tmp_path / "resultados.jsonl"
+    configs = generar_grid({"memoria_max": [20, 50]})
+    hecho = configs[0]
+    fila = {"clave": clave_config(hecho, 0, 10), "params": hecho, "semilla": 0, "ciclos": 10, "metricas": {"roi": 0.01}}
+    with open(path, "w") as f:
+        f.write(json.dumps(fila) + "\n")
+        f.write('{"clave": "trunc')  # línea incompleta de una ejecución interrumpida
+
+    barrido = BarridoParametros(configs, semillas=[0], ciclos=10, resultados_path=str(path))
+    pendientes = barrido.pendientes()
+    assert [t["params"] for t in pendientes] == [configs[1]]
+    assert barrido.tabla()[0]["roi"] == 0.01
+
+def test_barrido_completo_escribe_y_reutiliza_resultados(tmp_path):
+    path = tmp_path / "resultados.jsonl"
+    configs = generar_grid({"num_bloques": [1, 2]})
+    barrido = BarridoParametros([{**c, "entidades_por_bloque": 3} for c in configs], semillas=[0], ciclos=5,
+                                resultados_path=str(path), max_workers=2)
+    tabla = barrido.ejecutar()
+    assert sorted(f["num_bloques"] for f in tabla) == [1, 2]
+    assert all("roi" in f for f in tabla)
+    filas = [json.loads(linea) for linea in path.read_text().splitlines()]
+    assert len(filas) == 2 and all(f["ciclos"] == 5 for f in filas)
+    # Relanzado, el barrido sólo lee la caché
+    repetido = BarridoParametros(barrido.configs, semillas=[0], ciclos=5, resultados_path=str(path))
+    assert repetido.pendientes() == []
+    assert repetido.ejecutar() == tabla
+
+@pytest.mark.asyncio
+async def test_canal_local_registra_bloques_al_construirlos():
+    canal = CanalLocal()
+    recibidos = []
+
+    async def escuchar(mensaje):
+        recibidos.append(json.loads(mensaje)["id"])
+
+    await canal.subscribe("bloque_comunicacion", escuchar)
+    bloques = []
+    for b in range(2):
+        entidades = [NanoEntidad(id=f"ent_{b}_{i}", canal=canal) for i in range(4)]
+        for entidad in entidades:
+            entidad.etiqueta = "fuego"
+        bloques.append(BloqueSimbiotico(id=f"bloque_{b}", entidades=entidades, canal=canal, config={}))
+    # Cada bloque queda suscrito al construirse, sin await, y los demás lo encuentran en el canal
+    assert canal.bloques_suscritos() == bloques
+    assert len(canal.subscribers["bloque_comunicacion"]) == 3
+    await canal.publish("bloque_comunicacion", json.dumps({"tipo": "bloque_mensaje", "id": "bloque_0", "peso": 0}))
+    assert recibidos == ["bloque_0"]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+test_venue_health.py
+Pruebas unitarias para la salud de los venues: latencias, circuit breaker semiabierto y preferencia por venues rápidos.
+"""
+
+import pytest
+import ccxt.async_support as ccxt
+from corec.plugins.trading.venue_health import VenueHealth, CircuitBreaker
+from corec.plugins.trading.rate_governor import RateGovernor
+from corec.plugins.trading.order_router import OrderRouter
+from corec.plugins.trading.exchange_simulator import ExchangeSimulator, simulator_factory
+import corec.plugins.trading.venue_health as venue_health
+from corec.plugins.trading.entidad_exchange_manager import EntidadExchangeManager
+from corec.plugins.trading.entidad_btc_watcher import EntidadBTCWatcher
+
+def test_percentiles_y_puntuacion():
+    salud = VenueHealth({"latency_target": 1.0})
+    for i in range(100):
+        salud.observe("rapido", "fetch_ticker", 0.05)
+        salud.observe("lento", "fetch_ticker", 3.0 if i % 20 == 0 else 0.05)
+    endpoint = salud.endpoints("lento")["fetch_ticker"]
+    assert endpoint["count"] == 100 and endpoint["p50"] == pytest.approx(0.05, rel=0.2)
+    assert endpoint["p99"] == pytest.approx(3.0, rel=0.2)
+    assert salud.score("rapido") == 1.0 and salud.score("lento") == pytest.approx(1 / 3, rel=0.2)
+    assert salud.best(["lento", "rapido"]) == "rapido"
+    # Sólo los errores de red cuentan contra el venue
+    salud.observe("rapido", "create_order", 0.05, ccxt.InvalidOrder("cantidad"))
+    assert salud.score("rapido") == 1.0
+    salud.observe("rapido", "create_order", 0.05, ccxt.NetworkError("timeout"))
+    assert salud.score("rapido") == pytest.approx(0.95)
+    assert salud.snapshot()["lento"]["endpoints"]["fetch_ticker"]["count"] == 100
+    assert salud.score("nuevo") == 1.0
+
+def test_breaker_semiabierto_con_pruebas():
+    breaker = CircuitBreaker(max_failures=2, reset_timeout=10, max_reset_timeout=15, slow_call=1.0)
+    breaker.record_success(latency=2.0, now=0)
+    assert breaker.record_failure(now=0) and breaker.state == "open"
+    assert not breaker.ready(now=5) and breaker.ready(now=10)
+    # Al vencer la espera sólo sale una petición de prueba
+    assert breaker.allow(now=10) and breaker.state == "half_open" and not breaker.allow(now=10)
+    assert breaker.record_failure(now=10) and breaker.timeout == 15 and not breaker.allow(now=20)
+    assert breaker.allow(now=25) and breaker.record_success(latency=0.1)
+    assert breaker.state == "closed" and breaker.timeout == 10 and breaker.allow(now=25)
+
+@pytest.mark.asyncio
+async def test_latencias_medidas_en_el_cliente_gobernado(virtual_clock, sim_pool):
+    cliente = RateGovernor().wrap(ExchangeSimulator({"symbols": ["BTC/USDT"], "latency": 0.5}), "sim", "market_data")
+    tarea = virtual_clock.lanzar(cliente.fetch_ticker("BTC/USDT"))
+    await virtual_clock.avanzar(0.5)
+    await tarea
+    assert venue_health.get_venue_health().endpoints("sim")["fetch_ticker"]["p50"] == pytest.approx(0.5, rel=0.2)
+
+def test_el_router_prefiere_el_venue_rapido():
+    salud = VenueHealth({"min_samples": 1})
+    for _ in range(10):
+        salud.observe("lento", "create_order", 3.0)
+    router = OrderRouter(config={"health_penalty": 0.001}, health=salud)
+    router.add_venue("lento", None, fee=0.0)
+    router.add_venue("rapido", None, fee=0.0)
+    router.update_book("lento", "BTC/USDT", {"asks": [[100.0, 5.0]], "bids": [[99.0, 5.0]]})
+    router.update_book("rapido", "BTC/USDT", {"asks": [[100.005, 5.0]], "bids": [[98.995, 5.0]]})
+    assert list(router.plan("BTC/USDT", "buy", 1.0)) == ["rapido"]
+    assert list(router.plan("BTC/USDT", "sell", 1.0)) == ["rapido"]
+    # Una diferencia de precio mayor que la penalización sigue mandando
+    router.update_book("lento", "BTC/USDT", {"asks": [[99.0, 5.0]], "bids": [[100.0, 5.0]]})
+    assert list(router.plan("BTC/USDT", "buy", 1.0)) == ["lento"]
+
+@pytest.mark.asyncio
+async def test_exchange_manager_prueba_antes_de_rearmar(virtual_clock, sim_pool, fake_controller):
+    manager = EntidadExchangeManager({"exchange": "simulator", "circuit_breaker": {"max_failures": 1, "reset_timeout": 10},
+                                      "slippage_tolerance": 0.01, "simulator": {"symbols": ["BTC/USDT"]}})
+    manager.controller = fake_controller
+    await manager.init()
+    manager.exchange.client.fail_next(1)
+    with pytest.raises(ccxt.NetworkError):
+        await manager._place_child("BTC/USDT", "buy", 0.1)
+    assert manager.breaker_tripped and not await manager.check_circuit_breaker(probe=False)
+    await virtual_clock.avanzar(10)
+    assert (await manager._place_child("BTC/USDT", "buy", 0.1))["status"] == "closed"
+    tipos = [e["tipo"] for e in manager.controller.eventos if e["tipo"].startswith("circuit_breaker")]
+    assert tipos == ["circuit_breaker_tripped", "circuit_breaker_half_open", "circuit_breaker_reset"]
+    assert not manager.breaker_tripped
+    await manager.shutdown()
+
+@pytest.mark.asyncio
+async def test_watcher_sondea_el_exchange_mas_sano(sim_pool, monkeypatch):
+    salud = VenueHealth({"min_samples": 1})
+    monkeypatch.setattr(venue_health, "_health", salud)
+    for nombre in ("sim_a", "sim_b"):
+        sim_pool.register_factory(nombre, simulator_factory({"symbols": ["BTC/USDT"]}))
+    watcher = EntidadBTCWatcher({"update_interval": 60, "exchange": "sim_a", "fallback_exchanges": ["sim_b"]})
+    assert (await watcher._get_exchange()).client is sim_pool.client("sim_a")
+    for _ in range(5):
+        salud.observe("sim_a", "fetch_ticker", 4.0)
+    await watcher._get_exchange()
+    assert watcher.venue == "sim_b"
+    for nombre in ("sim_a", "sim_b"):
+        assert sim_pool.refs(nombre) == 1
+    await watcher.shutdown()
+    assert sim_pool.refs("sim_a") == sim_pool.refs("sim_b") == 0
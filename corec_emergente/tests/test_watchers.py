@@ -84,3 +84,49 @@ async def test_altcoin_watcher():
     assert len(controller.eventos_publicados) > 0
     assert controller.eventos_publicados[-1]["canal"] == "trading_altcoin"
     await watcher.shutdown()
+
+class ExchangeConcurrente:
+    has = {"fetchTickers": True}
+
+    def __init__(self):
+        self.activas = 0
+        self.max_activas = 0
+        self.llamadas_tickers = 0
+
+    async def fetch_tickers(self, symbols):
+        self.llamadas_tickers += 1
+        return {s: {"symbol": s, "last": 10.0 + i} for i, s in enumerate(symbols)}
+
+    async def fetch_ohlcv(self, symbol, timeframe='1h', since=None, limit=14):
+        self.activas += 1
+        self.max_activas = max(self.max_activas, self.activas)
+        await asyncio.sleep(0.01)
+        self.activas -= 1
+        if symbol == "ALT3/USDT":
+            raise Exception("timeout")
+        return [[0, 10, 11, 9, 10 + i * 0.1, 100] for i in range(14)]
+
+@pytest.mark.asyncio
+async def test_altcoin_watcher_snapshot_concurrente():
+    config = {
+        "canales": ["trading_altcoin", "alertas"],
+        "log_level": "INFO",
+        "destino_default": "trading",
+        "auto_register_channels": True,
+        "altcoins": [f"ALT{i}/USDT" for i in range(1, 9)],
+        "update_interval": 60,
+        "max_concurrency": 3
+    }
+    controller = AetherionController({"id": "test-controller"})
+    watcher = EntidadAltcoinWatcher(config)
+    watcher.controller = controller
+    watcher.exchange = ExchangeConcurrente()
+
+    await watcher.update_altcoins_snapshot()
+    assert watcher.exchange.llamadas_tickers == 1
+    assert 1 < watcher.exchange.max_activas <= 3
+    evento = controller.eventos_publicados[-1]
+    assert evento["canal"] == "trading_altcoin"
+    assert evento["datos"]["tipo"] == "snapshot"
+    assert len(evento["datos"]["symbols"]) == 7
+    assert "ALT3/USDT" not in evento["datos"]["symbols"]